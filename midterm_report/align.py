@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""Align iperf3 intervals and socket samples of the same flow on one clock.
+
+The clock is seconds since the iperf3 test start. Its epoch comes from
+`start.timestamp.timesecs` (whole seconds), refined with bytes_acked by
+refine_anchor to within 0.5 s. Streams are matched with socket flows by
+(local port, remote port), and each flow's samples are joined onto its
+intervals (AlignedFlow) with searchsorted.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Any, Dict, Optional, Sequence, Tuple
+
+import numpy as np
+
+from parse_cache import IntervalTable
+from ss_parser import FIELDS, FlowKey, FlowSeries
+
+SLACK_BYTES = 64.0  # bytes_acked counts the SYN and iperf3's 37-byte cookie before the test starts
+SUMMARY_COLUMNS = ("cwnd", "rtt", "ssthresh", "delivery_rate")
+
+
+def iperf_anchor(doc: Dict[str, Any]) -> Optional[float]:
+    """Epoch seconds of the test start (whole seconds) from an iperf3 -J document."""
+    timestamp = doc.get("start", {}).get("timestamp", {})
+    return float(timestamp["timesecs"]) if "timesecs" in timestamp else None
+
+
+def stream_intervals(doc: Dict[str, Any]) -> Dict[Tuple[int, int], IntervalTable]:
+    """Per-stream intervals of an iperf3 -J document keyed by (local port, remote port)."""
+    ports = {
+        conn["socket"]: (conn.get("local_port"), conn.get("remote_port"))
+        for conn in doc.get("start", {}).get("connected", [])
+    }
+    rows: Dict[int, list] = {}
+    for interval in doc.get("intervals", []):
+        for stream in interval.get("streams", []):
+            rows.setdefault(stream.get("socket"), []).append(stream)
+    return {ports[socket]: IntervalTable.from_intervals(streams) for socket, streams in rows.items() if socket in ports}
+
+
+def refine_anchor(anchor: float, table: IntervalTable, series: FlowSeries, slack: float = SLACK_BYTES) -> float:
+    """Midpoint of the start times in [anchor, anchor + 1) consistent with bytes_acked <= bytes written.
+
+    A later start would leave iperf3 having written fewer bytes than some
+    sample acked, which bounds the window from above. The result is off by at
+    most half the window, i.e. at most 0.5 s. The window only narrows when
+    the send buffer drains.
+    """
+    acked = series.columns["bytes_acked"]
+    valid = ~np.isnan(acked)
+    if not len(table) or not valid.any():
+        return anchor
+    times, needed = series.times[valid] - anchor, acked[valid] - slack
+    edges = np.concatenate(([table.start[0]], table.end))
+    written = np.concatenate(([0.0], np.cumsum(np.nan_to_num(table.bits_per_second) * (table.end - table.start) / 8)))
+    constrained = needed > 0
+    if not constrained.any():
+        return anchor + 0.5
+    needed, times = needed[constrained], times[constrained]
+    # earliest test time by which iperf3 had written each sample's acked bytes (inverse of the cumulative curve)
+    upper = np.searchsorted(written, needed, side="left")
+    if upper.max() >= len(written):
+        return anchor  # acked more than iperf3 ever wrote; keep the coarse anchor
+    lower = upper - 1
+    fraction = (needed - written[lower]) / (written[upper] - written[lower])
+    reached = edges[lower] + fraction * (edges[upper] - edges[lower])
+    latest = (times - reached).min()  # a start later than this leaves some sample over-acked
+    if latest < 0:
+        return anchor  # inconsistent even at the earliest start
+    return anchor + float(min(latest, 1.0)) / 2
+
+
+@dataclass
+class AlignedFlow:
+    key: FlowKey
+    anchor: float  # epoch seconds of the common clock's zero
+    times: np.ndarray  # sample times, seconds since anchor
+    columns: Dict[str, np.ndarray]  # socket columns plus interval, interval_bps, interval_retransmits
+    intervals: IntervalTable
+    per_interval: Dict[str, np.ndarray]  # per interval: mean, max and as-of-end last of the socket columns
+
+    def __len__(self) -> int:
+        return len(self.times)
+
+
+def join(
+    series: FlowSeries, table: IntervalTable, anchor: float, columns: Sequence[str] = SUMMARY_COLUMNS
+) -> AlignedFlow:
+    """Interval join of series' samples onto table, both on seconds since anchor."""
+    times = series.times - anchor
+    count = len(table)
+    index = np.searchsorted(table.start, times, side="right") - 1
+    inside = (index >= 0) & (times < table.end[np.maximum(index, 0)]) if count else np.zeros(len(times), dtype=bool)
+    index[~inside] = -1
+
+    def at(values: np.ndarray, rows: np.ndarray, valid: np.ndarray) -> np.ndarray:
+        return np.where(valid, values[np.maximum(rows, 0)], np.nan) if len(values) else np.full(len(rows), np.nan)
+
+    joined = {name: series.columns[name] for name in FIELDS}
+    joined["interval"] = index
+    joined["interval_bps"] = at(table.bits_per_second, index, inside)
+    joined["interval_retransmits"] = at(table.retransmits, index, inside)
+
+    per_interval: Dict[str, np.ndarray] = {"samples": np.bincount(index[inside], minlength=count)}
+    # as-of join: the last sample at or before each interval's end
+    last = np.searchsorted(times, table.end, side="right") - 1
+    for name in columns:
+        values = series.columns[name]
+        ok = inside & ~np.isnan(values)
+        n = np.bincount(index[ok], minlength=count)
+        total = np.bincount(index[ok], weights=values[ok], minlength=count)
+        peak = np.full(count, -np.inf)
+        np.maximum.at(peak, index[ok], values[ok])
+        with np.errstate(invalid="ignore", divide="ignore"):
+            per_interval[f"{name}_mean"] = np.where(n > 0, total / n, np.nan)
+        per_interval[f"{name}_max"] = np.where(n > 0, peak, np.nan)
+        per_interval[f"{name}_last"] = at(values, last, last >= 0)
+    return AlignedFlow(series.key, anchor, times, joined, table, per_interval)
+
+
+def align_run(
+    doc: Dict[str, Any], flows: Dict[FlowKey, FlowSeries], refine: bool = True
+) -> Dict[FlowKey, AlignedFlow]:
+    """Join every socket flow that belongs to one of doc's iperf3 streams."""
+    anchor = iperf_anchor(doc)
+    if anchor is None:
+        return {}
+    streams = stream_intervals(doc)
+    aligned = {}
+    for key, series in flows.items():
+        table = streams.get((key[1], key[3]))
+        if table is None:
+            continue
+        flow_anchor = refine_anchor(anchor, table, series) if refine else anchor
+        aligned[key] = join(series, table, flow_anchor)
+    return aligned
@@ -0,0 +1,241 @@
+#!/usr/bin/env python3
+"""What generate_visuals.py builds, from which inputs, and where the data lives.
+
+Scenario metadata and the build-graph targets (each figure and
+metrics_table.md with the digests of its inputs) are kept apart from the
+drawing code. Deciding what is stale, and printing an up-to-date metrics
+table, then needs neither matplotlib nor numpy. A target's job imports
+generate_visuals only when it runs, in its worker process.
+
+The data directory holds the scenario logs, summary.json, the results store,
+the parse cache and the build manifest. It is $PIPELINE_DATA_DIR, or this
+directory; run_scenarios.py writes there and generate_visuals.py reads there.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import time
+from pathlib import Path
+from typing import Callable, Dict, List, NamedTuple, Optional, Tuple
+
+from build_graph import BuildGraph, code_digest, file_digest, value_digest
+from results_store import ResultsStore
+from tracing import span
+
+DATA_ENV = "PIPELINE_DATA_DIR"
+CODE_DIR = Path(__file__).resolve().parent
+BASE_DIR = Path(os.environ.get(DATA_ENV) or CODE_DIR)
+SUMMARY_PATH = BASE_DIR / "summary.json"  # imported into RESULTS whenever it changes
+RESULTS = ResultsStore(BASE_DIR / "results")
+MANIFEST_PATH = BASE_DIR / ".build_manifest.json"
+TABLE_PATH = BASE_DIR / "metrics_table.md"
+# modules whose source decides what a figure looks like (drawing and log parsing)
+PLOT_CODE = (
+    "generate_visuals.py", "artifacts.py", "downsample.py", "parse_cache.py", "ss_parser.py", "sock_diag.py",
+    "sample_store.py", "tcp_probe.py", "align.py", "iperf_stream.py", "cwnd_series.py", "results_store.py",
+)
+
+
+class ScenarioMeta(NamedTuple):
+    key: str
+    title: str
+    topology: str
+    highlight: str
+    cwnd_logs: Dict[str, Path]
+    iperf_logs: Dict[str, Path]  # client logs whose start timestamp aligns the cwnd samples
+    throughput_label: Dict[str, str]
+    palette: Dict[str, str]
+
+
+SCENARIOS: Dict[str, ScenarioMeta] = {
+    "scenario1_basic_aimd": ScenarioMeta(
+        key="scenario1_basic_aimd",
+        title="Scenario 1 – Slow Start & AIMD",
+        topology="h1—s1—h2 · bw=10 Mbps · delay=30 ms · queue=100",
+        highlight="Slow start 이후 선형 증가, 손실 시 cwnd 절반 감소",
+        cwnd_logs={"flow": BASE_DIR / "scenario1_basic_aimd" / "cwnd.log"},
+        iperf_logs={"flow": BASE_DIR / "scenario1_basic_aimd" / "flow_client.json"},
+        throughput_label={"flow": "Throughput"},
+        palette={"flow": "tab:blue"},
+    ),
+    "scenario2_lossy_link": ScenarioMeta(
+        key="scenario2_lossy_link",
+        title="Scenario 2 – Random Loss Misinterpretation",
+        topology="h1—s1—h2 · bw=10 Mbps · delay=20 ms · loss=5%",
+        highlight="비혼잡 손실에도 Reno가 감속 → 평균 처리량 급락",
+        cwnd_logs={"flow": BASE_DIR / "scenario2_lossy_link" / "cwnd.log"},
+        iperf_logs={"flow": BASE_DIR / "scenario2_lossy_link" / "flow_client.json"},
+        throughput_label={"flow": "Throughput"},
+        palette={"flow": "tab:red"},
+    ),
+    "scenario3_high_bdp": ScenarioMeta(
+        key="scenario3_high_bdp",
+        title="Scenario 3 – High BDP Path",
+        topology="h1—s1—h2 · bw=100 Mbps · delay=150 ms · queue=2000",
+        highlight="RTT↑ 환경에서 선형 증가 속도가 느려 파이프 미충족",
+        cwnd_logs={"flow": BASE_DIR / "scenario3_high_bdp" / "cwnd.log"},
+        iperf_logs={"flow": BASE_DIR / "scenario3_high_bdp" / "flow_client.json"},
+        throughput_label={"flow": "Throughput"},
+        palette={"flow": "tab:green"},
+    ),
+    "scenario4_rtt_unfairness": ScenarioMeta(
+        key="scenario4_rtt_unfairness",
+        title="Scenario 4 – RTT Unfairness",
+        topology="h1/h3—s1—h2 · (h1:10 ms, h3:100 ms) · bw=20 Mbps",
+        highlight="짧은 RTT 흐름이 대역폭 대부분 획득, Jain 지수 0.93",
+        cwnd_logs={
+            "h1": BASE_DIR / "scenario4_rtt_unfairness" / "h1_cwnd.log",
+            "h3": BASE_DIR / "scenario4_rtt_unfairness" / "h3_cwnd.log",
+        },
+        iperf_logs={
+            "h1": BASE_DIR / "scenario4_rtt_unfairness" / "h1_client.json",
+            "h3": BASE_DIR / "scenario4_rtt_unfairness" / "h3_client.json",
+        },
+        throughput_label={"h1": "h1→h2", "h3": "h3→h2"},
+        palette={"h1": "tab:blue", "h3": "tab:orange"},
+    ),
+    "scenario5_bufferbloat": ScenarioMeta(
+        key="scenario5_bufferbloat",
+        title="Scenario 5 – Bufferbloat & Fast Recovery",
+        topology="h1—s1—h2 · bw=10 Mbps · delay=20 ms · queue=2000",
+        highlight="크게 부푼 큐로 RTT 급증, Fast Retransmit/Recovery 반복",
+        cwnd_logs={"flow": BASE_DIR / "scenario5_bufferbloat" / "cwnd.log"},
+        iperf_logs={"flow": BASE_DIR / "scenario5_bufferbloat" / "flow_client.json"},
+        throughput_label={"flow": "Throughput"},
+        palette={"flow": "tab:purple"},
+    ),
+}
+
+
+# -- jobs: generate_visuals (numpy, matplotlib) is imported where a job runs --------
+
+
+def render_scenario(key: str, out_dir: Path) -> tuple:
+    import generate_visuals
+
+    return generate_visuals.render_scenario(key, out_dir)
+
+
+def render_group(summary_path: Path, group: str, log_dir: Path, output_path: Path) -> tuple:
+    import generate_visuals
+
+    return generate_visuals.render_group(summary_path, group, log_dir, output_path)
+
+
+def write_metrics_table(output_path: Path) -> tuple:
+    import generate_visuals
+
+    return generate_visuals.write_metrics_table(output_path)
+
+
+def run_jobs(jobs: List[Tuple[Callable, tuple]], workers: int) -> List[int]:
+    """Run every (function, args) job in a process pool, printing each one's timing.
+
+    Returns the indices of the jobs that succeeded; a failing job is reported
+    and does not stop the others.
+    """
+    from concurrent.futures import ProcessPoolExecutor, as_completed  # multiprocessing: only when rebuilding
+
+    start = time.perf_counter()
+    done = []
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = {pool.submit(func, *args): idx for idx, (func, args) in enumerate(jobs)}
+        for future in as_completed(futures):
+            try:
+                name, seconds, points = future.result()
+            except Exception as exc:
+                func, args = jobs[futures[future]]
+                print(f"{func.__name__}{args!r} failed: {exc!r}")
+                continue
+            done.append(futures[future])
+            counts = f"  {points.raw:9d} -> {points.drawn:6d} points" if points is not None else ""
+            print(f"{name:45s} {seconds:6.2f} s{counts}")
+    print(f"{len(done)}/{len(jobs)} artifacts in {time.perf_counter() - start:.2f} s with {workers} workers")
+    return done
+
+
+def summary_digest(key: str, pending: Optional[Dict[str, str]] = None) -> str:
+    # the store's digest of an entry is value_digest() of the entry itself;
+    # pending holds the digests of entries a dry run did not import
+    return (pending or {}).get(key) or RESULTS.digest(key) or value_digest(None)
+
+
+def add_scenario_targets(graph: BuildGraph, pending: Optional[Dict[str, str]] = None) -> None:
+    code = code_digest(CODE_DIR / name for name in PLOT_CODE)
+    for key, meta in SCENARIOS.items():
+        inputs = {"code": code, "meta": value_digest(meta._asdict()), "summary": summary_digest(key, pending)}
+        for flow, log_path in sorted(meta.cwnd_logs.items()):
+            inputs[f"log:{flow}"] = file_digest(log_path)
+        for flow, log_path in sorted(meta.iperf_logs.items()):
+            inputs[f"iperf:{flow}"] = file_digest(log_path)
+        graph.add(BASE_DIR / f"{key}.png", inputs, (render_scenario, (key, BASE_DIR)))
+
+
+def add_table_target(graph: BuildGraph, pending: Optional[Dict[str, str]] = None) -> None:
+    inputs = {"code": code_digest(CODE_DIR / name for name in PLOT_CODE + ("cc_events.py",))}
+    for key, meta in SCENARIOS.items():
+        inputs[f"meta:{key}"] = value_digest(meta._asdict())
+        inputs[f"summary:{key}"] = summary_digest(key, pending)
+        for flow, log_path in sorted(meta.cwnd_logs.items()):
+            inputs[f"log:{key}:{flow}"] = file_digest(log_path)
+    graph.add(TABLE_PATH, inputs, (write_metrics_table, (TABLE_PATH,)))
+
+
+def add_group_targets(graph: BuildGraph, run_dir: Path, out_dir: Path) -> None:
+    """Targets for the flow groups of a run directory (summary.json plus logs/, as sweep.py writes)."""
+    summary_path = run_dir / "summary.json"
+    summary = json.loads(summary_path.read_text())
+    log_dir = run_dir / "logs" if (run_dir / "logs").is_dir() else run_dir
+    code = code_digest(CODE_DIR / name for name in PLOT_CODE)
+    for label, result in summary.get("iperf", {}).items():
+        if not (isinstance(result, dict) and "connections" in result):
+            continue
+        inputs = {"code": code, "summary": value_digest([summary["scenario"], result])}
+        for log_path in sorted(log_dir.glob(f"{label}_*_cwnd.log")):
+            inputs[f"log:{log_path.name}"] = file_digest(log_path)
+        output_path = out_dir / f"{summary['scenario']}_{label}.png".replace("/", "_")
+        graph.add(output_path, inputs, (render_group, (summary_path, label, log_dir, output_path)))
+
+
+def add_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--run", type=Path, action="append", default=[], help="also plot this run's flow groups")
+    parser.add_argument("--dry-run", action="store_true", help="list what would be rebuilt and why, then exit")
+    parser.add_argument("--force", action="store_true", help="rebuild everything")
+
+
+def build(args: argparse.Namespace) -> None:
+    """Rebuild the stale artifacts (or, with --dry-run, list them and write nothing)."""
+    pending: Dict[str, str] = {}
+    if args.dry_run:
+        pending = RESULTS.pending_json(SUMMARY_PATH)
+        if pending:
+            print(f"results store: would import {', '.join(pending)} from {SUMMARY_PATH.name}")
+    else:
+        with span("results.sync_json"):
+            imported = RESULTS.sync_json(SUMMARY_PATH)
+        if imported:
+            print(f"results store: imported {', '.join(imported)} from {SUMMARY_PATH.name}")
+    with span("build_graph.stale"):
+        graph = BuildGraph(MANIFEST_PATH)
+        add_scenario_targets(graph, pending)
+        add_table_target(graph, pending)
+        for run_dir in args.run:
+            add_group_targets(graph, run_dir, run_dir)
+        stale = graph.stale(args.force)
+    for target, reasons in stale:
+        print(f"{'would rebuild' if args.dry_run else 'rebuilding'} {graph.key(target.output)}: {', '.join(reasons)}")
+    print(f"{len(stale)} of {len(graph.targets)} artifacts stale")
+    if args.dry_run or not stale:
+        return
+
+    for scenario_dir in {path.parent for meta in SCENARIOS.values() for path in meta.cwnd_logs.values()}:
+        scenario_dir.mkdir(exist_ok=True)
+    with span("render.jobs", jobs=len(stale), workers=min(args.workers, len(stale))):
+        done = run_jobs([target.job for target, _ in stale], min(args.workers, len(stale)))
+    for idx in done:
+        graph.record(stale[idx][0])
+    graph.save()
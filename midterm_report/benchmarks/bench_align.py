@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""Scaling of align.align_run with the number of flows.
+
+Builds one synthetic iperf3 -J document with N parallel streams (60 one-second
+intervals each) and a socket flow per stream sampled every 10 ms, whose epoch
+clock starts a known fraction of a second after the document's whole-second
+timestamp. Times the port match, anchor refinement and interval joins for
+increasing N, and reports the anchor error against the true start. The
+refinement only promises an error of at most 0.5 s (see align.py); a worse
+error is flagged and makes the exit status 1. These flows trail written bytes
+by 0.05-0.3 s throughout and never drain, so the worst cases (0.07-0.49 s)
+sit near the bound; the recorded lossy scenario, whose buffer drains, narrows
+the window to 0.44 s.
+"""
+
+from __future__ import annotations
+
+import sys
+import time
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BASE_DIR))
+
+import numpy as np  # noqa: E402
+
+from align import align_run  # noqa: E402
+from ss_parser import FIELDS, FlowSeries  # noqa: E402
+
+INTERVALS = 60
+SAMPLE_S = 0.01
+EPOCH = 1_700_000_000
+RATE = 10e6  # bits per second per stream
+ERROR_BOUND = 0.5  # half the one-second window of align.refine_anchor
+
+
+def synthetic_run(rng: np.random.Generator, flows: int) -> tuple:
+    true_start = EPOCH + rng.uniform(0.0, 1.0)
+    starts = np.arange(INTERVALS, dtype=np.float64)
+    connected, streams, series = [], [[] for _ in range(INTERVALS)], {}
+    samples = int(INTERVALS / SAMPLE_S)
+    for idx in range(flows):
+        port = 40000 + idx
+        connected.append({"socket": idx + 5, "local_port": port, "remote_port": 5201})
+        bps = RATE * rng.uniform(0.8, 1.2, INTERVALS)
+        for row in range(INTERVALS):
+            streams[row].append({"socket": idx + 5, "start": starts[row], "end": starts[row] + 1.0,
+                                 "bits_per_second": bps[row], "retransmits": 0})
+        # acked bytes trail written bytes by a few hundred ms of data in flight
+        rel = np.arange(samples) * SAMPLE_S
+        written = np.interp(rel, np.append(starts, INTERVALS), np.concatenate(([0.0], np.cumsum(bps / 8))))
+        columns = {name: np.full(samples, np.nan) for name in FIELDS}
+        columns["bytes_acked"] = np.maximum(written - RATE / 8 * rng.uniform(0.05, 0.3), 0.0)
+        columns["cwnd"] = 10.0 + rng.random(samples) * 40
+        columns["rtt"] = 20.0 + rng.random(samples) * 5
+        key = ("10.0.0.1", port, "10.0.0.2", 5201)
+        series[key] = FlowSeries(key, true_start + rel, columns)
+    doc = {
+        "start": {"timestamp": {"timesecs": EPOCH}, "connected": connected},
+        "intervals": [{"streams": rows} for rows in streams],
+    }
+    return doc, series, true_start
+
+
+def main() -> None:
+    rng = np.random.default_rng(0)
+    worst = 0.0
+    for flows in (100, 200, 400, 800):
+        doc, series, true_start = synthetic_run(rng, flows)
+        start = time.perf_counter()
+        aligned = align_run(doc, series)
+        elapsed = time.perf_counter() - start
+        error = np.array([flow.anchor - true_start for flow in aligned.values()])
+        samples = sum(len(flow) for flow in aligned.values())
+        worst = max(worst, float(np.abs(error).max()))
+        print(f"{flows:4d} flows, {samples:8d} samples: {elapsed:6.2f} s "
+              f"({elapsed / flows * 1e3:.2f} ms/flow), anchor error {np.abs(error).max():.3f} s max")
+    if worst > ERROR_BOUND:
+        print(f"anchor error {worst:.3f} s exceeds the {ERROR_BOUND} s bound")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""Memory of cwnd series: Python lists versus cwnd_series.CwndSeries.
+
+1. Retained size (tracemalloc) of 100 flows x 7200 samples (one hour at the
+   0.5 s monitor interval) held as the old list-based CwndSeries (float
+   lists plus (time, rtt) tuples) and as CwndSeries arrays, extrapolated to
+   1000 flows.
+2. Peak heap of loading a 1000-flow sample store whole versus one chunked
+   pass (cwnd_series.iter_chunks) that keeps only per-flow maxima. The
+   chunked peak depends on chunk_records, not on the run length.
+"""
+
+from __future__ import annotations
+
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BASE_DIR))
+
+import numpy as np  # noqa: E402
+
+from cwnd_series import CwndSeries, iter_chunks, load  # noqa: E402
+from sample_store import SampleWriter  # noqa: E402
+from ss_parser import FIELDS, FlowSeries  # noqa: E402
+
+FLOWS = 100
+SAMPLES = 7200  # one hour at 0.5 s
+STORE_FLOWS = 1000
+STORE_SAMPLES = 720
+INTERVAL = 0.5
+EPOCH = 1_700_000_000.0
+
+
+class ListCwndSeries:
+    """The previous generate_visuals structure."""
+
+    def __init__(self, times, cwnd, rtt):
+        self.times = times
+        self.cwnd = cwnd
+        self.rtt = rtt  # list of (time, rtt_ms)
+
+
+def synthetic_flow(rng: np.random.Generator, idx: int, samples: int) -> FlowSeries:
+    columns = {name: np.full(samples, np.nan) for name in FIELDS}
+    columns["cwnd"] = np.floor(10 + 90 * rng.random(samples))
+    columns["rtt"] = 20 + 5 * rng.random(samples)
+    columns["rtt"][rng.random(samples) < 0.01] = np.nan
+    key = ("10.0.0.1", 40000 + idx, "10.0.0.2", 5201)
+    return FlowSeries(key, EPOCH + np.arange(samples) * INTERVAL + rng.random(samples) * 1e-3, columns)
+
+
+def as_lists(flow: FlowSeries) -> ListCwndSeries:
+    times = (flow.times - flow.times[0]).tolist()
+    rtt = [(t, v) for t, v in zip(times, flow.columns["rtt"].tolist()) if v == v]
+    return ListCwndSeries(times, flow.columns["cwnd"].tolist(), rtt)
+
+
+def retained(build) -> tuple:
+    tracemalloc.start()
+    value = build()
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return value, size
+
+
+def write_store(path: Path, rng: np.random.Generator) -> None:
+    flows = [synthetic_flow(rng, idx, STORE_SAMPLES) for idx in range(STORE_FLOWS)]
+    with SampleWriter(path, chunk_records=STORE_FLOWS * 8) as writer:
+        for tick in range(STORE_SAMPLES):
+            for flow in flows:
+                writer.append(float(flow.times[tick]), flow.key, "ESTAB", [flow.columns[name][tick] for name in FIELDS])
+
+
+def peak(run) -> tuple:
+    tracemalloc.start()
+    start = time.perf_counter()
+    value = run()
+    elapsed = time.perf_counter() - start
+    size = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return value, size, elapsed
+
+
+def main() -> None:
+    rng = np.random.default_rng(0)
+    flows = [synthetic_flow(rng, idx, SAMPLES) for idx in range(FLOWS)]
+    samples = FLOWS * SAMPLES
+    lists, list_bytes = retained(lambda: [as_lists(flow) for flow in flows])
+    arrays, array_bytes = retained(lambda: [CwndSeries.from_flow(flow) for flow in flows])
+    print(f"{FLOWS} flows x {SAMPLES} samples ({samples} samples)")
+    for name, size in (("lists", list_bytes), ("CwndSeries", array_bytes)):
+        print(f"  {name:<11} {size / 2**20:8.1f} MiB  {size / samples:6.1f} B/sample  "
+              f"-> {size / samples * STORE_FLOWS * SAMPLES / 2**30:.2f} GiB at {STORE_FLOWS} flows")
+    del lists, arrays
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "cwnd.smp"
+        write_store(path, rng)
+        print(f"sample store {STORE_FLOWS} flows x {STORE_SAMPLES} samples, {path.stat().st_size / 2**20:.1f} MiB")
+
+        def whole() -> dict:
+            return {key: float(series.cwnd.max()) for key, series in load(path).items()}
+
+        def chunked() -> dict:
+            maxima: dict = {}
+            for batch in iter_chunks(path):
+                for key, part in batch.items():
+                    maxima[key] = max(maxima.get(key, 0.0), float(part.cwnd.max()))
+            return maxima
+
+        expected, whole_peak, whole_s = peak(whole)
+        result, chunk_peak, chunk_s = peak(chunked)
+        assert result == expected
+        print(f"  load whole  peak {whole_peak / 2**20:6.1f} MiB  {whole_s:.2f} s")
+        print(f"  chunked     peak {chunk_peak / 2**20:6.1f} MiB  {chunk_s:.2f} s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""Time of the fairness metrics for 1000 flows x 3600 one-second intervals.
+
+Synthetic iperf3 intervals: flows start 0-60 s apart and approach an equal
+share of a 1 Gbps bottleneck with noise, so convergence times vary. Times
+building the time x flow matrix from the intervals and fairness.summarize
+(windowed Jain, convergence, share quantiles), then checks the per-bin Jain
+index against a direct per-bin computation.
+"""
+
+from __future__ import annotations
+
+import sys
+import time
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BASE_DIR))
+
+import numpy as np  # noqa: E402
+
+from fairness import ThroughputMatrix, summarize  # noqa: E402
+from parse_cache import IntervalTable  # noqa: E402
+
+FLOWS = 1000
+INTERVALS = 3600
+CAPACITY = 1e9
+
+
+def synthetic_intervals(rng: np.random.Generator) -> tuple:
+    fair = CAPACITY / FLOWS
+    starts = rng.uniform(0, 60, FLOWS)
+    tau = rng.uniform(5, 120, FLOWS)
+    t = np.arange(INTERVALS, dtype=np.float64)
+    tables, offsets = {}, {}
+    for idx in range(FLOWS):
+        initial = rng.uniform(0.1, 3.0) * fair
+        rate = fair + (initial - fair) * np.exp(-t / tau[idx]) + rng.normal(0, 0.03 * fair, INTERVALS)
+        tables[f"f{idx}"] = IntervalTable(t, t + 1.0, np.maximum(rate, 0.0), np.zeros(INTERVALS))
+        offsets[f"f{idx}"] = float(starts[idx])
+    return tables, offsets
+
+
+def main() -> None:
+    tables, offsets = synthetic_intervals(np.random.default_rng(0))
+    start = time.perf_counter()
+    matrix = ThroughputMatrix.from_intervals(tables, offsets)
+    built = time.perf_counter() - start
+    start = time.perf_counter()
+    result = summarize(matrix, window_s=10.0, epsilon=0.1)
+    summarized = time.perf_counter() - start
+
+    rows = np.random.default_rng(1).choice(len(matrix.bps), 20, replace=False)
+    for row in rows:
+        x = matrix.bps[row][matrix.active[row]]
+        expected = x.sum() ** 2 / (len(x) * (x ** 2).sum())
+        assert abs(matrix.jain()[row] - expected) < 1e-9
+
+    print(f"{FLOWS} flows x {INTERVALS} intervals -> matrix {matrix.bps.shape}")
+    print(f"build {built:.2f} s, summarize {summarized:.2f} s")
+    print(f"Jain (10 s windows) {result['jain_windowed']}, converged {result['converged_flows']}/{FLOWS}, "
+          f"convergence {result['convergence_s']}")
+
+
+if __name__ == "__main__":
+    main()
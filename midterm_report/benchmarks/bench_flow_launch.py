@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""Waiting on many child processes: one thread per child versus pidfds on asyncio.
+
+Starts N short-lived `sleep` children (as run_flows starts iperf3 clients) and
+waits for all of them either with a thread blocked in Popen.wait() per child or
+with orchestrator.wait_exit, as run_launches does. Reports wall time, peak
+thread count and open file descriptors, plus how run_flows packs the
+many_flows_1000 scenario.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import os
+import random
+import subprocess
+import sys
+import threading
+import time
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BASE_DIR))
+
+from flow_group import plan_launches, plan_monitors, raise_fd_limit  # noqa: E402
+from orchestrator import wait_exit  # noqa: E402
+from scenario_spec import SCENARIO_SPECS  # noqa: E402
+
+
+def open_fds() -> int:
+    return len(os.listdir("/proc/self/fd"))
+
+
+def spawn(count: int, seed: int):
+    rng = random.Random(seed)
+    return [
+        subprocess.Popen(["sleep", f"{rng.uniform(0.5, 1.5):.3f}"], stdout=subprocess.DEVNULL)
+        for _ in range(count)
+    ]
+
+
+def wait_threads(processes) -> int:
+    threads = [threading.Thread(target=proc.wait) for proc in processes]
+    for thread in threads:
+        thread.start()
+    peak = threading.active_count()
+    for thread in threads:
+        thread.join()
+    return peak
+
+
+def wait_pidfd(processes) -> int:
+    async def wait_all() -> None:
+        await asyncio.gather(*(wait_exit(proc) for proc in processes))
+
+    asyncio.run(wait_all())
+    return threading.active_count()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--processes", type=int, default=1000)
+    args = parser.parse_args()
+    print(f"RLIMIT_NOFILE soft limit: {raise_fd_limit()}")
+
+    for label, waiter in (("thread/child", wait_threads), ("pidfd asyncio", wait_pidfd)):
+        fds_before = open_fds()
+        start = time.perf_counter()
+        processes = spawn(args.processes, seed=1)
+        spawned = time.perf_counter()
+        peak_threads = waiter(processes)
+        done = time.perf_counter()
+        print(
+            f"{label:>14}: spawn {spawned - start:6.3f} s, wait {done - spawned:6.3f} s, "
+            f"peak threads {peak_threads:5d}, fds after {open_fds() - fds_before:+d}"
+        )
+
+    spec = SCENARIO_SPECS["many_flows_1000"]
+    launches = plan_launches(spec)
+    connections = sum(launch.streams for launch in launches)
+    print(
+        f"{spec.name}: {connections} connections -> {len(launches)} iperf3 clients + "
+        f"{len(launches)} servers, {len(plan_monitors(launches))} monitors"
+    )
+
+
+if __name__ == "__main__":
+    main()
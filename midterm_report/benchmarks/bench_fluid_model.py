@@ -0,0 +1,49 @@
+#!/usr/bin/env python3
+"""Wall time of the fluid model versus grid size and flow count.
+
+Expands scenario1 over bandwidth x loss x queue x delay grids of growing size
+and integrates each grid in one fluid_model.simulate call (summary only), then
+times the 1000-connection scenario with full series.
+"""
+
+from __future__ import annotations
+
+import sys
+import time
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BASE_DIR))
+
+from fluid_model import simulate  # noqa: E402
+from scenario_spec import SCENARIO_SPECS, expand_grid  # noqa: E402
+
+GRIDS = (
+    {"links.*.bw": [10]},
+    {"links.*.bw": [10, 50, 100], "links.*.loss": [0, 1, 5], "links.*.max_queue_size": [100, 1000]},
+    {
+        "links.*.bw": [5, 10, 20, 50, 100, 200, 500, 1000],
+        "links.*.loss": [0, 0.1, 0.5, 1, 2],
+        "links.*.max_queue_size": [10, 50, 100, 500, 1000],
+        "links.*.delay": ["5ms", "10ms", "20ms", "50ms", "100ms"],
+    },
+)
+
+
+def main() -> None:
+    base = SCENARIO_SPECS["scenario1_basic_aimd"]
+    for grid in GRIDS:
+        specs = expand_grid(base, grid)
+        start = time.perf_counter()
+        simulate(specs, series=False)
+        elapsed = time.perf_counter() - start
+        print(f"{len(specs):5d} points x 60 s: {elapsed:6.2f} s ({elapsed / len(specs) * 1e3:7.2f} ms / point)")
+
+    spec = SCENARIO_SPECS["many_flows_1000"]
+    start = time.perf_counter()
+    (result,) = simulate([spec])
+    print(f"{spec.name}: {len(result.labels)} flows with series in {time.perf_counter() - start:.2f} s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""Throughput and CPU cost of local_net's loopback link emulator.
+
+A sender on h1 pushes bytes through the relay to a sink on h2 (both separate
+processes, so this process's CPU time is the emulator's). Unshaped links give
+the ceiling in Mbps per core; shaped links check that the achieved rate
+tracks the TCLink setting.
+"""
+
+from __future__ import annotations
+
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BASE_DIR))
+
+from local_net import LocalNet  # noqa: E402
+
+PORT = 5201
+SINK = (
+    "import socket, sys\n"
+    "srv = socket.create_server((sys.argv[1], int(sys.argv[2])))\n"
+    "conn, _ = srv.accept()\n"
+    "total = 0\n"
+    "while chunk := conn.recv(1 << 20):\n"
+    "    total += len(chunk)\n"
+    "print(total)\n"
+)
+SENDER = (
+    "import socket, sys, time\n"
+    "sock = socket.create_connection((sys.argv[1], int(sys.argv[2])), source_address=(sys.argv[3], 0))\n"
+    "block = bytes(1 << 16)\n"
+    "deadline = time.monotonic() + float(sys.argv[4])\n"
+    "while time.monotonic() < deadline:\n"
+    "    sock.sendall(block)\n"
+    "sock.close()\n"
+)
+CASES = (
+    ("unshaped", {}),
+    ("10 Mbps / 20 ms", {"bw": 10, "delay": "20ms", "max_queue_size": 100}),
+    ("100 Mbps / 10 ms", {"bw": 100, "delay": "10ms", "max_queue_size": 1000}),
+    ("1000 Mbps / 1 ms", {"bw": 1000, "delay": "1ms", "max_queue_size": 1000}),
+)
+
+
+def run_case(params: dict, seconds: float = 5.0):
+    net = LocalNet()
+    h1, h2 = net.addHost("h1"), net.addHost("h2")
+    s1 = net.addSwitch("s1")
+    net.addLink(h1, s1, **params)
+    net.addLink(h2, s1, **params)
+    net.start()
+    try:
+        net.expose(h2, PORT)
+        sink = h2.popen([sys.executable, "-c", SINK, h2.private_ip, str(PORT)], stdout=subprocess.PIPE, text=True)
+        time.sleep(0.2)
+        cpu = time.process_time()
+        start = time.perf_counter()
+        sender = h1.popen([sys.executable, "-c", SENDER, h2.IP(), str(PORT), h1.IP(), str(seconds)])
+        received = int(sink.communicate()[0])
+        wall = time.perf_counter() - start
+        cpu = time.process_time() - cpu
+        sender.wait()
+    finally:
+        net.stop()
+    return received * 8 / 1e6, wall, cpu
+
+
+def main() -> None:
+    print(f"{'link':18s} {'Mbps':>9s} {'CPU s':>7s} {'Mbps/core':>10s}")
+    for name, params in CASES:
+        megabits, wall, cpu = run_case(params)
+        print(f"{name:18s} {megabits / wall:9.1f} {cpu:7.2f} {megabits / max(cpu, 1e-9):10.1f}")
+
+
+if __name__ == "__main__":
+    main()
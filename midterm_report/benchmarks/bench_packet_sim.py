@@ -0,0 +1,45 @@
+#!/usr/bin/env python3
+"""Events per second of packet_sim on the five scenarios and 1000 flows.
+
+Each spec is simulated once with Reno; events counts every scheduled heap
+event (hops, deliveries, ACKs, timers, samples).
+"""
+
+from __future__ import annotations
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BASE_DIR))
+
+from packet_sim import simulate  # noqa: E402
+from scenario_spec import SCENARIO_SPECS  # noqa: E402
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--cc", default="reno")
+    parser.add_argument("scenarios", nargs="*", default=sorted(SCENARIO_SPECS))
+    args = parser.parse_args()
+
+    total_events = 0
+    total_wall = 0.0
+    for name in args.scenarios:
+        spec = SCENARIO_SPECS[name]
+        start = time.perf_counter()
+        result = simulate(spec, cc=args.cc)
+        wall = time.perf_counter() - start
+        total_events += result.events
+        total_wall += wall
+        print(
+            f"{name:>26}: {len(result.labels):5d} flows, {spec.duration:3d} s simulated, "
+            f"{result.events:9d} events in {wall:6.2f} s = {result.events / wall / 1e3:7.1f} k events/s"
+        )
+    print(f"{'total':>26}: {total_events / total_wall / 1e3:.1f} k events/s")
+
+
+if __name__ == "__main__":
+    main()
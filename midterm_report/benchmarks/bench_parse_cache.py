@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+"""Cold parse versus warm ParseCache load of a replicated many-flow cwnd log."""
+
+from __future__ import annotations
+
+import argparse
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BASE_DIR))
+
+from bench_ss_parser import build_input  # noqa: E402
+from parse_cache import ParseCache  # noqa: E402
+from ss_parser import parse_ss_log, select_primary_flow  # noqa: E402
+
+
+def read_plot_fields(flows) -> None:
+    select_primary_flow(flows)
+    for series in flows.values():
+        series.columns["cwnd"]
+        series.columns["rtt"]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--copies", type=int, default=200, help="replicas of the recorded logs")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "cwnd.log"
+        build_input(path, args.copies)
+        cache = ParseCache(Path(tmp) / "cache")
+        print(f"input: {path.stat().st_size / 1e6:.1f} MB")
+
+        start = time.perf_counter()
+        flows = parse_ss_log(path)
+        read_plot_fields(flows)
+        print(f"parse only : {time.perf_counter() - start:.3f} s ({len(flows)} flows)")
+
+        start = time.perf_counter()
+        read_plot_fields(cache.load_flows(path))
+        print(f"cache miss : {time.perf_counter() - start:.3f} s (parse + write)")
+
+        start = time.perf_counter()
+        read_plot_fields(cache.load_flows(path))
+        print(f"cache hit  : {time.perf_counter() - start:.3f} s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""Render time of raw versus downsampled cwnd plots.
+
+One flow: a synthetic Reno sawtooth of 10^6 samples with single-sample drops
+to 1 packet, plotted with every sample and through downsample.minmax / lttb.
+"drops kept" counts the pixel columns with a drop that still reach 1 packet.
+A flow group: 500 such flows of 4000 samples in one LineCollection, raw and
+downsampled the way generate_visuals.plot_flow_group does.
+"""
+
+from __future__ import annotations
+
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BASE_DIR))
+
+import matplotlib  # noqa: E402
+import numpy as np  # noqa: E402
+
+matplotlib.use("Agg")
+import matplotlib.pyplot as plt  # noqa: E402
+from matplotlib.collections import LineCollection  # noqa: E402
+
+from downsample import lttb, minmax, pixel_budget  # noqa: E402
+
+SAMPLES = 1_000_000
+GROUP_FLOWS = 500
+GROUP_SAMPLES = 4000
+GROUP_POINTS = 20
+DPI = 150
+
+
+def sawtooth(samples: int, seed: int = 0) -> tuple:
+    rng = np.random.default_rng(seed)
+    times = np.arange(samples) * 0.01
+    cwnd = 10 + (np.arange(samples) % 5000) * 0.02 + rng.normal(0, 0.5, samples)
+    drops = rng.choice(samples, 25, replace=False)
+    cwnd[drops] = 1.0  # RTO: a single low sample
+    return times, cwnd, drops
+
+
+def render(times, cwnd, method, path: Path) -> tuple:
+    start = time.perf_counter()
+    fig, ax = plt.subplots(figsize=(8, 3))
+    budget = pixel_budget(ax, DPI)
+    if method == "minmax":
+        x, y = minmax(times, cwnd, budget)
+    elif method == "lttb":
+        x, y = lttb(times, cwnd, 2 * budget)
+    else:
+        x, y = times, cwnd
+    reduce = time.perf_counter() - start
+    ax.plot(x, y, linewidth=0.6)
+    fig.savefig(path, dpi=DPI)
+    plt.close(fig)
+    columns = np.floor((x - times[0]) / (times[-1] - times[0]) * budget).clip(0, budget - 1)
+    return len(x), reduce, time.perf_counter() - start, columns[y == 1.0]
+
+
+def render_group(flows, downsample: bool, path: Path) -> tuple:
+    start = time.perf_counter()
+    fig, ax = plt.subplots(figsize=(8, 3))
+    budget = pixel_budget(ax, DPI)
+    buckets = min(budget, max(GROUP_POINTS * budget // len(flows), 16))
+    segments = [np.column_stack(minmax(t, c, buckets) if downsample else (t, c)) for t, c in flows]
+    ax.add_collection(LineCollection(segments, linewidths=0.4, alpha=0.05))
+    ax.autoscale()
+    fig.savefig(path, dpi=DPI)
+    plt.close(fig)
+    return sum(len(segment) for segment in segments), time.perf_counter() - start
+
+
+def main() -> None:
+    times, cwnd, drops = sawtooth(SAMPLES)
+    print(f"one flow: {SAMPLES} samples, {len(drops)} single-sample drops")
+    print(f"{'':8s} {'points':>8s} {'reduce s':>9s} {'total s':>8s} {'drops kept':>10s}")
+    with tempfile.TemporaryDirectory() as tmp:
+        expected = None
+        for method in ("raw", "minmax", "lttb"):
+            points, reduce, total, drop_columns = render(times, cwnd, method, Path(tmp) / f"{method}.png")
+            if expected is None:
+                expected = len(np.unique(drop_columns))
+            kept = len(np.unique(drop_columns))
+            print(f"{method:8s} {points:8d} {reduce:9.3f} {total:8.2f} {kept:5d}/{expected}")
+
+        flows = [sawtooth(GROUP_SAMPLES, seed)[:2] for seed in range(GROUP_FLOWS)]
+        print(f"flow group: {GROUP_FLOWS} flows x {GROUP_SAMPLES} samples")
+        for name, downsample in (("raw", False), ("minmax", True)):
+            points, total = render_group(flows, downsample, Path(tmp) / f"group_{name}.png")
+            print(f"{name:8s} {points:8d} {'':9s} {total:8.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""Reading one scenario: monolithic summary.json versus results_store.
+
+Writes 100 synthetic scenarios with 4 flows x 1800 one-second intervals
+each, both as an indented summary.json and as a results store. Then times
+getting one scenario's throughput column, the metadata of every scenario
+(what the metrics table needs) and the JSON export.
+"""
+
+from __future__ import annotations
+
+import json
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BASE_DIR))
+
+import numpy as np  # noqa: E402
+
+from results_store import ResultsStore  # noqa: E402
+
+SCENARIOS = 100
+FLOWS = 4
+INTERVALS = 1800
+
+
+def synthetic_entries(rng: np.random.Generator) -> list:
+    entries = []
+    for idx in range(SCENARIOS):
+        iperf = {}
+        for flow in range(FLOWS):
+            bps = rng.uniform(1e6, 1e7, INTERVALS)
+            iperf[f"h{flow}"] = {
+                "intervals": [
+                    {"start": float(t), "end": float(t + 1), "bits_per_second": float(bps[t]), "retransmits": 0}
+                    for t in range(INTERVALS)
+                ],
+                "average_bps": float(bps.mean()),
+            }
+        entries.append({"scenario": f"scenario{idx:03d}", "description": "synthetic", "iperf": iperf})
+    return entries
+
+
+def timed(run) -> tuple:
+    start = time.perf_counter()
+    value = run()
+    return value, time.perf_counter() - start
+
+
+def main() -> None:
+    entries = synthetic_entries(np.random.default_rng(0))
+    with tempfile.TemporaryDirectory() as tmp:
+        json_path = Path(tmp) / "summary.json"
+        json_path.write_text(json.dumps(entries, indent=2))
+        store = ResultsStore(Path(tmp) / "results")
+        _, put_s = timed(lambda: store.put_many(entries))
+        size = sum(path.stat().st_size for path in store.root.rglob("*") if path.is_file())
+        print(f"{SCENARIOS} scenarios x {FLOWS} flows x {INTERVALS} intervals: "
+              f"summary.json {json_path.stat().st_size / 2**20:.0f} MiB, store {size / 2**20:.0f} MiB "
+              f"(written in {put_s:.2f} s)")
+
+        target = "scenario042"
+
+        def from_json() -> np.ndarray:
+            entry = next(e for e in json.loads(json_path.read_text()) if e["scenario"] == target)
+            return np.array([row["bits_per_second"] for row in entry["iperf"]["h2"]["intervals"]])
+
+        def from_store() -> np.ndarray:
+            return ResultsStore(store.root).columns(target, "iperf.h2.intervals", ("bits_per_second",))[
+                "bits_per_second"
+            ]
+
+        expected, json_s = timed(from_json)
+        result, store_s = timed(from_store)
+        assert np.array_equal(expected, result)
+        print(f"one flow's throughput: json {json_s:.2f} s, store {store_s * 1e3:.2f} ms")
+
+        averages, meta_s = timed(
+            lambda: [entry["iperf"]["h0"]["average_bps"] for entry in ResultsStore(store.root).load_all(False)]
+        )
+        assert len(averages) == SCENARIOS
+        print(f"metadata of all scenarios: store {meta_s:.2f} s")
+        _, export_s = timed(lambda: store.export_json(Path(tmp) / "export.json"))
+        print(f"export summary.json: {export_s:.2f} s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""Size and speed of sample_store versus the text sock_diag log.
+
+Writes the same synthetic samples (1000 flows x 600 ticks) through
+sock_diag's text lines and through a SampleWriter, then times loading every
+flow and a 10-second range query from each.
+"""
+
+from __future__ import annotations
+
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BASE_DIR))
+
+from sample_store import SampleStore, SampleWriter, parse_store  # noqa: E402
+from sock_diag import DiagRecord, parse_diag_log, write_header  # noqa: E402
+from ss_parser import FIELDS  # noqa: E402
+
+FLOWS = 1000
+TICKS = 600
+INTERVAL = 0.1
+
+
+def records():
+    rng = random.Random(0)
+    keys = [("10.0.0.1", 40000 + idx, "10.0.0.2", 5301 + idx // 128) for idx in range(FLOWS)]
+    for tick in range(TICKS):
+        timestamp = 1_700_000_000.0 + tick * INTERVAL
+        for key in keys:
+            values = tuple(float(rng.randint(2, 400)) if name != "delivery_rate" else float("nan") for name in FIELDS)
+            yield timestamp, DiagRecord(key, "ESTAB", "reno", values)
+
+
+def main() -> None:
+    with tempfile.TemporaryDirectory() as tmp:
+        text_path = Path(tmp) / "cwnd.log"
+        store_path = Path(tmp) / "cwnd.smp"
+
+        start = time.perf_counter()
+        with text_path.open("w", buffering=1 << 16) as fh:
+            write_header(fh)
+            for timestamp, record in records():
+                fh.write(record.as_line(timestamp))
+        text_write = time.perf_counter() - start
+
+        start = time.perf_counter()
+        with SampleWriter(store_path) as writer:
+            for timestamp, record in records():
+                writer.append(timestamp, record.key, record.state, record.values)
+        store_write = time.perf_counter() - start
+
+        start = time.perf_counter()
+        parse_diag_log(text_path)
+        text_load = time.perf_counter() - start
+        start = time.perf_counter()
+        parse_store(store_path)
+        store_load = time.perf_counter() - start
+        with SampleStore(store_path) as store:
+            first = store.chunks[0].first
+            start = time.perf_counter()
+            count = len(store.records(first + 30, first + 40))
+            store_range = time.perf_counter() - start
+
+        samples = FLOWS * TICKS
+        print(f"{samples} samples ({FLOWS} flows x {TICKS} ticks), write includes generating them")
+        print(f"{'':12s} {'MB':>8s} {'B/sample':>9s} {'write s':>8s} {'load s':>8s}")
+        for name, path, write, load in (
+            ("text", text_path, text_write, text_load),
+            ("sample_store", store_path, store_write, store_load),
+        ):
+            size = path.stat().st_size
+            print(f"{name:12s} {size / 1e6:8.1f} {size / samples:9.1f} {write:8.2f} {load:8.2f}")
+        print(f"10 s range query: {count} records in {store_range * 1e3:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,276 @@
+#!/usr/bin/env python3
+"""Time and peak memory of each analysis stage across run sizes, against a baseline.
+
+For every size, synth_logs.generate() writes one iperf3 -P client log, its
+cwnd log as a sample store and, up to TEXT_SAMPLE_LIMIT samples, the same
+samples as `ss -tin` text. Each stage then runs on those files:
+
+    parse.ss_text         ss_parser.parse_ss_log + the plotted columns
+    parse.sample_store    parse_cache.parse_flow_log + the plotted columns
+    select_primary_flow   ss_parser, on the parsed flows
+    parse_iperf_json      run_scenarios (summed intervals)
+    parse_iperf_streams   run_scenarios (per-connection end results)
+    align_run             align.py, every stream against its flow
+    cc_events             cc_events.summarize over every flow
+    fairness              ThroughputMatrix.from_samples + fairness.summarize
+    parse_cwnd_log.cold   generate_visuals, empty parse cache
+    parse_cwnd_log.warm   generate_visuals, cached
+    plot_single_flow      generate_visuals figure of the primary flow (png)
+    plot_flow_group       generate_visuals figure of every connection (png)
+
+Time is the best of --repeat runs. Peak memory comes from one extra run under
+tracemalloc (Python and NumPy allocations).
+
+Baselines live in baselines/bench_scaling.json (`--save` writes the sizes
+just measured). A stage is flagged when it is more than --tolerance slower
+(and over a 20 ms noise floor) or uses that much more memory (over 1 MiB).
+Then the exit status is 1, so CI can gate on it. Numbers from another machine
+(see the baseline's "machine") are compared but reported as such.
+
+    python3 benchmarks/bench_scaling.py                     # default sizes vs baseline
+    python3 benchmarks/bench_scaling.py --sizes 1000x60 --repeat 5
+    python3 benchmarks/bench_scaling.py --full --save       # refresh every baseline
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import math
+import os
+import platform
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BASE_DIR))
+
+import numpy as np  # noqa: E402
+
+import generate_visuals  # noqa: E402
+from align import align_run  # noqa: E402
+from cc_events import summarize as summarize_events  # noqa: E402
+from fairness import ThroughputMatrix, summarize as summarize_fairness  # noqa: E402
+from flow_group import jain_index  # noqa: E402
+from iperf_stream import load_iperf_json  # noqa: E402
+from parse_cache import ParseCache, parse_flow_log  # noqa: E402
+from run_scenarios import parse_iperf_json, parse_iperf_streams  # noqa: E402
+from ss_parser import parse_ss_log, select_primary_flow  # noqa: E402
+from synth_logs import SynthConfig, generate  # noqa: E402
+
+BASELINE_PATH = Path(__file__).resolve().parent / "baselines" / "bench_scaling.json"
+LOSS = "random:1e-5"
+SIZES = {  # flows x seconds, sampled every 0.5 s (0.1 s for the single flow)
+    "1x60": SynthConfig(flows=1, duration=60, interval=0.1, loss=LOSS),
+    "100x60": SynthConfig(flows=100, duration=60, loss=LOSS, bandwidth=100.0, queue=1000),
+    "1000x60": SynthConfig(flows=1000, duration=60, loss=LOSS, bandwidth=1000.0, queue=10000),
+    "10x3600": SynthConfig(flows=10, duration=3600, loss=LOSS),
+    "1000x600": SynthConfig(flows=1000, duration=600, loss=LOSS, bandwidth=1000.0, queue=10000),
+}
+DEFAULT_SIZES = ("1x60", "100x60", "1000x60", "10x3600")
+TEXT_SAMPLE_LIMIT = 300_000  # about 140 MB of ss text
+PLOT_FIELDS = ("cwnd", "rtt", "bytes_sent")
+GROUP = "group"
+NOISE_S = 0.02  # differences below these are scheduling noise
+NOISE_MIB = 1.0
+
+
+class Run:
+    """The generated logs of one size and what the stages share."""
+
+    def __init__(self, directory: Path, config: SynthConfig):
+        self.directory = directory
+        self.config = config
+        self.cwnd_log = directory / f"{GROUP}_h1_cwnd.log"  # the name plot_flow_group globs for
+        self.text_log = directory / "ss_text.log"
+        self.client_log = directory / f"{GROUP}_client.json"
+        self.samples = generate(config, self.cwnd_log, self.client_log, "bin")
+        if self.samples <= TEXT_SAMPLE_LIMIT:
+            generate(config, self.text_log, directory / "text_client.json", "text")
+        self.flows = parse_flow_log(self.cwnd_log)
+        self.meta = generate_visuals.ScenarioMeta(
+            key="synthetic", title=f"synthetic {config.flows} flows", topology="", highlight="",
+            cwnd_logs={"flow": self.cwnd_log}, iperf_logs={"flow": self.client_log},
+            throughput_label={"flow": "Throughput"}, palette={"flow": "tab:blue"},
+        )
+
+    def fresh_cache(self) -> None:
+        shutil.rmtree(self.directory / ".cache", ignore_errors=True)
+        generate_visuals.CACHE = ParseCache(self.directory / ".cache")
+
+    def group_summary(self) -> dict:
+        flows = parse_iperf_streams(self.client_log)
+        rates = [flow["average_bps"] for flow in flows]
+        return {
+            "scenario": "synthetic",
+            "iperf": {GROUP: {"flows": flows, "connections": len(flows), "total_bps": sum(rates),
+                              "fairness_index": jain_index(rates)}},
+        }
+
+
+def _touch_columns(flows) -> None:
+    for series in flows.values():
+        for field in PLOT_FIELDS:
+            series.columns[field]
+
+
+def _parse_text(run: Run) -> Callable[[], object]:
+    return lambda: _touch_columns(parse_ss_log(run.text_log))
+
+
+def _parse_store(run: Run) -> Callable[[], object]:
+    return lambda: _touch_columns(parse_flow_log(run.cwnd_log))
+
+
+def _fairness(run: Run) -> Callable[[], object]:
+    return lambda: summarize_fairness(ThroughputMatrix.from_samples(run.flows))
+
+
+def _align(run: Run) -> Callable[[], object]:
+    return lambda: align_run(load_iperf_json(run.client_log), run.flows)
+
+
+def _cold_cwnd_log(run: Run) -> Callable[[], object]:
+    run.fresh_cache()
+    return lambda: generate_visuals.parse_cwnd_log(run.cwnd_log, run.client_log)
+
+
+def _warm_cwnd_log(run: Run) -> Callable[[], object]:
+    run.fresh_cache()
+    generate_visuals.parse_cwnd_log(run.cwnd_log, run.client_log)
+    return lambda: generate_visuals.parse_cwnd_log(run.cwnd_log, run.client_log)
+
+
+def _plot_single(run: Run) -> Callable[[], object]:
+    run.fresh_cache()
+    summary = {"iperf": parse_iperf_json(run.client_log)}
+    return lambda: generate_visuals.plot_single_flow(run.meta, summary, run.directory)
+
+
+def _plot_group(run: Run) -> Callable[[], object]:
+    run.fresh_cache()
+    summary = run.group_summary()
+    return lambda: generate_visuals.plot_flow_group(summary, GROUP, run.directory, run.directory / "group.png")
+
+
+# name -> setup(run) returning the measured call (setup time is not measured)
+STAGES: Dict[str, Callable[[Run], Callable[[], object]]] = {
+    "parse.ss_text": _parse_text,
+    "parse.sample_store": _parse_store,
+    "select_primary_flow": lambda run: lambda: select_primary_flow(run.flows),
+    "parse_iperf_json": lambda run: lambda: parse_iperf_json(run.client_log),
+    "parse_iperf_streams": lambda run: lambda: parse_iperf_streams(run.client_log),
+    "align_run": _align,
+    "cc_events": lambda run: lambda: summarize_events(run.flows),
+    "fairness": _fairness,
+    "parse_cwnd_log.cold": _cold_cwnd_log,
+    "parse_cwnd_log.warm": _warm_cwnd_log,
+    "plot_single_flow": _plot_single,
+    "plot_flow_group": _plot_group,
+}
+
+
+def measure(run: Run, setup: Callable[[Run], Callable[[], object]], repeat: int) -> Dict[str, float]:
+    best = math.inf
+    for _ in range(repeat):
+        call = setup(run)
+        start = time.perf_counter()
+        call()
+        best = min(best, time.perf_counter() - start)
+    call = setup(run)
+    tracemalloc.start()
+    call()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return {"seconds": round(best, 6), "peak_mib": round(peak / 2**20, 3)}
+
+
+def machine() -> dict:
+    return {
+        "platform": platform.platform(),
+        "processor": platform.processor() or platform.machine(),
+        "cpus": os.cpu_count(),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+    }
+
+
+def compare(current: Dict[str, float], base: Optional[Dict[str, float]], tolerance: float) -> Tuple[str, List[str]]:
+    """("ratio" cell, flags) of one stage against its baseline."""
+    if base is None:
+        return "new", []
+    flags = []
+    time_ratio = current["seconds"] / base["seconds"] if base["seconds"] else math.inf
+    memory_ratio = current["peak_mib"] / base["peak_mib"] if base["peak_mib"] else math.inf
+    if time_ratio > 1 + tolerance and current["seconds"] - base["seconds"] > NOISE_S:
+        flags.append("SLOWER")
+    if memory_ratio > 1 + tolerance and current["peak_mib"] - base["peak_mib"] > NOISE_MIB:
+        flags.append("MORE MEMORY")
+    return f"x{time_ratio:.2f} time, x{memory_ratio:.2f} mem", flags
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", nargs="+", choices=list(SIZES), help=f"default: {' '.join(DEFAULT_SIZES)}")
+    parser.add_argument("--full", action="store_true", help="every size, including the large ones")
+    parser.add_argument("--stages", nargs="+", choices=list(STAGES), help="default: all")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed slowdown / memory growth")
+    parser.add_argument("--baseline", type=Path, default=BASELINE_PATH)
+    parser.add_argument("--save", action="store_true", help="store these results as the baseline")
+    args = parser.parse_args()
+
+    sizes = list(SIZES) if args.full else args.sizes or list(DEFAULT_SIZES)
+    stages = args.stages or list(STAGES)
+    baseline = json.loads(args.baseline.read_text()) if args.baseline.exists() else {"machine": None, "results": {}}
+    if baseline["machine"] is not None and baseline["machine"] != machine():
+        print(f"note: baseline measured on {baseline['machine']['processor']} ({baseline['machine']['platform']}), "
+              "ratios compare different machines")
+
+    results: Dict[str, Dict[str, Dict[str, float]]] = {}
+    regressions = []
+    generate_visuals.pyplot()  # matplotlib loads on first use; keep that out of the plot stages
+    with tempfile.TemporaryDirectory() as tmp:
+        for size in sizes:
+            config = SIZES[size]
+            directory = Path(tmp) / size
+            directory.mkdir()
+            start = time.perf_counter()
+            run = Run(directory, config)
+            print(f"\n{size}: {config.flows} flows x {config.duration} s every {config.interval} s, "
+                  f"{run.samples} samples (generated in {time.perf_counter() - start:.1f} s)")
+            print(f"  {'stage':<22} {'time (s)':>10} {'peak (MiB)':>11}  baseline")
+            results[size] = {}
+            for name in stages:
+                if name == "parse.ss_text" and not run.text_log.exists():
+                    print(f"  {name:<22} {'-':>10} {'-':>11}  (over {TEXT_SAMPLE_LIMIT} samples, no text log)")
+                    continue
+                current = measure(run, STAGES[name], args.repeat)
+                results[size][name] = current
+                cell, flags = compare(current, baseline["results"].get(size, {}).get(name), args.tolerance)
+                if flags:
+                    regressions.append(f"{size} {name}: {', '.join(flags)}")
+                print(f"  {name:<22} {current['seconds']:10.4f} {current['peak_mib']:11.2f}  {cell}"
+                      + (f"  {' '.join(flags)}" if flags else ""))
+
+    if args.save:
+        baseline["machine"] = machine()
+        for size, stage_results in results.items():
+            baseline["results"].setdefault(size, {}).update(stage_results)
+        args.baseline.parent.mkdir(parents=True, exist_ok=True)
+        args.baseline.write_text(json.dumps(baseline, indent=2, sort_keys=True) + "\n")
+        print(f"\nbaseline saved to {args.baseline}")
+    if regressions:
+        print("\nregressions against the baseline:")
+        for line in regressions:
+            print(f"  {line}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""CPU cost per sample: forking `ss -tin` versus the netlink DiagSampler.
+
+Opens N loopback TCP connections to a local listener, then samples them with
+both backends. CPU time includes the forked ss(8) children (RUSAGE_CHILDREN).
+"""
+
+from __future__ import annotations
+
+import argparse
+import resource
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BASE_DIR))
+
+from sock_diag import DiagSampler, parse_diag_log, sample_loop  # noqa: E402
+
+
+def cpu_seconds() -> float:
+    own = resource.getrusage(resource.RUSAGE_SELF)
+    children = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return own.ru_utime + own.ru_stime + children.ru_utime + children.ru_stime
+
+
+def measure(label: str, sample, count: int) -> None:
+    cpu_start = cpu_seconds()
+    wall_start = time.perf_counter()
+    for _ in range(count):
+        sample()
+    wall = (time.perf_counter() - wall_start) / count
+    cpu = (cpu_seconds() - cpu_start) / count
+    print(f"{label:>12}: {cpu * 1e3:7.3f} ms CPU / sample, {wall * 1e3:7.3f} ms wall / sample")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--flows", type=int, default=100)
+    parser.add_argument("--samples", type=int, default=200)
+    args = parser.parse_args()
+
+    listener = socket.socket()
+    listener.bind(("127.0.0.1", 0))
+    listener.listen(args.flows)
+    port = listener.getsockname()[1]
+    sockets = []
+    for _ in range(args.flows):
+        sockets.append(socket.create_connection(("127.0.0.1", port)))
+        sockets.append(listener.accept()[0])
+    for sock in sockets[::2]:
+        sock.sendall(b"x" * 65536)
+
+    ss_cmd = ["ss", "-tin", f"( dport = :{port} )"]
+    measure("ss fork", lambda: subprocess.run(ss_cmd, capture_output=True, check=True), args.samples)
+    with DiagSampler(dport=port) as sampler:
+        assert len(sampler.sample()) == args.flows
+        measure("sock_diag", sampler.sample, args.samples)
+
+        # achieved rate of the 10 ms loop over one second
+        with tempfile.TemporaryDirectory() as tmp:
+            log_path = Path(tmp) / "diag.log"
+            stop_event = threading.Event()
+            timer = threading.Timer(1.0, stop_event.set)
+            timer.start()
+            sample_loop(sampler, log_path, stop_event, interval=0.01)
+            flows = parse_diag_log(log_path)
+            per_flow = min(len(series) for series in flows.values())
+            print(f"10 ms loop : {per_flow} samples/flow in 1 s across {len(flows)} flows")
+
+    for sock in sockets:
+        sock.close()
+    listener.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""Throughput (MB/s) of ss_parser against the original four-regex parser.
+
+The input is built by replicating the recorded scenario logs with the client
+port rewritten per copy, so every copy shows up as a distinct flow.
+"""
+
+from __future__ import annotations
+
+import argparse
+import math
+import re
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BASE_DIR))
+
+from ss_parser import FIELDS, parse_ss_log  # noqa: E402
+
+PORT_RE = re.compile(r"(\d+\.\d+\.\d+\.\d+):(\d+)(\s+\d+\.\d+\.\d+\.\d+:5201)")
+
+
+def legacy_parse(path: Path):
+    """The parser generate_visuals shipped with (every flow, before selection)."""
+    entries = defaultdict(list)
+    timestamp = None
+    current_port = None
+    number_re = re.compile(r"cwnd:(\d+\.?\d*)")
+    rtt_re = re.compile(r"rtt:(\d+\.?\d*)")
+    bytes_re = re.compile(r"bytes_sent:(\d+)")
+    port_re = re.compile(r"(\d+\.\d+\.\d+\.\d+):(\d+)\s+(\d+\.\d+\.\d+\.\d+):(\d+)")
+    with path.open() as fh:
+        for raw_line in fh:
+            line = raw_line.strip()
+            if not line:
+                continue
+            if line == "--":
+                current_port = None
+                continue
+            if line.replace(".", "").isdigit():
+                try:
+                    timestamp = float(line)
+                except ValueError:
+                    timestamp = None
+                continue
+            if line.startswith("ESTAB"):
+                match = port_re.search(line)
+                current_port = int(match.group(2)) if match else None
+                continue
+            if "cwnd:" in line and timestamp is not None and current_port is not None:
+                cwnd_match = number_re.search(line)
+                if not cwnd_match:
+                    continue
+                rtt_match = rtt_re.search(line)
+                bytes_match = bytes_re.search(line)
+                entries[current_port].append(
+                    (
+                        timestamp,
+                        float(cwnd_match.group(1)),
+                        float(rtt_match.group(1)) if rtt_match else None,
+                        int(bytes_match.group(1)) if bytes_match else None,
+                    )
+                )
+    return entries
+
+
+def parse_plot_fields(path: Path):
+    """What generate_visuals reads: cwnd, rtt and bytes_sent of every flow."""
+    flows = parse_ss_log(path)
+    for series in flows.values():
+        for field in ("cwnd", "rtt", "bytes_sent"):
+            series.columns[field]
+    return flows
+
+
+def parse_all_fields(path: Path):
+    flows = parse_ss_log(path)
+    for series in flows.values():
+        for field in FIELDS:
+            series.columns[field]
+    return flows
+
+
+def build_input(target: Path, copies: int) -> None:
+    sources = sorted(BASE_DIR.glob("scenario*/*cwnd.log"))
+    texts = [src.read_text() for src in sources]
+    with target.open("w") as fh:
+        for copy in range(copies):
+            for text in texts:
+                fh.write(PORT_RE.sub(lambda m: f"{m.group(1)}:{10000 + copy}{m.group(3)}", text))
+
+
+def best_of(func, path: Path, repeat: int) -> float:
+    best = math.inf
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(path)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--copies", type=int, default=50, help="replicas of the recorded logs")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "cwnd.log"
+        build_input(path, args.copies)
+        size_mb = path.stat().st_size / 1e6
+        print(f"input: {size_mb:.1f} MB, {args.copies} replicas")
+        for name, func in (
+            ("legacy (3 fields)", legacy_parse),
+            ("ss_parser (3 fields)", parse_plot_fields),
+            (f"ss_parser ({len(FIELDS)} fields)", parse_all_fields),
+        ):
+            elapsed = best_of(func, path, args.repeat)
+            print(f"{name:>22}: {elapsed:.3f} s  {size_mb / elapsed:.1f} MB/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""Start-up time of `pipeline.py summarize` and `pipeline.py table`, against a budget.
+
+The recorded scenarios (their logs and summary.json) are copied into a
+temporary data directory. Each command runs there once, which fills the
+results store, parse cache, metrics table and build manifest. Then every
+command is started --repeat times as a fresh process, and its best wall time
+must stay within --budget. A bare `python3 -c pass` is timed the same way for
+reference. One more run under `-X importtime` lists what each command
+imported. Loading numpy, matplotlib or Mininet fails the check whatever the
+time. The sources are byte-compiled first, so a PYTHONDONTWRITEBYTECODE
+environment does not end up timing the compiler.
+
+The repository has no test runner, so this script is the check: it prints
+every failed check and exits with status 1 when a command is over budget,
+imports a heavy package or fails to run at all.
+
+    python3 benchmarks/bench_startup.py
+    python3 benchmarks/bench_startup.py --repeat 30 --budget 80
+"""
+
+from __future__ import annotations
+
+import argparse
+import compileall
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import List
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+
+COMMANDS = ("summarize", "table")
+HEAVY = ("numpy", "matplotlib", "mininet")
+BUDGET_MS = 100.0
+
+
+def prepare(data_dir: Path) -> None:
+    """Copy the recorded scenarios into data_dir and run every command there once."""
+    for source in sorted(BASE_DIR.glob("scenario*")):
+        if source.is_dir():
+            shutil.copytree(source, data_dir / source.name)
+    shutil.copy2(BASE_DIR / "summary.json", data_dir / "summary.json")
+    for command in COMMANDS:
+        subprocess.run(pipeline(data_dir, command), check=True, stdout=subprocess.DEVNULL)
+
+
+def pipeline(data_dir: Path, command: str, *options: str) -> List[str]:
+    return [sys.executable, *options, str(BASE_DIR / "pipeline.py"), "--data-dir", str(data_dir), command]
+
+
+def best_ms(argv: List[str], repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        subprocess.run(argv, check=True, stdout=subprocess.DEVNULL)
+        best = min(best, time.perf_counter() - start)
+    return best * 1e3
+
+
+def imported(argv: List[str]) -> List[str]:
+    """Top-level packages the command imported, from `-X importtime`."""
+    stderr = subprocess.run(argv, check=True, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True).stderr
+    lines = [line for line in stderr.splitlines() if line.startswith("import time:")]
+    names = {line.rsplit("|", 1)[1].strip().split(".")[0] for line in lines}
+    names.discard("imported package")  # the header line
+    return sorted(names)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=15, help="starts per command; the best one counts")
+    parser.add_argument("--budget", type=float, default=BUDGET_MS, help="ms per command")
+    args = parser.parse_args()
+
+    compileall.compile_dir(BASE_DIR, maxlevels=0, quiet=1)
+    failures = []
+    with tempfile.TemporaryDirectory() as tmp:
+        data_dir = Path(tmp)
+        prepare(data_dir)
+        print(f"{'python3 -c pass':<22} {best_ms([sys.executable, '-c', 'pass'], args.repeat):7.1f} ms")
+        for command in COMMANDS:
+            try:
+                ms = best_ms(pipeline(data_dir, command), args.repeat)
+                heavy = [name for name in imported(pipeline(data_dir, command, "-X", "importtime")) if name in HEAVY]
+            except subprocess.CalledProcessError as exc:
+                failures.append(f"{command}: exited with status {exc.returncode}")
+                print(f"{'pipeline.py ' + command:<22} failed")
+                continue
+            flags = []
+            if ms > args.budget:
+                flags.append(f"over the {args.budget:.0f} ms budget")
+            if heavy:
+                flags.append(f"imports {', '.join(heavy)}")
+            failures.extend(f"{command}: {flag}" for flag in flags)
+            print(f"{'pipeline.py ' + command:<22} {ms:7.1f} ms  {'; '.join(flags) or 'ok'}")
+    if failures:
+        print("FAILED:", file=sys.stderr)
+        for failure in failures:
+            print(f"  {failure}", file=sys.stderr)
+        sys.exit(1)
+    print(f"all commands within {args.budget:.0f} ms and free of {', '.join(HEAVY)}")
+
+
+if __name__ == "__main__":
+    main()
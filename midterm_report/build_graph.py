@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""Content-hash build graph for generated artifacts (plots, metrics table).
+
+Each target names an output file and the hashes of everything it is made
+from: summary entries, log files, scenario metadata and the code that draws
+it. The manifest maps each output to the input hashes it was last built
+from. A target is stale when its output is missing or when any input was
+added, removed or changed since then, and only stale targets are rebuilt.
+`stale()` returns the reasons, which is all a dry run prints.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, NamedTuple, Tuple
+
+MISSING = "missing"
+
+
+def file_digest(path: Path) -> str:
+    """sha256 of a file's bytes, or MISSING."""
+    digest = hashlib.sha256()
+    try:
+        with path.open("rb") as fh:
+            for block in iter(lambda: fh.read(1 << 20), b""):
+                digest.update(block)
+    except FileNotFoundError:
+        return MISSING
+    return digest.hexdigest()
+
+
+def value_digest(value: Any) -> str:
+    """sha256 of a JSON-serialisable value (Paths and other objects via str())."""
+    return hashlib.sha256(json.dumps(value, sort_keys=True, default=str).encode()).hexdigest()
+
+
+def code_digest(paths: Iterable[Path]) -> str:
+    """One hash over the source files an artifact's code depends on."""
+    return value_digest({path.name: file_digest(path) for path in paths})
+
+
+class Target(NamedTuple):
+    output: Path
+    inputs: Dict[str, str]  # input name -> digest
+    job: Tuple[Callable, tuple]  # (function, args) that writes output; must be picklable
+
+
+class BuildGraph:
+    def __init__(self, manifest_path: Path):
+        self.manifest_path = manifest_path
+        self.targets: List[Target] = []
+        try:
+            self.manifest: Dict[str, Dict[str, str]] = json.loads(self.manifest_path.read_text())
+        except (OSError, ValueError):
+            self.manifest = {}
+
+    def key(self, output: Path) -> str:
+        try:
+            return str(output.resolve().relative_to(self.manifest_path.resolve().parent))
+        except ValueError:
+            return str(output.resolve())
+
+    def add(self, output: Path, inputs: Dict[str, str], job: Tuple[Callable, tuple]) -> Target:
+        target = Target(output, inputs, job)
+        self.targets.append(target)
+        return target
+
+    def reasons(self, target: Target) -> List[str]:
+        """Why target must be rebuilt; empty when it is up to date."""
+        if not target.output.exists():
+            return ["output missing"]
+        built = self.manifest.get(self.key(target.output))
+        if built is None:
+            return ["no build record"]
+        reasons = []
+        for name, digest in target.inputs.items():
+            if name not in built:
+                reasons.append(f"new input {name}")
+            elif built[name] != digest:
+                reasons.append(f"{name} {'missing' if digest == MISSING else 'changed'}")
+        reasons.extend(f"input {name} removed" for name in built if name not in target.inputs)
+        return reasons
+
+    def stale(self, force: bool = False) -> List[Tuple[Target, List[str]]]:
+        stale = []
+        for target in self.targets:
+            reasons = ["forced"] if force else self.reasons(target)
+            if reasons:
+                stale.append((target, reasons))
+        return stale
+
+    def record(self, target: Target) -> None:
+        self.manifest[self.key(target.output)] = dict(target.inputs)
+
+    def save(self) -> None:
+        tmp = self.manifest_path.with_name(self.manifest_path.name + ".tmp")
+        tmp.write_text(json.dumps(self.manifest, indent=1, sort_keys=True))
+        os.replace(tmp, self.manifest_path)
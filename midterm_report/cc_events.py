@@ -0,0 +1,313 @@
+#!/usr/bin/env python3
+"""Congestion events and queueing delay detected from parsed cwnd/RTT series.
+
+All flows of a log are concatenated into flat arrays (one row per sample,
+sorted by flow then time) and every step below is a NumPy operation over
+those arrays, so millions of samples across thousands of flows take seconds.
+
+- A decrease episode is a run of samples whose cwnd does not grow and that
+  contains at least one drop. An episode that ends at cwnd 1 (the loss
+  window) is an RTO; one that ends at or below MD_RATIO of the cwnd before it
+  is a multiplicative decrease. Smaller dips are ignored. Grouping the run
+  keeps a PRR fast recovery, which lowers cwnd step by step, as one event,
+  but a later drop in the run that is itself at or below MD_RATIO of the
+  sample before it starts a new episode. Back-to-back reductions with no
+  growth sample between them, common at a 0.5 s sampling interval, so count
+  as separate events.
+- recovery_s runs from an event's first drop to the first sample where cwnd
+  grows again. For an MD this is the fast-recovery episode; for an RTO it is
+  the collapse. Its resolution is the sampling interval.
+- A slow-start exit is a sample where cwnd >= ssthresh right after one that
+  was in slow start (ssthresh not yet set, or cwnd below it).
+- Queueing delay is rtt - minrtt. When minrtt is missing (tcp_probe logs) the
+  flow's running minimum RTT is used instead.
+
+    python3 cc_events.py scenario1_basic_aimd/cwnd.log
+    python3 cc_events.py --annotate summary.json   # add "cc_events" to each entry
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+from ss_parser import FlowKey, FlowSeries
+
+MD_RATIO = 0.8  # an episode must end at or below this share of the cwnd before it
+LOSS_WINDOW = 1.0  # cwnd after an RTO
+QUANTILES = (50.0, 95.0, 99.0)
+MD, RTO = 0, 1
+
+
+@dataclass
+class FlatSeries:
+    """Samples of many flows concatenated; flow i owns rows offsets[i]:offsets[i + 1]."""
+
+    keys: List[FlowKey]
+    offsets: np.ndarray
+    flow: np.ndarray  # flow index of every row
+    times: np.ndarray
+    cwnd: np.ndarray
+    ssthresh: np.ndarray
+    rtt: np.ndarray
+    minrtt: np.ndarray
+
+    @classmethod
+    def from_flows(cls, flows: Dict[FlowKey, FlowSeries]) -> "FlatSeries":
+        """Keep the samples that have a cwnd."""
+        keys = list(flows)
+        masks = [~np.isnan(flows[key].columns["cwnd"]) for key in keys]
+        counts = np.array([mask.sum() for mask in masks], dtype=np.int64)
+
+        def column(get) -> np.ndarray:
+            parts = [get(flows[key])[mask] for key, mask in zip(keys, masks)]
+            return np.concatenate(parts) if parts else np.empty(0)
+
+        return cls(
+            keys,
+            np.concatenate(([0], np.cumsum(counts))),
+            np.repeat(np.arange(len(keys)), counts),
+            column(lambda series: series.times),
+            column(lambda series: series.columns["cwnd"]),
+            column(lambda series: series.columns["ssthresh"]),
+            column(lambda series: series.columns["rtt"]),
+            column(lambda series: series.columns["minrtt"]),
+        )
+
+    def __len__(self) -> int:
+        return len(self.times)
+
+    def first_rows(self) -> np.ndarray:
+        """True on the first sample of each flow, where no step from a previous sample exists."""
+        first = np.zeros(len(self), dtype=bool)
+        first[self.offsets[:-1][np.diff(self.offsets) > 0]] = True
+        return first
+
+
+@dataclass
+class EventTable:
+    """Every MD and RTO event as parallel arrays, ordered by flow then time."""
+
+    flow: np.ndarray
+    kind: np.ndarray  # MD or RTO
+    time: np.ndarray
+    before: np.ndarray  # cwnd before the episode
+    after: np.ndarray  # cwnd at its end
+    recovery_s: np.ndarray  # NaN when cwnd never grew again
+
+    def __len__(self) -> int:
+        return len(self.time)
+
+
+def _prev(values: np.ndarray) -> np.ndarray:
+    shifted = np.empty_like(values)
+    if len(values):
+        shifted[0] = np.nan
+        shifted[1:] = values[:-1]
+    return shifted
+
+
+def _first_within(rows: np.ndarray, lo: np.ndarray, hi: np.ndarray):
+    """First of the sorted rows at or after each lo, and whether it is also <= hi."""
+    if not len(rows):
+        return lo, np.zeros(len(lo), dtype=bool)
+    first = rows[np.minimum(np.searchsorted(rows, lo), len(rows) - 1)]
+    return first, (first >= lo) & (first <= hi)
+
+
+def detect_events(flat: FlatSeries) -> EventTable:
+    cwnd = flat.cwnd
+    step = ~flat.first_rows()
+    prev = _prev(cwnd)
+    falling = step & (cwnd < prev)
+    flat_or_falling = step & (cwnd <= prev)
+    # runs of non-increasing samples: starts and ends pair up in order
+    run_starts = np.flatnonzero(flat_or_falling & ~np.concatenate(([False], flat_or_falling[:-1])))
+    run_ends = np.flatnonzero(flat_or_falling & ~np.concatenate((flat_or_falling[1:], [False])))
+    drops = np.flatnonzero(falling)
+    # a later drop that is a full MD on its own starts a new episode within the run
+    run_first, run_has_drop = _first_within(drops, run_starts, run_ends)
+    run_first = run_first[run_has_drop]
+    sharp = drops[cwnd[drops] <= MD_RATIO * prev[drops]]
+    if len(run_first):
+        sharp = sharp[run_first[np.minimum(np.searchsorted(run_first, sharp), len(run_first) - 1)] != sharp]
+    starts = np.sort(np.concatenate((run_starts, sharp)))  # disjoint: a sharp run start is its run's first drop
+    run_end = run_ends[np.searchsorted(run_starts, starts, side="right") - 1]
+    ends = np.minimum(np.append(starts[1:] - 1, len(cwnd)), run_end)
+    first_drop, has_drop = _first_within(drops, starts, ends)
+    starts, ends, first_drop = starts[has_drop], ends[has_drop], first_drop[has_drop]
+
+    before, after = cwnd[starts - 1], cwnd[ends]
+    is_rto = after <= LOSS_WINDOW
+    keep = is_rto | (after <= MD_RATIO * before)
+    starts, ends, first_drop, before, after, is_rto = (
+        starts[keep], ends[keep], first_drop[keep], before[keep], after[keep], is_rto[keep]
+    )
+
+    # first growth after each episode, if it belongs to the same flow
+    growth = np.flatnonzero(step & (cwnd > prev))
+    recovery = np.full(len(ends), np.nan)
+    if len(growth):
+        pos = np.searchsorted(growth, ends + 1)
+        found = pos < len(growth)
+        nxt = growth[np.minimum(pos, len(growth) - 1)]
+        found &= flat.flow[nxt] == flat.flow[ends]
+        recovery[found] = flat.times[nxt[found]] - flat.times[first_drop[found]]
+    return EventTable(
+        flat.flow[first_drop],
+        np.where(is_rto, RTO, MD).astype(np.uint8),
+        flat.times[first_drop],
+        before,
+        after,
+        recovery,
+    )
+
+
+def slow_start_exits(flat: FlatSeries) -> np.ndarray:
+    """Row indices where a flow leaves slow start."""
+    in_slow_start = np.isnan(flat.ssthresh) | (flat.cwnd < flat.ssthresh)
+    return np.flatnonzero(~flat.first_rows() & _prev(in_slow_start.astype(np.float64)).astype(bool) & ~in_slow_start)
+
+
+def queue_delay(flat: FlatSeries) -> np.ndarray:
+    """rtt - minrtt (ms) per row, NaN without an RTT sample."""
+    base = flat.minrtt.copy()
+    missing = np.isnan(base)
+    if missing.any():
+        # running minimum per flow: shifting each flow far below the previous ones
+        # makes one global running minimum restart at every flow boundary
+        span = np.nanmax(flat.rtt) + 1.0 if np.isfinite(flat.rtt).any() else 1.0
+        shifted = flat.rtt - flat.flow * span
+        running = np.fmin.accumulate(np.where(np.isnan(shifted), np.inf, shifted)) + flat.flow * span
+        base[missing] = running[missing]
+    return np.maximum(flat.rtt - base, 0.0)
+
+
+def grouped_percentiles(values: np.ndarray, groups: np.ndarray, count: int, q: Sequence[float]) -> np.ndarray:
+    """(count, len(q)) array of the per-group percentiles (linear, as np.percentile), NaN for empty groups."""
+    valid = ~np.isnan(values)
+    values, groups = values[valid], groups[valid]
+    sizes = np.bincount(groups, minlength=count)
+    if len(values):
+        # one float sort instead of lexsort: offset every group past the previous one's range
+        low = values.min()
+        span = values.max() - low + 1.0
+        values = np.sort(values - low + groups * span) - np.repeat(np.arange(count) * span, sizes) + low
+    starts = np.concatenate(([0], np.cumsum(sizes)[:-1]))
+    out = np.full((count, len(q)), np.nan)
+    nonempty = sizes > 0
+    for col, pct in enumerate(q):
+        rank = (sizes[nonempty] - 1) * pct / 100.0
+        lo = np.floor(rank).astype(np.int64)
+        hi = np.minimum(lo + 1, sizes[nonempty] - 1)
+        frac = rank - lo
+        base = starts[nonempty]
+        out[nonempty, col] = values[base + lo] * (1 - frac) + values[base + hi] * frac
+    return out
+
+
+def flow_label(key: FlowKey) -> str:
+    local_addr, local_port, peer_addr, peer_port = key
+    return f"{local_addr}:{local_port}->{peer_addr}:{peer_port}"
+
+
+def _rounded(value) -> Optional[float]:
+    return None if value is None or np.isnan(value) else round(float(value), 4)
+
+
+def summarize(flows: Dict[FlowKey, FlowSeries]) -> Dict[str, dict]:
+    """Per-flow event counts, recovery times and queueing-delay percentiles, JSON-ready.
+
+    The "all" entry aggregates every flow (its percentiles pool all samples).
+    """
+    flat = FlatSeries.from_flows(flows)
+    count = len(flat.keys)
+    events = detect_events(flat)
+    exits = slow_start_exits(flat)
+    delay = queue_delay(flat)
+    pct = grouped_percentiles(delay, flat.flow, count, QUANTILES)
+    pooled = np.nanpercentile(delay, QUANTILES) if np.isfinite(delay).any() else [np.nan] * len(QUANTILES)
+
+    is_md = events.kind == MD
+    md_count = np.bincount(events.flow[is_md], minlength=count)
+    rto_count = np.bincount(events.flow[~is_md], minlength=count)
+    exit_count = np.bincount(flat.flow[exits], minlength=count)
+    recovered = ~np.isnan(events.recovery_s)
+    md_rec = is_md & recovered
+    rec_sum = np.bincount(events.flow[md_rec], weights=events.recovery_s[md_rec], minlength=count)
+    rec_max = np.zeros(count)
+    np.maximum.at(rec_max, events.flow[md_rec], events.recovery_s[md_rec])
+    rec_n = np.bincount(events.flow[md_rec], minlength=count)
+    ratio_sum = np.bincount(events.flow[is_md], weights=events.after[is_md] / events.before[is_md], minlength=count)
+    first_exit = np.full(count, np.nan)
+    if len(exits):
+        first_rows = exits[np.unique(flat.flow[exits], return_index=True)[1]]
+        first_exit[flat.flow[first_rows]] = flat.times[first_rows] - flat.times[flat.offsets[flat.flow[first_rows]]]
+
+    def entry(md, rto, ss_exits, ss_exit_s, rec_mean, rec_maximum, ratio, delays, samples) -> dict:
+        return {
+            "samples": int(samples),
+            "md_events": int(md),
+            "md_ratio_mean": _rounded(ratio),
+            "rto_events": int(rto),
+            "slow_start_exits": int(ss_exits),
+            "first_slow_start_exit_s": _rounded(ss_exit_s),
+            "recovery_mean_s": _rounded(rec_mean),
+            "recovery_max_s": _rounded(rec_maximum),
+            "queue_delay_ms": {f"p{q:g}": _rounded(value) for q, value in zip(QUANTILES, delays)},
+        }
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        result = {
+            flow_label(key): entry(
+                md_count[idx], rto_count[idx], exit_count[idx], first_exit[idx],
+                rec_sum[idx] / rec_n[idx] if rec_n[idx] else np.nan, rec_max[idx] if rec_n[idx] else np.nan,
+                ratio_sum[idx] / md_count[idx] if md_count[idx] else np.nan, pct[idx],
+                flat.offsets[idx + 1] - flat.offsets[idx],
+            )
+            for idx, key in enumerate(flat.keys)
+        }
+        result["all"] = entry(
+            is_md.sum(), (~is_md).sum(), len(exits), np.nanmin(first_exit) if np.isfinite(first_exit).any() else np.nan,
+            events.recovery_s[md_rec].mean() if md_rec.any() else np.nan,
+            events.recovery_s[md_rec].max() if md_rec.any() else np.nan,
+            (events.after[is_md] / events.before[is_md]).mean() if is_md.any() else np.nan, pooled, len(flat),
+        )
+    return result
+
+
+def summarize_logs(log_dir: Path, load=None) -> Dict[str, Dict[str, dict]]:
+    """summarize() of every *cwnd.log in log_dir, keyed by file name (load defaults to parse_flow_log)."""
+    if load is None:
+        from parse_cache import parse_flow_log as load
+    return {path.name: summarize(load(path)) for path in sorted(log_dir.glob("*cwnd.log"))}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Detect congestion events in cwnd logs.")
+    parser.add_argument("logs", nargs="*", type=Path, help="cwnd logs to summarize")
+    parser.add_argument("--annotate", type=Path, help="add cc_events to every entry of this summary.json")
+    parser.add_argument("--log-root", type=Path, help="scenario log directories (default: next to --annotate)")
+    args = parser.parse_args()
+
+    from parse_cache import parse_flow_log
+
+    for path in args.logs:
+        print(json.dumps({path.name: summarize(parse_flow_log(path))}, indent=2))
+    if args.annotate:
+        root = args.log_root or args.annotate.parent
+        entries = json.loads(args.annotate.read_text())
+        for entry in entries:
+            log_dir = root / entry["scenario"]
+            if log_dir.is_dir():
+                entry["cc_events"] = summarize_logs(log_dir)
+        args.annotate.write_text(json.dumps(entries, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,280 @@
+#!/usr/bin/env python3
+"""
+Compare congestion-control algorithms over repeated scenario runs.
+
+Every (scenario, algorithm) pair is run `--reps` times with the algorithm set
+per flow (scenario_spec.with_congestion -> iperf3 -C, i.e. TCP_CONGESTION),
+so the host's net.ipv4.tcp_congestion_control sysctl does not matter. Runs
+are interleaved: repetition-major, with the algorithm order rotated every
+repetition. Repetition k of every algorithm therefore runs close together in
+time, and no algorithm always goes first. The runs go through sweep.run_points,
+so `--workers` run in parallel and a completed run (its summary.json exists)
+is skipped when the comparison is started again.
+
+    <out>/<config hash>/spec.json
+    <out>/<config hash>/rep<k>/summary.json, logs/
+    <out>/comparison.json, comparison.md
+
+Per run the analysis takes the aggregate throughput, retransmits, RTT
+inflation (p95 of rtt - minrtt from cc_events, worst cwnd log) and Jain
+fairness (multi-flow scenarios only). It reports the mean and 95 % t
+confidence interval of each metric per (scenario, algorithm). Each
+algorithm is also compared with `--baseline` through paired differences,
+matched by repetition.
+
+    sudo python3 compare.py --cc reno cubic bbr reno_custom --reps 5 --workers 2
+    python3 compare.py --cc reno reno_custom --reps 5 --dry-run
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import math
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence
+
+from artifacts import BASE_DIR
+from scenario_spec import SCENARIO_SPECS, ScenarioSpec, with_congestion
+from sweep import run_points, write_json
+
+BASELINE_SCENARIOS = (
+    "scenario1_basic_aimd",
+    "scenario2_lossy_link",
+    "scenario3_high_bdp",
+    "scenario4_rtt_unfairness",
+    "scenario5_bufferbloat",
+)
+ALGORITHMS = ("reno", "cubic", "bbr", "reno_custom")
+AVAILABLE_PATH = Path("/proc/sys/net/ipv4/tcp_available_congestion_control")
+METRICS = {  # name -> metrics table header
+    "throughput_mbps": "처리량 (Mbps)",
+    "retransmits": "재전송",
+    "rtt_inflation_ms": "RTT 증가 p95 (ms)",
+    "fairness": "Jain",
+}
+# two-sided 95 % Student t quantiles for 1..30 degrees of freedom; 1.96 beyond
+T95 = (
+    12.706, 4.303, 3.182, 2.776, 2.571, 2.447, 2.365, 2.306, 2.262, 2.228,
+    2.201, 2.179, 2.160, 2.145, 2.131, 2.120, 2.110, 2.101, 2.093, 2.086,
+    2.080, 2.074, 2.069, 2.064, 2.060, 2.056, 2.052, 2.048, 2.045, 2.042,
+)
+
+
+@dataclass(frozen=True)
+class Run:
+    scenario: str  # base scenario name
+    algorithm: str
+    repetition: int
+    spec: ScenarioSpec
+
+
+def plan_runs(specs: Sequence[ScenarioSpec], algorithms: Sequence[str], repetitions: int) -> List[Run]:
+    """Every (scenario, algorithm, repetition) in interleaved run order."""
+    runs = []
+    for repetition in range(repetitions):
+        shift = repetition % len(algorithms)
+        order = list(algorithms[shift:]) + list(algorithms[:shift])
+        for spec in specs:
+            for algorithm in order:
+                runs.append(Run(spec.name, algorithm, repetition, with_congestion(spec, algorithm)))
+    return runs
+
+
+def run_dir(out_dir: Path, run: Run) -> Path:
+    return out_dir / run.spec.config_hash() / f"rep{run.repetition:02d}"
+
+
+def available_algorithms() -> Optional[List[str]]:
+    """Algorithms the kernel can use now, or None where that cannot be read."""
+    try:
+        return AVAILABLE_PATH.read_text().split()
+    except OSError:
+        return None
+
+
+# -- metrics -------------------------------------------------------------------
+
+
+def run_metrics(summary: dict) -> Dict[str, Optional[float]]:
+    """Aggregate throughput, retransmits, RTT inflation and fairness of one run's summary entry."""
+    iperf = summary["iperf"]
+    results = [iperf] if "intervals" in iperf else list(iperf.values())
+    throughput = 0.0
+    retransmits = 0
+    group_fairness = []
+    for result in results:
+        if "flows" in result:  # flow group
+            throughput += result.get("total_bps") or 0.0
+            retransmits += sum(flow.get("retransmits") or 0 for flow in result["flows"])
+            if result.get("fairness_index") is not None:
+                group_fairness.append(result["fairness_index"])
+        else:
+            throughput += result.get("average_bps") or 0.0
+            retransmits += result.get("retransmits") or 0
+    fairness = summary.get("fairness_index")
+    if fairness is None and group_fairness:
+        fairness = min(group_fairness)
+    delays = [
+        flows["all"]["queue_delay_ms"]["p95"]
+        for flows in summary.get("cc_events", {}).values()
+        if "all" in flows and flows["all"]["queue_delay_ms"]["p95"] is not None
+    ]
+    return {
+        "throughput_mbps": throughput / 1e6,
+        "retransmits": float(retransmits),
+        "rtt_inflation_ms": max(delays) if delays else None,
+        "fairness": fairness,
+    }
+
+
+def mean_ci(values: Sequence[float]) -> Dict[str, Optional[float]]:
+    """Mean and half-width of its 95 % t confidence interval (None below two values)."""
+    n = len(values)
+    if not n:
+        return {"n": 0, "mean": None, "ci95": None}
+    mean = sum(values) / n
+    if n < 2:
+        return {"n": 1, "mean": mean, "ci95": None}
+    std = math.sqrt(sum((value - mean) ** 2 for value in values) / (n - 1))
+    t = T95[n - 2] if n - 1 <= len(T95) else 1.96
+    return {"n": n, "mean": mean, "ci95": t * std / math.sqrt(n)}
+
+
+def analyze(out_dir: Path, runs: Sequence[Run], baseline: str) -> dict:
+    """Per (scenario, algorithm) statistics and paired differences against baseline."""
+    metrics: Dict[str, Dict[str, Dict[int, Dict[str, Optional[float]]]]] = {}
+    for run in runs:
+        summary_path = run_dir(out_dir, run) / "summary.json"
+        if summary_path.exists():
+            by_rep = metrics.setdefault(run.scenario, {}).setdefault(run.algorithm, {})
+            by_rep[run.repetition] = run_metrics(json.loads(summary_path.read_text()))
+
+    stats: Dict[str, Dict[str, dict]] = {}
+    paired: Dict[str, Dict[str, dict]] = {}
+    for scenario, by_algorithm in metrics.items():
+        for algorithm, by_rep in by_algorithm.items():
+            stats.setdefault(scenario, {})[algorithm] = {
+                name: mean_ci([values[name] for values in by_rep.values() if values[name] is not None])
+                for name in METRICS
+            }
+        base = by_algorithm.get(baseline)
+        if base is None:
+            continue
+        for algorithm, by_rep in by_algorithm.items():
+            if algorithm == baseline:
+                continue
+            entry = {}
+            for name in METRICS:
+                pairs = [
+                    (by_rep[rep][name], base[rep][name])
+                    for rep in sorted(set(by_rep) & set(base))
+                    if by_rep[rep][name] is not None and base[rep][name] is not None
+                ]
+                diff = mean_ci([value - reference for value, reference in pairs])
+                reference = sum(ref for _, ref in pairs) / len(pairs) if pairs else None
+                diff["relative"] = diff["mean"] / reference if diff["mean"] is not None and reference else None
+                diff["significant"] = diff["ci95"] is not None and abs(diff["mean"]) > diff["ci95"]
+                entry[name] = diff
+            paired.setdefault(scenario, {})[algorithm] = entry
+    return {"baseline": baseline, "stats": stats, "paired": paired}
+
+
+# -- report --------------------------------------------------------------------
+
+
+def _cell(stat: dict, signed: bool = False) -> str:
+    if stat["mean"] is None:
+        return "-"
+    text = f"{stat['mean']:+.2f}" if signed else f"{stat['mean']:.2f}"
+    if stat["ci95"] is not None:
+        text += f" ± {stat['ci95']:.2f}"
+    if signed and stat.get("relative") is not None:
+        text += f" ({stat['relative']:+.0%})"
+    if stat.get("significant"):
+        text += " *"
+    return text
+
+
+def render_markdown(result: dict) -> str:
+    headers = " | ".join(METRICS.values())
+    rule = " | ".join("---" for _ in METRICS)
+    rows = [
+        "평균 ± 95% 신뢰구간 (반복 n회)",
+        "",
+        f"| 시나리오 | 알고리즘 | n | {headers} |",
+        f"| --- | --- | --- | {rule} |",
+    ]
+    for scenario, by_algorithm in result["stats"].items():
+        for algorithm, stats in by_algorithm.items():
+            n = max(stat["n"] for stat in stats.values())
+            cells = " | ".join(_cell(stats[name]) for name in METRICS)
+            rows.append(f"| {scenario} | {algorithm} | {n} | {cells} |")
+    rows += [
+        "",
+        f"{result['baseline']} 대비 반복별 짝지은 차이 (평균 ± 95% 신뢰구간, 상대 변화, * = 구간이 0을 포함하지 않음)",
+        "",
+        f"| 시나리오 | 알고리즘 | {headers} |",
+        f"| --- | --- | {rule} |",
+    ]
+    for scenario, by_algorithm in result["paired"].items():
+        for algorithm, diffs in by_algorithm.items():
+            cells = " | ".join(_cell(diffs[name], signed=True) for name in METRICS)
+            rows.append(f"| {scenario} | {algorithm} − {result['baseline']} | {cells} |")
+    return "\n".join(rows) + "\n"
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Compare congestion-control algorithms over repeated runs.")
+    parser.add_argument("--scenario", action="append", help=f"repeatable (default: {', '.join(BASELINE_SCENARIOS)})")
+    parser.add_argument("--cc", nargs="+", default=list(ALGORITHMS), help="algorithms (iperf3 -C names)")
+    parser.add_argument("--baseline", help="algorithm the others are paired against (default: the first --cc)")
+    parser.add_argument("--reps", type=int, default=5, help="repetitions per (scenario, algorithm)")
+    parser.add_argument("--workers", type=int, default=1, help="runs in parallel")
+    parser.add_argument("--backend", choices=("mininet", "local"), help="network backend (default: mininet)")
+    parser.add_argument("--out", type=Path, help="results directory (default: <data dir>/comparisons/<algorithms>)")
+    parser.add_argument("--dry-run", action="store_true", help="list the runs in order and their state")
+    parser.add_argument("--analyze", action="store_true", help="only (re)write the tables from finished runs")
+    args = parser.parse_args()
+
+    names = args.scenario or list(BASELINE_SCENARIOS)
+    unknown = sorted(set(names) - set(SCENARIO_SPECS))
+    if unknown:
+        parser.error(f"unknown scenario(s): {', '.join(unknown)}")
+    baseline = args.baseline or args.cc[0]
+    if baseline not in args.cc:
+        parser.error(f"--baseline {baseline} is not one of --cc")
+    out_dir = args.out or BASE_DIR / "comparisons" / "-".join(args.cc)
+    runs = plan_runs([SCENARIO_SPECS[name] for name in names], args.cc, args.reps)
+
+    pending = [run for run in runs if not (run_dir(out_dir, run) / "summary.json").exists()]
+    if args.dry_run:
+        for run in runs:
+            state = "todo" if run in pending else "done"
+            print(f"{state}  rep{run.repetition:02d}  {run.spec.config_hash()}  {run.spec.name}")
+        print(f"{len(runs) - len(pending)}/{len(runs)} runs done")
+        return
+    if not args.analyze:
+        available = available_algorithms()
+        missing = sorted(set(args.cc) - set(available)) if available is not None else []
+        if missing:
+            parser.error(
+                f"not available in this kernel: {', '.join(missing)} (have {', '.join(available)}); "
+                "load the module first, e.g. sudo modprobe tcp_bbr or sudo insmod reno_custom.ko"
+            )
+        for run in runs:
+            run_dir(out_dir, run).mkdir(parents=True, exist_ok=True)
+            write_json(run_dir(out_dir, run).parent / "spec.json", run.spec.to_dict())
+        print(f"{len(runs) - len(pending)}/{len(runs)} runs done, running {len(pending)}")
+        run_points([(run.spec, run_dir(out_dir, run)) for run in pending], args.workers, args.backend)
+
+    result = analyze(out_dir, runs, baseline)
+    write_json(out_dir / "comparison.json", result)
+    table = render_markdown(result)
+    (out_dir / "comparison.md").write_text(table)
+    print(table)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""Congestion-control plug-ins for packet_sim.
+
+A controller only decides window sizes; packet_sim's sender owns sequence
+numbers, duplicate-ACK counting, NewReno fast recovery and the RTO timer, and
+calls back into the controller at the same points where the kernel calls a
+`tcp_congestion_ops` module (reno_custom.c):
+
+    on_ack(conn, acked, rtt, now)  new data cumulatively ACKed outside recovery
+                                   (cong_avoid); rtt is the sample in seconds
+                                   or None
+    on_loss(conn, now)             three duplicate ACKs, entering fast recovery
+                                   (ssthresh); set conn.ssthresh and conn.cwnd
+    on_rto(conn, now)              retransmission timeout; the sender then
+                                   goes back to snd_una
+
+`conn` exposes cwnd and ssthresh (segments, float; ssthresh is inf until the
+first loss), flight (segments in flight), srtt and min_rtt (seconds, None
+before the first sample). Controllers keep their own per-connection state on
+themselves: one instance is created per connection.
+"""
+
+from __future__ import annotations
+
+import math
+from typing import Dict, Optional, Type
+
+INITIAL_CWND = 10.0
+MIN_CWND = 2.0
+
+
+class CongestionControl:
+    """Base class; subclasses override the three hooks."""
+
+    name = "base"
+
+    def init(self, conn) -> None:
+        conn.cwnd = INITIAL_CWND
+        conn.ssthresh = math.inf
+
+    def on_ack(self, conn, acked: int, rtt: Optional[float], now: float) -> None:
+        raise NotImplementedError
+
+    def on_loss(self, conn, now: float) -> None:
+        raise NotImplementedError
+
+    def on_rto(self, conn, now: float) -> None:
+        raise NotImplementedError
+
+
+class Reno(CongestionControl):
+    """Slow start, +1 segment per RTT, halve on fast retransmit (RFC 5681)."""
+
+    name = "reno"
+
+    def on_ack(self, conn, acked: int, rtt: Optional[float], now: float) -> None:
+        if conn.cwnd < conn.ssthresh:
+            # slow start up to ssthresh, then the rest of the ACK in avoidance
+            grow = min(acked, max(conn.ssthresh - conn.cwnd, 0.0))
+            conn.cwnd += grow
+            acked -= grow
+        if acked:
+            conn.cwnd += acked / conn.cwnd
+
+    def on_loss(self, conn, now: float) -> None:
+        conn.ssthresh = max(conn.flight / 2.0, MIN_CWND)
+        conn.cwnd = conn.ssthresh
+
+    def on_rto(self, conn, now: float) -> None:
+        conn.ssthresh = max(conn.flight / 2.0, MIN_CWND)
+        conn.cwnd = 1.0
+
+
+CONTROLLERS: Dict[str, Type[CongestionControl]] = {Reno.name: Reno}
+
+
+def get_controller(name: str) -> Type[CongestionControl]:
+    try:
+        return CONTROLLERS[name]
+    except KeyError:
+        raise KeyError(f"unknown congestion control {name!r} (known: {', '.join(sorted(CONTROLLERS))})") from None
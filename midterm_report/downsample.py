@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""Shape-preserving downsampling of time series to a pixel budget.
+
+A 1000-pixel-wide axis cannot show more than about two distinct y values per
+pixel column, so plotting 10^5-10^6 samples only costs matplotlib time.
+
+- minmax keeps the minimum and maximum of every column-wide bucket in time
+  order, so a one-sample cwnd drop still reaches the bottom of the plot.
+- lttb (Largest-Triangle-Three-Buckets) keeps one point per bucket, the one
+  that forms the largest triangle with its neighbours. This suits smooth
+  lines such as RTT or throughput.
+
+Both expect x sorted ascending and drop NaN samples.
+"""
+
+from __future__ import annotations
+
+from typing import Tuple
+
+import numpy as np
+
+Series = Tuple[np.ndarray, np.ndarray]
+
+
+def _finite(x, y) -> Series:
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    keep = ~(np.isnan(x) | np.isnan(y))
+    return (x, y) if keep.all() else (x[keep], y[keep])
+
+
+def _bucket_starts(x: np.ndarray, buckets: int) -> np.ndarray:
+    """First index of every non-empty bucket of equal x width."""
+    edges = np.searchsorted(x, np.linspace(x[0], x[-1], buckets + 1)[1:-1], side="left")
+    return np.unique(np.concatenate(([0], edges)))
+
+
+def minmax(x, y, buckets: int) -> Series:
+    """At most 2 * buckets points: each bucket's min and max, in time order."""
+    x, y = _finite(x, y)
+    if len(x) <= 2 * buckets or buckets < 1:
+        return x, y
+    starts = _bucket_starts(x, buckets)
+    lengths = np.diff(np.append(starts, len(x)))
+    segment = np.repeat(np.arange(len(starts)), lengths)
+    # first index of each bucket's minimum / maximum
+    is_min = y == np.minimum.reduceat(y, starts)[segment]
+    is_max = y == np.maximum.reduceat(y, starts)[segment]
+    mins = np.flatnonzero(is_min)
+    maxs = np.flatnonzero(is_max)
+    mins = mins[np.unique(segment[mins], return_index=True)[1]]
+    maxs = maxs[np.unique(segment[maxs], return_index=True)[1]]
+    keep = np.unique(np.concatenate((mins, maxs, [0, len(x) - 1])))
+    return x[keep], y[keep]
+
+
+def lttb(x, y, points: int) -> Series:
+    """Largest-Triangle-Three-Buckets: points samples including both ends."""
+    x, y = _finite(x, y)
+    n = len(x)
+    if n <= points or points < 3:
+        return x, y
+    # points - 2 interior buckets of equal sample count
+    bounds = np.linspace(1, n - 1, points - 1).astype(np.int64)
+    keep = np.empty(points, dtype=np.int64)
+    keep[0], keep[-1] = 0, n - 1
+    prev = 0
+    for idx in range(points - 2):
+        lo, hi = bounds[idx], bounds[idx + 1]
+        if idx + 2 < len(bounds):
+            nxt_lo, nxt_hi = bounds[idx + 1], bounds[idx + 2]
+            avg_x, avg_y = x[nxt_lo:nxt_hi].mean(), y[nxt_lo:nxt_hi].mean()
+        else:
+            avg_x, avg_y = x[-1], y[-1]
+        bx, by = x[lo:hi], y[lo:hi]
+        area = np.abs((x[prev] - avg_x) * (by - y[prev]) - (x[prev] - bx) * (avg_y - y[prev]))
+        prev = lo + int(np.argmax(area))
+        keep[idx + 1] = prev
+    return x[keep], y[keep]
+
+
+def pixel_budget(ax, dpi: float) -> int:
+    """Width of ax in device pixels when the figure is saved at dpi."""
+    fig = ax.figure
+    return max(int(ax.get_position().width * fig.get_figwidth() * dpi), 1)
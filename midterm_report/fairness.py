@@ -0,0 +1,267 @@
+#!/usr/bin/env python3
+"""Time-resolved fairness of N flows: windowed Jain index, convergence, shares.
+
+Everything starts from a ThroughputMatrix: mean bits/s of every flow (column)
+in every time bin (row) on one clock, plus an `active` mask of the bins
+that lie wholly inside each flow's lifetime. Either source is first turned into a cumulative
+bits curve per flow, then read at the bin edges:
+
+- iperf3 intervals: cumulative bits at each interval end, shifted by the
+  flow's start offset;
+- byte counters (`bytes_acked`) in cwnd samples.
+
+The curves of all flows are interpolated at all bin edges in one pass
+(searchsorted on flow-offset keys), so no step loops over flows or bins.
+With 1000 flows x 3600 bins that is 3.6M cells.
+
+- Jain index per bin, over the flows active in it: (sum x)^2 / (n sum x^2).
+- Windowed: the same over sliding means of `window` bins, counting only
+  flows active for the whole window.
+- Fair share per bin is the active flows' total divided by their number, or
+  capacity / n when the bottleneck capacity is given. A flow has converged
+  from the first bin after which it stays within epsilon of the fair share
+  for the rest of its life. Its convergence time is measured from its
+  start. summarize() applies this to the windowed means.
+- Share: x / fair share for each active bin, with per-flow quantiles over
+  time.
+"""
+
+from __future__ import annotations
+
+import warnings
+from dataclasses import dataclass
+from typing import Dict, List, Mapping, Optional, Sequence
+
+import numpy as np
+
+from cc_events import flow_label
+from parse_cache import IntervalTable
+from ss_parser import FlowKey, FlowSeries
+
+SHARE_QUANTILES = (5.0, 50.0, 95.0)
+PER_FLOW_LIMIT = 32  # summarize() lists flows individually up to this many
+
+
+def _cumulative_at(
+    flow: np.ndarray, times: np.ndarray, bits: np.ndarray, count: int, edges: np.ndarray
+) -> np.ndarray:
+    """(len(edges), count) cumulative bits of each flow at each edge.
+
+    flow/times/bits are points of the per-flow cumulative curves, sorted by
+    flow then time. Before a flow's first point its curve holds the first
+    value, after the last point the last value.
+    """
+    out = np.zeros((len(edges), count))
+    if not len(times):
+        return out
+    sizes = np.bincount(flow, minlength=count)
+    first = np.concatenate(([0], np.cumsum(sizes)[:-1]))
+    last = first + sizes - 1
+    low = min(times.min(), edges[0])
+    span = max(times.max(), edges[-1]) - low + 1.0
+    keys = flow * span + (times - low)  # ascending: flow blocks kept apart by span
+    has = np.flatnonzero(sizes)
+    queries = has[:, None] * span + (edges[None, :] - low)  # flow-major, so already sorted
+    right = np.searchsorted(keys, queries.ravel(), side="right").reshape(queries.shape)
+    lo = np.clip(right - 1, first[has, None], last[has, None])
+    hi = np.clip(right, first[has, None], last[has, None])
+    t_lo, t_hi = times[lo], times[hi]
+    with np.errstate(invalid="ignore", divide="ignore"):
+        frac = np.where(t_hi > t_lo, (edges[None, :] - t_lo) / (t_hi - t_lo), 0.0)
+    out[:, has] = (bits[lo] + np.clip(frac, 0.0, 1.0) * (bits[hi] - bits[lo])).T
+    return out
+
+
+@dataclass
+class ThroughputMatrix:
+    labels: List[str]
+    edges: np.ndarray  # T + 1 bin edges (s)
+    bps: np.ndarray  # (T, N) mean bits/s per bin
+    active: np.ndarray  # (T, N) bin lies within the flow's lifetime
+
+    @property
+    def bin_s(self) -> float:
+        return float(self.edges[1] - self.edges[0]) if len(self.edges) > 1 else 0.0
+
+    @classmethod
+    def from_points(
+        cls, labels: List[str], flow: np.ndarray, times: np.ndarray, bits: np.ndarray, bin_s: float = 1.0
+    ) -> "ThroughputMatrix":
+        """From cumulative-bit points sorted by flow then time."""
+        count = len(labels)
+        if not len(times):
+            return cls(labels, np.zeros(1), np.zeros((0, count)), np.zeros((0, count), dtype=bool))
+        start = np.floor(times.min() / bin_s) * bin_s
+        bins = max(int(np.ceil((times.max() - start) / bin_s - 1e-9)), 1)
+        edges = start + np.arange(bins + 1) * bin_s
+        cumulative = _cumulative_at(flow, times, bits, count, edges)
+        born = np.full(count, np.inf)
+        died = np.full(count, -np.inf)
+        np.minimum.at(born, flow, times)
+        np.maximum.at(died, flow, times)
+        # only whole bins: a flow's partially covered first/last bin would look starved
+        active = (edges[:-1, None] >= born - 1e-9) & (edges[1:, None] <= died + 1e-9)
+        return cls(labels, edges, np.diff(cumulative, axis=0) / bin_s, active)
+
+    @classmethod
+    def from_intervals(
+        cls, intervals: Mapping[str, object], offsets: Optional[Mapping[str, float]] = None, bin_s: float = 1.0
+    ) -> "ThroughputMatrix":
+        """From iperf3 intervals (lists of dicts or IntervalTables) keyed by flow label.
+
+        offsets shift each flow's interval times (relative to its own start)
+        onto the common clock, e.g. its start delay or start.timestamp.
+        """
+        labels = list(intervals)
+        tables = [
+            table if isinstance(table, IntervalTable) else IntervalTable.from_intervals(list(table))
+            for table in intervals.values()
+        ]
+        offsets = offsets or {}
+        times, bits = [], []
+        for label, table in zip(labels, tables):
+            if not len(table):
+                times.append(np.empty(0))
+                bits.append(np.empty(0))
+                continue
+            offset = offsets.get(label, 0.0)
+            times.append(np.concatenate(([table.start[0]], table.end)) + offset)
+            sent = np.nan_to_num(table.bits_per_second) * (table.end - table.start)
+            bits.append(np.concatenate(([0.0], np.cumsum(sent))))
+        sizes = [len(part) for part in times]
+        return cls.from_points(
+            labels,
+            np.repeat(np.arange(len(labels)), sizes),
+            np.concatenate(times) if times else np.empty(0),
+            np.concatenate(bits) if bits else np.empty(0),
+            bin_s,
+        )
+
+    @classmethod
+    def from_samples(
+        cls, flows: Mapping[FlowKey, FlowSeries], bin_s: float = 1.0, counter: str = "bytes_acked"
+    ) -> "ThroughputMatrix":
+        """From a byte counter of cwnd samples (epoch times), one column per flow."""
+        keys = list(flows)
+        masks = [~np.isnan(flows[key].columns[counter]) for key in keys]
+        sizes = [int(mask.sum()) for mask in masks]
+        times = np.concatenate([flows[key].times[mask] for key, mask in zip(keys, masks)]) if keys else np.empty(0)
+        bits = (
+            np.concatenate([flows[key].columns[counter][mask] for key, mask in zip(keys, masks)]) * 8.0
+            if keys else np.empty(0)
+        )
+        labels = [flow_label(key) for key in keys]
+        return cls.from_points(labels, np.repeat(np.arange(len(keys)), sizes), times, bits, bin_s)
+
+    def windowed(self, window: int) -> "ThroughputMatrix":
+        """Sliding means over window bins; a flow counts as active only for the whole window."""
+        window = max(1, min(window, len(self.bps)))
+        sums = np.concatenate((np.zeros((1, self.bps.shape[1])), np.cumsum(self.bps, axis=0)))
+        alive = np.concatenate((np.zeros((1, self.bps.shape[1])), np.cumsum(self.active, axis=0)))
+        return ThroughputMatrix(
+            self.labels,
+            self.edges[window - 1:],
+            (sums[window:] - sums[:-window]) / window,
+            (alive[window:] - alive[:-window]) == window,
+        )
+
+    def jain(self) -> np.ndarray:
+        """Jain index per bin over its active flows; NaN with fewer than two."""
+        x = np.where(self.active, self.bps, 0.0)
+        n = self.active.sum(axis=1)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            index = x.sum(axis=1) ** 2 / (n * (x ** 2).sum(axis=1))
+        index[n < 2] = np.nan
+        return index
+
+    def fair_share(self, capacity_bps: Optional[float] = None) -> np.ndarray:
+        n = self.active.sum(axis=1)
+        total = capacity_bps if capacity_bps is not None else np.where(self.active, self.bps, 0.0).sum(axis=1)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return np.where(n > 0, total / n, np.nan)
+
+    def shares(self, capacity_bps: Optional[float] = None) -> np.ndarray:
+        """x / fair share per bin, NaN where the flow is inactive."""
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return np.where(self.active, self.bps / self.fair_share(capacity_bps)[:, None], np.nan)
+
+    def convergence(self, epsilon: float = 0.1, capacity_bps: Optional[float] = None) -> np.ndarray:
+        """Seconds from each flow's start until it stays within epsilon of the fair share; NaN if never."""
+        share = self.shares(capacity_bps)
+        ok = (np.abs(share - 1.0) <= epsilon) | ~self.active
+        settled = np.logical_and.accumulate(ok[::-1], axis=0)[::-1] & self.active
+        result = np.full(len(self.labels), np.nan)
+        converged = settled.any(axis=0) & self.active.any(axis=0)
+        first_settled = settled.argmax(axis=0)
+        born = self.active.argmax(axis=0)
+        result[converged] = (self.edges[first_settled] - self.edges[born])[converged]
+        return result
+
+
+def _nanpercentile(values: np.ndarray, q) -> np.ndarray:
+    """Per-column percentiles ignoring NaN; NaN for columns without values (e.g. flows never active)."""
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", RuntimeWarning)
+        return np.nanpercentile(values, q, axis=0)
+
+
+def _stats(values: np.ndarray, names: Sequence[str] = ("p50", "p95", "max")) -> Dict[str, Optional[float]]:
+    values = values[~np.isnan(values)]
+    out: Dict[str, Optional[float]] = {}
+    for name in names:
+        if not len(values):
+            out[name] = None
+        elif name == "max":
+            out[name] = round(float(values.max()), 4)
+        elif name == "min":
+            out[name] = round(float(values.min()), 4)
+        elif name == "mean":
+            out[name] = round(float(values.mean()), 4)
+        else:
+            out[name] = round(float(np.percentile(values, float(name[1:]))), 4)
+    return out
+
+
+def summarize(
+    matrix: ThroughputMatrix, window_s: float = 5.0, epsilon: float = 0.1, capacity_bps: Optional[float] = None
+) -> dict:
+    """JSON-ready windowed Jain, convergence and share statistics of matrix."""
+    window = max(1, int(round(window_s / matrix.bin_s))) if matrix.bin_s else 1
+    windowed = matrix.windowed(window)
+    convergence = windowed.convergence(epsilon, capacity_bps)  # per-bin noise would rarely stay within epsilon
+    shares = matrix.shares(capacity_bps)
+    with np.errstate(invalid="ignore"):
+        lifetime = np.where(matrix.active, matrix.bps, 0.0).sum(axis=0) / np.maximum(matrix.active.sum(axis=0), 1)
+    ever_active = matrix.active.any(axis=0)
+    overall = lifetime[ever_active]
+    median_share = _nanpercentile(shares[:, ever_active], 50.0) if len(shares) else np.empty(0)
+    result = {
+        "flows": len(matrix.labels),
+        "bin_s": matrix.bin_s,
+        "window_s": window * matrix.bin_s,
+        "epsilon": epsilon,
+        "jain_overall": (
+            round(float(overall.sum() ** 2 / (len(overall) * (overall ** 2).sum())), 4)
+            if len(overall) > 1 and (overall ** 2).sum() else None
+        ),
+        "jain_windowed": _stats(windowed.jain(), ("mean", "min", "p5", "p50")),
+        "converged_flows": int((~np.isnan(convergence)).sum()),
+        "convergence_s": _stats(convergence),
+        "median_share": _stats(median_share, ("min", "p5", "p50", "p95", "max")),
+    }
+    if len(matrix.labels) <= PER_FLOW_LIMIT:
+        quantiles = np.full((len(SHARE_QUANTILES), len(matrix.labels)), np.nan)
+        if len(shares):
+            quantiles = _nanpercentile(shares, SHARE_QUANTILES)
+        result["per_flow"] = {
+            label: {
+                "mean_bps": round(float(lifetime[idx]), 1),
+                "convergence_s": None if np.isnan(convergence[idx]) else round(float(convergence[idx]), 4),
+                "share": {
+                    f"p{q:g}": None if np.isnan(quantiles[col, idx]) else round(float(quantiles[col, idx]), 4)
+                    for col, q in enumerate(SHARE_QUANTILES)
+                },
+            }
+            for idx, label in enumerate(matrix.labels)
+        }
+    return result
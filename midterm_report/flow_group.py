@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+"""Launch planning for many iperf3 flows.
+
+run_scenarios.run_flows turns a ScenarioSpec into a list of IperfLaunch
+entries: every FlowSpec becomes one iperf3 client/server pair, and every
+FlowGroupSpec is split into clients carrying up to `streams_per_process`
+connections each (`iperf3 -P`), so 1000 connections cost a handful of
+processes rather than 2000. Each group's ports follow the ports already taken
+on its server hosts and are checked for clashes, and each (client host, cwnd
+log) gets one monitor covering a port range instead of one sampler per flow.
+Running the plan, including awaiting every process exit through pidfds on one
+asyncio loop, is orchestrator.py's job. Nothing here imports Mininet.
+"""
+
+from __future__ import annotations
+
+import resource
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from scenario_spec import ScenarioSpec
+
+IPERF_MAX_STREAMS = 128  # iperf3 rejects -P above this
+
+
+@dataclass(frozen=True)
+class IperfLaunch:
+    """One iperf3 client process (and its --one-off server)."""
+
+    label: str  # FlowSpec label, or "<group>_<index>" for group members
+    group: Optional[str]  # FlowGroupSpec label, None for a plain FlowSpec
+    client: str
+    server: str
+    port: int
+    streams: int
+    start: float  # seconds after the first launch
+    cwnd_log: str
+    congestion: Optional[str] = None  # iperf3 -C
+
+    @property
+    def client_log(self) -> str:
+        return f"{self.label}_client.json"
+
+    @property
+    def server_log(self) -> str:
+        return f"{self.label}_server.log"
+
+
+def plan_launches(spec: ScenarioSpec) -> List[IperfLaunch]:
+    """Expand the flows and flow groups of spec into iperf3 launches, by start time."""
+    launches = [
+        IperfLaunch(
+            label=flow.label,
+            group=None,
+            client=flow.client,
+            server=flow.server,
+            port=flow.port,
+            streams=1,
+            start=flow.start_delay,
+            cwnd_log=flow.cwnd_log,
+            congestion=flow.congestion,
+        )
+        for flow in spec.flows
+    ]
+    for group in spec.groups:
+        per_process = min(group.streams_per_process, IPERF_MAX_STREAMS)
+        # connections are dealt round-robin over the pairs; each pair's
+        # processes get consecutive ports so a host's monitor covers one range.
+        # The group's block starts past every port already taken on its servers.
+        servers = {server for _, server in group.pairs}
+        taken = [launch.port for launch in launches if launch.server in servers]
+        chunks: List[List[Tuple[str, str, int, int]]] = []
+        port = max([group.base_port, *(taken_port + 1 for taken_port in taken)])
+        for pair_index, (client, server) in enumerate(group.pairs):
+            count = group.count // len(group.pairs) + (pair_index < group.count % len(group.pairs))
+            pair_chunks = []
+            while count > 0:
+                streams = min(per_process, count)
+                pair_chunks.append((client, server, port, streams))
+                port += 1
+                count -= streams
+            chunks.append(pair_chunks)
+        # launch order interleaves the pairs so staggered starts ramp them evenly
+        order = [chunk for round_ in _zip_longest(chunks) for chunk in round_]
+        for index, (client, server, port, streams) in enumerate(order):
+            launches.append(
+                IperfLaunch(
+                    label=f"{group.label}_{index:04d}",
+                    group=group.label,
+                    client=client,
+                    server=server,
+                    port=port,
+                    streams=streams,
+                    start=group.start_delay + index * group.stagger,
+                    cwnd_log=group.cwnd_log(client),
+                    congestion=group.congestion,
+                )
+            )
+    _check_ports(launches)
+    return sorted(launches, key=lambda launch: launch.start)
+
+
+def _zip_longest(lists: List[list]) -> Iterable[list]:
+    for idx in range(max((len(items) for items in lists), default=0)):
+        yield [items[idx] for items in lists if idx < len(items)]
+
+
+def _check_ports(launches: List[IperfLaunch]) -> None:
+    owners: Dict[Tuple[str, int], str] = {}
+    for launch in launches:
+        owner = owners.setdefault((launch.server, launch.port), launch.label)
+        if owner != launch.label:
+            raise ValueError(f"{launch.label} and {owner} both use port {launch.port} on {launch.server}")
+
+
+def plan_monitors(launches: Iterable[IperfLaunch]) -> Dict[Tuple[str, str], Tuple[int, int]]:
+    """(client host, cwnd log) -> (first port, last port) for one shared monitor each."""
+    monitors: Dict[Tuple[str, str], Tuple[int, int]] = {}
+    for launch in launches:
+        key = (launch.client, launch.cwnd_log)
+        low, high = monitors.get(key, (launch.port, launch.port))
+        monitors[key] = (min(low, launch.port), max(high, launch.port))
+    return monitors
+
+
+def jain_index(throughputs):
+    """Jain's fairness index; a flow with no rate (0 or None) counts as 0.
+
+    None when there are fewer than 2 flows or none of them moved any data.
+    """
+    values = [tp or 0.0 for tp in throughputs]
+    total = sum(values)
+    if len(values) < 2 or not total:
+        return None
+    return total ** 2 / (len(values) * sum(tp ** 2 for tp in values))
+
+
+def raise_fd_limit() -> int:
+    """Lift the soft RLIMIT_NOFILE to the hard limit (inherited by Mininet hosts)."""
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    if hard == resource.RLIM_INFINITY or soft < hard:
+        target = hard if hard != resource.RLIM_INFINITY else max(soft, 1 << 20)
+        try:
+            resource.setrlimit(resource.RLIMIT_NOFILE, (target, hard))
+            soft = target
+        except (ValueError, OSError):
+            pass
+    return soft
@@ -0,0 +1,386 @@
+#!/usr/bin/env python3
+"""Fluid model of Reno flows sharing one drop-tail bottleneck, for pre-screening.
+
+Every Mininet data point costs a 60-90 s run. This module integrates a
+stochastic fluid model of the same ScenarioSpec instead: each flow's window
+grows by one segment per RTT (doubling per RTT below ssthresh), the bottleneck
+queue integrates the excess of the summed sending rate over the link rate, and
+loss events (random link loss, or overflow of a full queue) halve the window at
+most once per RTT, as Reno's fast recovery does. Flows and parameter points are
+both array axes, so thousands of points integrate in one Python loop.
+
+Topology mapping: the queue sits on the shared server's access link (capacity
+min(server bw, summed client bw), limit = that link's max_queue_size), the
+round-trip propagation delay of a flow is twice its two link delays (TCLink
+delays both directions), and data packets see the loss of both links.
+Retransmission timeouts, delayed ACKs and receive-window limits are ignored.
+
+Results mirror a real run: FluidResult.summary() has the run_spec summary.json
+shape and FluidResult.flows holds ss_parser.FlowSeries for the cwnd plots;
+write_logs() stores them as sock_diag logs that parse_cache reads like any
+monitor log.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+from flow_group import IperfLaunch, jain_index, plan_launches
+from scenario_spec import SCENARIO_SPECS, ScenarioSpec
+from sock_diag import DiagRecord, write_header
+from ss_parser import FIELDS, FlowSeries
+from sweep import load_sweep
+
+MSS_BYTES = 1448
+WIRE_BYTES = 1514  # MSS + TCP (with timestamps), IP and Ethernet headers
+INITIAL_CWND = 10.0
+MIN_CWND = 2.0
+DEFAULT_QUEUE = 1000  # netem's limit when max_queue_size is unset
+
+
+class ModelFlow:
+    """One modelled connection; group members are `<launch label>.<stream>`."""
+
+    __slots__ = ("label", "launch", "stream")
+
+    def __init__(self, label: str, launch: IperfLaunch, stream: int):
+        self.label = label
+        self.launch = launch
+        self.stream = stream
+
+    @property
+    def group(self) -> Optional[str]:
+        return self.launch.group
+
+    @property
+    def start(self) -> float:
+        return self.launch.start
+
+
+def model_flows(spec: ScenarioSpec) -> List[ModelFlow]:
+    flows = []
+    for launch in plan_launches(spec):
+        if launch.group is None:
+            flows.append(ModelFlow(launch.label, launch, 0))
+        else:
+            flows.extend(ModelFlow(f"{launch.label}.{stream}", launch, stream) for stream in range(launch.streams))
+    return flows
+
+
+def delay_seconds(delay: str) -> float:
+    value = delay.strip()
+    for suffix, scale in (("us", 1e-6), ("ms", 1e-3), ("s", 1.0)):
+        if value.endswith(suffix):
+            return float(value[: -len(suffix)]) * scale
+    return float(value) * 1e-6  # tc reads a bare number as microseconds
+
+
+class FluidResult:
+    """Model output for one ScenarioSpec (packet_sim.PacketSimResult reuses it)."""
+
+    MODEL = "fluid"
+
+    def __init__(
+        self,
+        spec: ScenarioSpec,
+        flows: List[ModelFlow],
+        times: np.ndarray,
+        delivered: np.ndarray,
+        losses: np.ndarray,
+        cwnd: Optional[np.ndarray],
+        ssthresh: Optional[np.ndarray],
+        rtt: Optional[np.ndarray],
+        queue: Optional[np.ndarray],
+        cong: str = "reno",
+    ):
+        self.spec = spec
+        self.cong = cong
+        self._flows = flows
+        self.times = times  # record times (s)
+        self.delivered = delivered  # (flows, records) cumulative bytes
+        self.losses = losses  # (flows,) lost (fluid) or retransmitted (packet) segments
+        self.cwnd = cwnd  # (flows, records) segments, None without series
+        self.ssthresh = ssthresh
+        self.rtt = rtt  # ms
+        self.queue = queue  # (records,) packets
+        self.mean_queue_delay_ms = 0.0
+
+    @property
+    def labels(self) -> List[str]:
+        return [flow.label for flow in self._flows]
+
+    @property
+    def flows(self) -> Dict[str, FlowSeries]:
+        """Per-flow cwnd/ssthresh/rtt samples while each flow was running."""
+        if self.cwnd is None:
+            return {}
+        series = {}
+        for idx, flow in enumerate(self._flows):
+            active = (self.times >= flow.start) & (self.times <= flow.start + self.spec.duration)
+            columns = {name: np.full(int(active.sum()), np.nan) for name in FIELDS}
+            columns["cwnd"] = self.cwnd[idx, active]
+            columns["ssthresh"] = self.ssthresh[idx, active]
+            columns["rtt"] = self.rtt[idx, active]
+            columns["bytes_sent"] = self.delivered[idx, active]
+            launch = flow.launch
+            key = (launch.client, 40000 + idx, launch.server, launch.port)
+            series[flow.label] = FlowSeries(key, self.times[active], columns)
+        return series
+
+    def _iperf(self, idx: int) -> dict:
+        flow = self._flows[idx]
+        edges = flow.start + np.arange(self.spec.duration + 1, dtype=np.float64)
+        cumulative = np.interp(edges, self.times, self.delivered[idx])
+        bits = np.diff(cumulative) * 8.0
+        intervals = [
+            {
+                "start": float(k),
+                "end": float(k + 1),
+                "bits_per_second": float(bits[k]),
+                "retransmits": None,
+            }
+            for k in range(self.spec.duration)
+        ]
+        total = float(cumulative[-1] - cumulative[0])
+        return {
+            "intervals": intervals,
+            "average_bps": total * 8.0 / self.spec.duration,
+            "bytes": total,
+            "seconds": float(self.spec.duration),
+            "retransmits": int(round(self.losses[idx])),
+        }
+
+    def summary(self) -> dict:
+        """Same layout as run_scenarios.run_spec, tagged with the model name."""
+        results = {}
+        groups: Dict[str, list] = {}
+        for idx, flow in enumerate(self._flows):
+            data = self._iperf(idx)
+            if flow.group is None:
+                results[flow.label] = data
+            else:
+                groups.setdefault(flow.group, []).append(
+                    {
+                        "client": flow.launch.client,
+                        "server": flow.launch.server,
+                        "port": flow.launch.port,
+                        "average_bps": data["average_bps"],
+                        "bytes": data["bytes"],
+                        "retransmits": data["retransmits"],
+                    }
+                )
+        for label, flows in groups.items():
+            rates = [flow["average_bps"] for flow in flows]
+            results[label] = {
+                "flows": flows,
+                "connections": len(flows),
+                "total_bps": sum(rate for rate in rates if rate),
+                "fairness_index": jain_index(rates),
+            }
+
+        summary = {"scenario": self.spec.name, "description": self.spec.description, "model": self.MODEL}
+        if len(results) == 1 and not self.spec.groups:
+            summary["iperf"] = next(iter(results.values()))
+        else:
+            summary["iperf"] = results
+            if len(self.spec.flows) > 1:
+                summary["fairness_index"] = jain_index(
+                    [results[flow.label]["average_bps"] for flow in self.spec.flows]
+                )
+        summary["mean_queue_delay_ms"] = self.mean_queue_delay_ms
+        return summary
+
+    def write_logs(self, directory: Path) -> None:
+        """Write summary.json plus each plain flow's cwnd log in sock_diag format."""
+        directory.mkdir(parents=True, exist_ok=True)
+        (directory / "summary.json").write_text(json.dumps(self.summary(), indent=2))
+        series = self.flows
+        for spec_flow in self.spec.flows:
+            flow = series.get(spec_flow.label)
+            if flow is None:
+                continue
+            table = np.column_stack([flow.columns[name] for name in FIELDS])
+            with (directory / spec_flow.cwnd_log).open("w") as fh:
+                write_header(fh)
+                for timestamp, values in zip(flow.times.tolist(), table.tolist()):
+                    fh.write(DiagRecord(flow.key, "ESTAB", self.cong, tuple(values)).as_line(timestamp))
+
+
+def _topology(spec: ScenarioSpec, flows: List[ModelFlow]):
+    """(capacity pkts/s, queue limit pkts, per-flow propagation RTT s, per-flow loss)."""
+    links = dict(spec.links)
+    servers = {flow.launch.server for flow in flows}
+    if len(servers) != 1:
+        raise ValueError(f"{spec.name}: the fluid model needs every flow to target one server")
+    server_link = links[servers.pop()]
+    client_links = [links[client] for client in sorted({flow.launch.client for flow in flows})]
+    client_bw = sum(link.bw for link in client_links)
+    bottleneck = server_link if server_link.bw <= client_bw else min(client_links, key=lambda link: link.bw)
+    capacity = min(server_link.bw, client_bw) * 1e6 / (8 * WIRE_BYTES)
+    limit = bottleneck.max_queue_size or DEFAULT_QUEUE
+    rtt = [2 * (delay_seconds(links[f.launch.client].delay) + delay_seconds(server_link.delay)) for f in flows]
+    loss = [1 - (1 - links[f.launch.client].loss / 100) * (1 - server_link.loss / 100) for f in flows]
+    return capacity, limit, rtt, loss
+
+
+def simulate(
+    specs: Sequence[ScenarioSpec],
+    dt: Optional[float] = None,
+    record_interval: float = 0.1,
+    series: bool = True,
+    seed: int = 0,
+) -> List[FluidResult]:
+    """Integrate every spec at once; rows are points, columns are flows (padded).
+
+    dt defaults to 1/16 of the shortest propagation RTT (0.2-5 ms). With
+    series=False only cumulative delivery is recorded, which is all summary()
+    needs, so very large grids stay small in memory.
+    """
+    flow_lists = [model_flows(spec) for spec in specs]
+    points = len(specs)
+    width = max((len(flows) for flows in flow_lists), default=0)
+    valid = np.zeros((points, width), dtype=bool)
+    start = np.zeros((points, width))
+    end = np.zeros((points, width))
+    rtt_prop = np.ones((points, width))
+    loss = np.zeros((points, width))
+    capacity = np.zeros(points)
+    limit = np.zeros(points)
+    for row, (spec, flows) in enumerate(zip(specs, flow_lists)):
+        capacity[row], limit[row], rtts, losses = _topology(spec, flows)
+        count = len(flows)
+        valid[row, :count] = True
+        start[row, :count] = [flow.start for flow in flows]
+        end[row, :count] = start[row, :count] + spec.duration
+        rtt_prop[row, :count] = rtts
+        loss[row, :count] = losses
+
+    if dt is None:
+        dt = float(np.clip(rtt_prop[valid].min() / 16 if valid.any() else 1e-3, 2e-4, 5e-3))
+    horizon = float(end.max()) if valid.any() else 0.0
+    steps = int(np.ceil(horizon / dt))
+    every = max(1, int(round(record_interval / dt)))
+    records = steps // every + 1
+
+    cwnd = np.full((points, width), INITIAL_CWND)
+    ssthresh = np.full((points, width), np.inf)
+    last_cut = np.full((points, width), -np.inf)
+    queue = np.zeros(points)
+    delivered = np.zeros((points, width))
+    lost = np.zeros((points, width))
+    queue_sum = np.zeros(points)
+    rng = np.random.default_rng(seed)
+
+    times = np.arange(records) * every * dt
+    delivered_rec = np.zeros((points, width, records))
+    if series:
+        cwnd_rec = np.zeros((points, width, records))
+        ssthresh_rec = np.zeros((points, width, records))
+        rtt_rec = np.zeros((points, width, records))
+        queue_rec = np.zeros((points, records))
+
+    for step in range(steps + 1):
+        t = step * dt
+        rtt = rtt_prop + (queue / capacity)[:, None]
+        if step % every == 0:
+            rec = step // every
+            delivered_rec[:, :, rec] = delivered
+            if series:
+                cwnd_rec[:, :, rec] = cwnd
+                ssthresh_rec[:, :, rec] = ssthresh
+                rtt_rec[:, :, rec] = rtt * 1e3
+                queue_rec[:, rec] = queue
+        if step == steps:
+            break
+
+        active = valid & (t >= start) & (t < end)
+        rate = np.where(active, cwnd / rtt, 0.0)  # packets/s put on the wire
+        arrivals = rate * (1.0 - loss)  # what survives random link loss
+        arriving = arrivals.sum(axis=1)
+        backlog = queue + (arriving - capacity) * dt
+        dropped = np.maximum(backlog - limit, 0.0)  # overflow of the full queue
+        queue = np.clip(backlog, 0.0, limit)
+        queue_sum += queue
+        served = np.where((queue > 0) | (arriving >= capacity), capacity, arriving)
+        share = np.divide(arrivals, arriving[:, None], out=np.zeros_like(arrivals), where=arriving[:, None] > 0)
+        delivered += share * (served * dt * MSS_BYTES)[:, None]
+
+        # expected lost segments this step, turned into Reno loss events
+        missing = rate * loss * dt + share * dropped[:, None]
+        lost += missing
+        event = (rng.random((points, width)) < -np.expm1(-missing)) & (t - last_cut >= rtt) & active
+        growth = np.where(cwnd < ssthresh, cwnd, 1.0) / rtt * dt
+        halved = np.maximum(cwnd / 2, MIN_CWND)
+        ssthresh = np.where(event, halved, ssthresh)
+        cwnd = np.where(event, halved, np.where(active, cwnd + growth, cwnd))
+        last_cut = np.where(event, t, last_cut)
+
+    results = []
+    for row, (spec, flows) in enumerate(zip(specs, flow_lists)):
+        count = len(flows)
+        results.append(FluidResult(
+            spec,
+            flows,
+            times,
+            delivered_rec[row, :count],
+            lost[row, :count],
+            cwnd_rec[row, :count] if series else None,
+            np.where(np.isinf(ssthresh_rec[row, :count]), np.nan, ssthresh_rec[row, :count]) if series else None,
+            rtt_rec[row, :count] if series else None,
+            queue_rec[row] if series else None,
+        ))
+        results[-1].mean_queue_delay_ms = float(queue_sum[row] / max(steps, 1) / capacity[row] * 1e3)
+    return results
+
+
+def _load_specs(target: str) -> List[ScenarioSpec]:
+    if target in SCENARIO_SPECS:
+        return [SCENARIO_SPECS[target]]
+    return load_sweep(Path(target))
+
+
+def _total_bps(summary: dict) -> float:
+    iperf = summary["iperf"]
+    if "average_bps" in iperf:
+        return iperf["average_bps"]
+    return sum(data.get("average_bps") or data.get("total_bps") or 0.0 for data in iperf.values())
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Pre-screen scenarios with the Reno fluid model.")
+    parser.add_argument("target", help="scenario name or sweep definition (JSON, as for sweep.py)")
+    parser.add_argument("--out", type=Path, help="write summary.json and cwnd logs per point under <out>/<hash>/")
+    parser.add_argument("--dt", type=float, help="integration step in seconds")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--top", type=int, help="only print the N points with the highest throughput")
+    args = parser.parse_args()
+
+    specs = _load_specs(args.target)
+    started = time.perf_counter()
+    results = simulate(specs, dt=args.dt, series=args.out is not None, seed=args.seed)
+    elapsed = time.perf_counter() - started
+
+    rows = []
+    for result in results:
+        summary = result.summary()
+        rows.append((_total_bps(summary) / 1e6, summary.get("fairness_index"), result))
+        if args.out is not None:
+            result.write_logs(args.out / result.spec.config_hash())
+    rows.sort(key=lambda row: row[0], reverse=True)
+    for mbps, fairness, result in rows[: args.top]:
+        fairness_text = "-" if fairness is None else f"{fairness:.3f}"
+        print(
+            f"{result.spec.config_hash()}  {mbps:8.2f} Mbps  Jain {fairness_text:>5}  "
+            f"queue {result.mean_queue_delay_ms:7.1f} ms  {result.spec.name}"
+        )
+    print(f"{len(specs)} points in {elapsed:.2f} s")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,191 +1,132 @@
 #!/usr/bin/env python3
-"""Generate plots and a summary table for TCP Reno baseline experiments."""
+"""Generate plots and a summary table for TCP Reno baseline experiments.
+
+Every figure is rendered in its own worker process (one per scenario, and one
+per flow group of each `--run` directory). Series are downsampled to the
+pixel width of their axes before plotting: cwnd keeps each pixel column's
+min and max so loss drops stay visible, and RTT and throughput use LTTB. Each
+figure's render time and point counts are printed as it completes.
+
+Scenario summaries come from the columnar results store (results_store.py),
+which loads one scenario's entry and maps only its interval columns.
+
+Only stale artifacts are rebuilt: build_graph.py compares the hashes of each
+one's inputs (summary entry, cwnd logs, scenario metadata, drawing and parsing
+code) with those recorded in `.build_manifest.json` at its last build.
+`--dry-run` lists what would be rebuilt and why; `--force` rebuilds all. The
+scenario metadata, targets and data directory are in artifacts.py, and
+matplotlib is imported by the workers that draw.
+`--trace DIR` records the phases of every worker (parsing, alignment, drawing,
+savefig) as a Chrome trace; `--profile` adds cProfile/tracemalloc to the
+analysis phases (tracing.py).
+"""
 
 from __future__ import annotations
 
+import argparse
 import json
-import math
-import re
-from collections import defaultdict
+import time
 from dataclasses import dataclass
 from pathlib import Path
-from typing import Dict, Iterable, List, Optional, Tuple
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+import artifacts
+import tracing
+from align import align_run
+from artifacts import BASE_DIR, RESULTS, SCENARIOS, ScenarioMeta
+from cc_events import flow_label, summarize as summarize_events
+from cwnd_series import CwndSeries
+from downsample import lttb, minmax, pixel_budget
+from iperf_stream import load_iperf_json
+from parse_cache import IntervalTable, ParseCache
+from ss_parser import select_primary_flow
+from tracing import profiled, span
+
+CACHE = ParseCache(BASE_DIR / ".cache")
+DPI = 150
+GROUP_POINTS = 20
+
+
+def pyplot():
+    """matplotlib.pyplot on the Agg backend, imported by the first figure a process draws."""
+    import matplotlib
+
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+
+    return plt
+
+
+def interval_series(intervals) -> Tuple[np.ndarray, np.ndarray]:
+    """Interval midpoints (s) and throughput (Mbps) from iperf3 intervals."""
+    if not isinstance(intervals, IntervalTable):
+        intervals = IntervalTable.from_intervals(list(intervals))
+    return 0.5 * (intervals.start + intervals.end), intervals.bits_per_second / 1e6
+
+
+def parse_cwnd_log(path: Path, iperf_log: Optional[Path] = None) -> CwndSeries:
+    """Primary flow of a cwnd log. With its iperf3 client log, times are on iperf3's clock
+    (seconds since the test start, as the throughput intervals); otherwise since the first sample."""
+    with profiled("analysis.parse_cwnd_log", log=path.name):
+        with span("parse.load_flows", log=path.name):
+            flows = CACHE.load_flows(path)
+        key = select_primary_flow(flows)
+        if key is None:
+            return CwndSeries.empty()
+        flow = flows[key]
+        has_cwnd = ~np.isnan(flow.columns["cwnd"])
+        if not has_cwnd.any():
+            return CwndSeries.empty(key)
+
+        origin = flow.times[has_cwnd][0]
+        if iperf_log is not None and iperf_log.exists():
+            with span("align", log=iperf_log.name):
+                aligned = align_run(load_iperf_json(iperf_log), {key: flow})
+            if key in aligned:
+                origin = aligned[key].anchor
+        return CwndSeries.from_flow(flow, origin)
 
-import matplotlib
 
-matplotlib.use("Agg")
-import matplotlib.pyplot as plt  # noqa: E402
+@dataclass
+class PointCount:
+    """Samples read versus points handed to matplotlib for one figure."""
 
-BASE_DIR = Path(__file__).resolve().parent
-SUMMARY_PATH = BASE_DIR / "summary.json"
+    raw: int = 0
+    drawn: int = 0
 
+    def plot(self, ax, x, y, method: str = "minmax", **kwargs) -> None:
+        x = np.asarray(x, dtype=np.float64)
+        y = np.asarray(y, dtype=np.float64)
+        budget = pixel_budget(ax, DPI)
+        dx, dy = minmax(x, y, budget) if method == "minmax" else lttb(x, y, 2 * budget)
+        self.raw += len(x)
+        self.drawn += len(dx)
+        ax.plot(dx, dy, **kwargs)
 
-@dataclass
-class ScenarioMeta:
-    key: str
-    title: str
-    topology: str
-    highlight: str
-    cwnd_logs: Dict[str, Path]
-    throughput_label: Dict[str, str]
-    palette: Dict[str, str]
-
-
-SCENARIOS: Dict[str, ScenarioMeta] = {
-    "scenario1_basic_aimd": ScenarioMeta(
-        key="scenario1_basic_aimd",
-        title="Scenario 1 – Slow Start & AIMD",
-        topology="h1—s1—h2 · bw=10 Mbps · delay=30 ms · queue=100",
-        highlight="Slow start 이후 선형 증가, 손실 시 cwnd 절반 감소",
-        cwnd_logs={"flow": BASE_DIR / "scenario1_basic_aimd" / "cwnd.log"},
-        throughput_label={"flow": "Throughput"},
-        palette={"flow": "tab:blue"},
-    ),
-    "scenario2_lossy_link": ScenarioMeta(
-        key="scenario2_lossy_link",
-        title="Scenario 2 – Random Loss Misinterpretation",
-        topology="h1—s1—h2 · bw=10 Mbps · delay=20 ms · loss=5%",
-        highlight="비혼잡 손실에도 Reno가 감속 → 평균 처리량 급락",
-        cwnd_logs={"flow": BASE_DIR / "scenario2_lossy_link" / "cwnd.log"},
-        throughput_label={"flow": "Throughput"},
-        palette={"flow": "tab:red"},
-    ),
-    "scenario3_high_bdp": ScenarioMeta(
-        key="scenario3_high_bdp",
-        title="Scenario 3 – High BDP Path",
-        topology="h1—s1—h2 · bw=100 Mbps · delay=150 ms · queue=2000",
-        highlight="RTT↑ 환경에서 선형 증가 속도가 느려 파이프 미충족",
-        cwnd_logs={"flow": BASE_DIR / "scenario3_high_bdp" / "cwnd.log"},
-        throughput_label={"flow": "Throughput"},
-        palette={"flow": "tab:green"},
-    ),
-    "scenario4_rtt_unfairness": ScenarioMeta(
-        key="scenario4_rtt_unfairness",
-        title="Scenario 4 – RTT Unfairness",
-        topology="h1/h3—s1—h2 · (h1:10 ms, h3:100 ms) · bw=20 Mbps",
-        highlight="짧은 RTT 흐름이 대역폭 대부분 획득, Jain 지수 0.93",
-        cwnd_logs={
-            "h1": BASE_DIR / "scenario4_rtt_unfairness" / "h1_cwnd.log",
-            "h3": BASE_DIR / "scenario4_rtt_unfairness" / "h3_cwnd.log",
-        },
-        throughput_label={"h1": "h1→h2", "h3": "h3→h2"},
-        palette={"h1": "tab:blue", "h3": "tab:orange"},
-    ),
-    "scenario5_bufferbloat": ScenarioMeta(
-        key="scenario5_bufferbloat",
-        title="Scenario 5 – Bufferbloat & Fast Recovery",
-        topology="h1—s1—h2 · bw=10 Mbps · delay=20 ms · queue=2000",
-        highlight="크게 부푼 큐로 RTT 급증, Fast Retransmit/Recovery 반복",
-        cwnd_logs={"flow": BASE_DIR / "scenario5_bufferbloat" / "cwnd.log"},
-        throughput_label={"flow": "Throughput"},
-        palette={"flow": "tab:purple"},
-    ),
-}
-
-
-class CwndSeries:
-    def __init__(self, times: List[float], cwnd: List[float], rtt: List[Tuple[float, float]]):
-        self.times = times
-        self.cwnd = cwnd
-        self.rtt = rtt  # list of (time, rtt_ms)
-
-
-def parse_summary() -> Dict[str, dict]:
-    data = json.loads(SUMMARY_PATH.read_text())
-    return {entry["scenario"]: entry for entry in data}
-
-
-def select_primary_port(entries: Dict[int, List[Tuple[float, float, Optional[float], Optional[int]]]]) -> int:
-    best_port = None
-    best_metric = -math.inf
-    for port, samples in entries.items():
-        last_bytes = next((value for *_rest, value in reversed(samples) if value is not None), 0)
-        if last_bytes > best_metric:
-            best_metric = last_bytes
-            best_port = port
-    if best_port is None:
-        # fall back to the port with the longest sample list
-        best_port = max(entries.keys(), key=lambda p: len(entries[p]))
-    return best_port
-
-
-def parse_cwnd_log(path: Path) -> CwndSeries:
-    if not path.exists():
-        return CwndSeries([], [], [])
-    entries: Dict[int, List[Tuple[float, float, Optional[float], Optional[int]]]] = defaultdict(list)
-    timestamp: Optional[float] = None
-    current_port: Optional[int] = None
-    number_re = re.compile(r"cwnd:(\d+\.?\d*)")
-    rtt_re = re.compile(r"rtt:(\d+\.?\d*)")
-    bytes_re = re.compile(r"bytes_sent:(\d+)")
-    port_re = re.compile(r"(\d+\.\d+\.\d+\.\d+):(\d+)\s+(\d+\.\d+\.\d+\.\d+):(\d+)")
-
-    with path.open() as fh:
-        for raw_line in fh:
-            line = raw_line.strip()
-            if not line:
-                continue
-            if line == "--":
-                current_port = None
-                continue
-            if line.replace(".", "").isdigit():
-                try:
-                    timestamp = float(line)
-                except ValueError:
-                    timestamp = None
-                continue
-            if line.startswith("ESTAB"):
-                match = port_re.search(line)
-                current_port = int(match.group(2)) if match else None
-                continue
-            if "cwnd:" in line and timestamp is not None and current_port is not None:
-                cwnd_match = number_re.search(line)
-                if not cwnd_match:
-                    continue
-                cwnd_value = float(cwnd_match.group(1))
-                rtt_match = rtt_re.search(line)
-                rtt_value = float(rtt_match.group(1)) if rtt_match else None
-                bytes_match = bytes_re.search(line)
-                bytes_value = int(bytes_match.group(1)) if bytes_match else None
-                entries[current_port].append((timestamp, cwnd_value, rtt_value, bytes_value))
-
-    if not entries:
-        return CwndSeries([], [], [])
-
-    port = select_primary_port(entries)
-    samples = entries[port]
-    if not samples:
-        return CwndSeries([], [], [])
-
-    base_time = samples[0][0]
-    times = [sample[0] - base_time for sample in samples]
-    cwnd = [sample[1] for sample in samples]
-    rtt = [(sample[0] - base_time, sample[2]) for sample in samples if sample[2] is not None]
-    return CwndSeries(times, cwnd, rtt)
-
-
-def plot_single_flow(meta: ScenarioMeta, summary: dict, scenario_dir: Path) -> Tuple[float, Optional[int]]:
-    intervals = summary["iperf"]["intervals"]
-    times = [0.5 * (iv["start"] + iv["end"]) for iv in intervals]
-    throughput = [iv["bits_per_second"] / 1e6 for iv in intervals]
-
-    cwnd_series = parse_cwnd_log(meta.cwnd_logs["flow"])
 
+def plot_single_flow(meta: ScenarioMeta, summary: dict, scenario_dir: Path) -> PointCount:
+    times, throughput = interval_series(summary["iperf"]["intervals"])
+
+    cwnd_series = parse_cwnd_log(meta.cwnd_logs["flow"], meta.iperf_logs["flow"])
+
+    plt = pyplot()
+    points = PointCount()
     fig, axes = plt.subplots(2, 1, sharex=True, figsize=(8, 6))
-    axes[0].plot(times, throughput, color=meta.palette["flow"], label="Throughput")
+    points.plot(axes[0], times, throughput, "lttb", color=meta.palette["flow"], label="Throughput")
     axes[0].set_ylabel("Throughput (Mbps)")
     axes[0].set_title(meta.title)
     axes[0].grid(True, linestyle=":", alpha=0.4)
 
-    axes[1].plot(cwnd_series.times, cwnd_series.cwnd, color="tab:orange", label="cwnd")
+    points.plot(axes[1], cwnd_series.times, cwnd_series.cwnd, color="tab:orange", label="cwnd")
     axes[1].set_ylabel("cwnd (packets)")
     axes[1].set_xlabel("Time (s)")
     axes[1].grid(True, linestyle=":", alpha=0.4)
 
-    if cwnd_series.rtt:
-        rtt_times, rtt_values = zip(*[(t, v) for t, v in cwnd_series.rtt if v is not None])
+    if cwnd_series.has_rtt():
         ax_rtt = axes[1].twinx()
-        ax_rtt.plot(rtt_times, rtt_values, color="tab:green", alpha=0.35, label="RTT (ms)")
+        points.plot(ax_rtt, cwnd_series.times, cwnd_series.rtt, "lttb", color="tab:green", alpha=0.35, label="RTT (ms)")
         ax_rtt.set_ylabel("RTT (ms)")
         ax_rtt.tick_params(axis="y", labelcolor="tab:green")
         lines, labels = axes[1].get_legend_handles_labels()
@@ -196,27 +137,28 @@ def plot_single_flow(meta: ScenarioMeta, summary: dict, scenario_dir: Path) -> T
 
     fig.tight_layout()
     output_path = scenario_dir / f"{meta.key}.png"
-    fig.savefig(output_path, dpi=150)
+    with span("render.savefig", output=output_path.name):
+        fig.savefig(output_path, dpi=DPI)
     plt.close(fig)
+    return points
+
 
+def single_flow_metrics(summary: dict) -> Tuple[float, Optional[int]]:
     avg_mbps = summary["iperf"].get("average_bps")
     retrans = summary["iperf"].get("retransmits")
     return (avg_mbps / 1e6 if avg_mbps else float("nan"), retrans)
 
 
-def plot_dual_flow(meta: ScenarioMeta, summary: dict, scenario_dir: Path) -> Tuple[Tuple[float, float], Optional[float]]:
+def plot_dual_flow(meta: ScenarioMeta, summary: dict, scenario_dir: Path) -> PointCount:
+    plt = pyplot()
+    points = PointCount()
     fig, axes = plt.subplots(2, 1, sharex=True, figsize=(8, 6))
 
-    avg_values = {}
     for flow in ("h1", "h3"):
         flow_summary = summary["iperf"][flow]
-        intervals = flow_summary.get("intervals", [])
-        times = [0.5 * (iv["start"] + iv["end"]) for iv in intervals]
-        throughput = [iv["bits_per_second"] / 1e6 for iv in intervals]
+        times, throughput = interval_series(flow_summary.get("intervals", []))
         label = meta.throughput_label[flow]
-        axes[0].plot(times, throughput, label=label, color=meta.palette[flow])
-        avg_bps = flow_summary.get("average_bps")
-        avg_values[flow] = avg_bps / 1e6 if avg_bps else float("nan")
+        points.plot(axes[0], times, throughput, "lttb", label=label, color=meta.palette[flow])
 
     axes[0].set_ylabel("Throughput (Mbps)")
     axes[0].set_title(meta.title)
@@ -224,8 +166,9 @@ def plot_dual_flow(meta: ScenarioMeta, summary: dict, scenario_dir: Path) -> Tup
     axes[0].grid(True, linestyle=":", alpha=0.4)
 
     for flow in ("h1", "h3"):
-        cwnd_series = parse_cwnd_log(meta.cwnd_logs[flow])
-        axes[1].plot(
+        cwnd_series = parse_cwnd_log(meta.cwnd_logs[flow], meta.iperf_logs[flow])
+        points.plot(
+            axes[1],
             cwnd_series.times,
             cwnd_series.cwnd,
             label=f"{flow} cwnd",
@@ -239,37 +182,144 @@ def plot_dual_flow(meta: ScenarioMeta, summary: dict, scenario_dir: Path) -> Tup
 
     fig.tight_layout()
     output_path = scenario_dir / f"{meta.key}.png"
-    fig.savefig(output_path, dpi=150)
+    with span("render.savefig", output=output_path.name):
+        fig.savefig(output_path, dpi=DPI)
     plt.close(fig)
+    return points
+
 
+def dual_flow_metrics(summary: dict) -> Tuple[Tuple[float, float], Optional[float]]:
+    avg_values = {}
+    for flow in ("h1", "h3"):
+        avg_bps = summary["iperf"][flow].get("average_bps")
+        avg_values[flow] = avg_bps / 1e6 if avg_bps else float("nan")
     fairness = summary.get("fairness_index")
     return (avg_values["h1"], avg_values["h3"]), fairness
 
 
-def main() -> None:
-    summary_by_key = parse_summary()
-    rows: List[str] = []
-    rows.append("| 시나리오 | 링크 조건 | 평균 처리량 (Mbps) | 관찰 포인트 |")
-    rows.append("| --- | --- | --- | --- |")
-
-    for key, meta in SCENARIOS.items():
-        scenario_dir = BASE_DIR / key
-        scenario_dir.mkdir(exist_ok=True)
-        summary = summary_by_key[key]
-
-        if key == "scenario4_rtt_unfairness":
-            (avg_h1, avg_h3), fairness = plot_dual_flow(meta, summary, BASE_DIR)
-            throughput_text = f"h1: {avg_h1:.2f} / h3: {avg_h3:.2f} (Jain {fairness:.2f})"
-        else:
-            avg_mbps, _ = plot_single_flow(meta, summary, BASE_DIR)
-            throughput_text = f"{avg_mbps:.2f}"
-
-        rows.append(
-            f"| {meta.title} | {meta.topology} | {throughput_text} | {meta.highlight} |"
-        )
+def plot_flow_group(summary: dict, group: str, log_dir: Path, output_path: Path) -> PointCount:
+    """Per-connection throughput (sorted) and every connection's cwnd for one flow group."""
+    from matplotlib.collections import LineCollection
+
+    plt = pyplot()
+    result = summary["iperf"][group]
+    rates = np.sort([flow["average_bps"] or 0.0 for flow in result["flows"]])[::-1] / 1e6
+    points = PointCount()
+    fig, axes = plt.subplots(2, 1, figsize=(8, 6))
+    points.plot(axes[0], np.arange(len(rates)), rates, "lttb", color="tab:blue")
+    fairness = result.get("fairness_index")
+    fairness_text = f", Jain {fairness:.3f}" if fairness is not None else ""
+    axes[0].set_title(
+        f"{summary['scenario']} – {group}: {result['connections']} connections, "
+        f"{result['total_bps'] / 1e6:.1f} Mbps total{fairness_text}"
+    )
+    axes[0].set_xlabel("Connection (by throughput)")
+    axes[0].set_ylabel("Throughput (Mbps)")
+    axes[0].grid(True, linestyle=":", alpha=0.4)
 
-    table_path = BASE_DIR / "metrics_table.md"
-    table_path.write_text("\n".join(rows) + "\n")
+    series = []
+    for log_path in sorted(log_dir.glob(f"{group}_*_cwnd.log")):
+        with span("parse.load_flows", log=log_path.name):
+            flows = CACHE.load_flows(log_path)
+        for flow in flows.values():
+            has_cwnd = ~np.isnan(flow.columns["cwnd"])
+            if has_cwnd.any():
+                series.append((flow.times[has_cwnd], flow.columns["cwnd"][has_cwnd]))
+    segments = []
+    if series:
+        # overlapping lines blur together, so the group shares GROUP_POINTS pixel widths of points
+        budget = pixel_budget(axes[1], DPI)
+        buckets = min(budget, max(GROUP_POINTS * budget // len(series), 16))
+        start = min(times[0] for times, _ in series)
+        for times, cwnd in series:
+            x, y = minmax(times - start, cwnd, buckets)
+            points.raw += len(times)
+            points.drawn += len(x)
+            segments.append(np.column_stack((x, y)))
+        # one collection instead of one Line2D per connection
+        axes[1].add_collection(LineCollection(segments, linewidths=0.4, alpha=max(0.02, min(0.5, 20 / len(segments)))))
+        axes[1].autoscale()
+    axes[1].set_xlabel("Time (s)")
+    axes[1].set_ylabel("cwnd (packets)")
+    axes[1].grid(True, linestyle=":", alpha=0.4)
+    fig.tight_layout()
+    with span("render.savefig", output=output_path.name):
+        fig.savefig(output_path, dpi=DPI)
+    plt.close(fig)
+    return points
+
+
+def render_scenario(key: str, out_dir: Path) -> Tuple[str, float, PointCount]:
+    start = time.perf_counter()
+    with span("render.scenario", scenario=key):
+        meta = SCENARIOS[key]
+        with span("results.load", scenario=key):
+            summary = RESULTS.load(key)
+        plot = plot_dual_flow if key == "scenario4_rtt_unfairness" else plot_single_flow
+        points = plot(meta, summary, out_dir)
+    return f"{key}.png", time.perf_counter() - start, points
+
+
+def render_group(summary_path: Path, group: str, log_dir: Path, output_path: Path) -> Tuple[str, float, PointCount]:
+    start = time.perf_counter()
+    with span("render.group", group=group):
+        summary = json.loads(summary_path.read_text())
+        points = plot_flow_group(summary, group, log_dir, output_path)
+    return output_path.name, time.perf_counter() - start, points
+
+
+def primary_events(log_path: Path) -> Optional[dict]:
+    """cc_events.summarize() entry of the log's primary flow."""
+    with profiled("analysis.cc_events", log=log_path.name):
+        flows = CACHE.load_flows(log_path)
+        key = select_primary_flow(flows)
+        return None if key is None else summarize_events({key: flows[key]})[flow_label(key)]
+
+
+def events_text(events: Optional[dict]) -> Tuple[str, str]:
+    """("MD / RTO", "p95 queueing delay") cells; "-" without samples."""
+    if events is None:
+        return "-", "-"
+    p95 = events["queue_delay_ms"]["p95"]
+    return f"{events['md_events']} / {events['rto_events']}", "-" if p95 is None else f"{p95:.0f}"
+
+
+def write_metrics_table(output_path: Path) -> Tuple[str, float, None]:
+    start = time.perf_counter()
+    with span("render.metrics_table"):
+        summary_by_key = {key: RESULTS.load(key, intervals=False) for key in SCENARIOS}
+        rows: List[str] = []
+        rows.append("| 시나리오 | 링크 조건 | 평균 처리량 (Mbps) | MD / RTO | 큐 지연 p95 (ms) | 관찰 포인트 |")
+        rows.append("| --- | --- | --- | --- | --- | --- |")
+        for key, meta in SCENARIOS.items():
+            summary = summary_by_key[key]
+            if key == "scenario4_rtt_unfairness":
+                (avg_h1, avg_h3), fairness = dual_flow_metrics(summary)
+                throughput_text = f"h1: {avg_h1:.2f} / h3: {avg_h3:.2f} (Jain {fairness:.2f})"
+            else:
+                avg_mbps, _ = single_flow_metrics(summary)
+                throughput_text = f"{avg_mbps:.2f}"
+            cells = {flow: events_text(primary_events(path)) for flow, path in meta.cwnd_logs.items()}
+            if len(cells) == 1:
+                event_cell, delay_cell = next(iter(cells.values()))
+            else:
+                event_cell = " · ".join(f"{flow}: {events}" for flow, (events, _) in cells.items())
+                delay_cell = " · ".join(f"{flow}: {delay}" for flow, (_, delay) in cells.items())
+            rows.append(
+                f"| {meta.title} | {meta.topology} | {throughput_text} | {event_cell} | {delay_cell} "
+                f"| {meta.highlight} |"
+            )
+        output_path.write_text("\n".join(rows) + "\n")
+    return output_path.name, time.perf_counter() - start, None
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    artifacts.add_arguments(parser)
+    tracing.add_arguments(parser)
+    args = parser.parse_args()
+    with tracing.session(args.trace, args.profile):
+        artifacts.build(args)
 
 
 if __name__ == "__main__":
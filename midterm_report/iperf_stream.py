@@ -0,0 +1,216 @@
+#!/usr/bin/env python3
+"""Incremental ingestion of iperf3 `--json-stream` logs with live per-flow metrics.
+
+With `--json-stream` (iperf3 >= 3.17) the client writes one JSON event per
+line: `start`, an `interval` every -i seconds, then `end` (or `error`).
+StreamTail follows such a log while the test runs, parsing only the bytes
+appended since the last poll. It keeps running aggregates per flow: bytes,
+current and mean throughput, retransmits, mean RTT and the largest cwnd.
+LiveMetrics holds the tails of one run, polls them from the orchestrator's
+loop and can serve `snapshot()` as JSON over HTTP on 127.0.0.1 for watching a
+run from outside. load_events rebuilds the `-J` document from a finished
+stream log, so load_iperf_json (used by run_scenarios' parsers) reads either
+format.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import functools
+import json
+import subprocess
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Any, Dict, Iterable, Optional
+
+EVENT_PREFIX = '{"event"'
+
+
+@functools.lru_cache(maxsize=None)
+def supports_json_stream(binary: str = "iperf3") -> bool:
+    """True if binary lists --json-stream in its help (added in iperf3 3.17)."""
+    try:
+        result = subprocess.run([binary, "--help"], capture_output=True, text=True, timeout=5)
+    except (OSError, subprocess.TimeoutExpired):
+        return False
+    return "--json-stream" in result.stdout + result.stderr
+
+
+def is_event_log(path: Path) -> bool:
+    with path.open() as fh:
+        return fh.read(len(EVENT_PREFIX)) == EVENT_PREFIX
+
+
+def load_events(path: Path) -> Dict[str, Any]:
+    """The `-J` style document ({"start", "intervals", "end"}) of a --json-stream log."""
+    doc: Dict[str, Any] = {"intervals": []}
+    with path.open() as fh:
+        for line in fh:
+            if not line.startswith(EVENT_PREFIX):
+                continue
+            try:
+                event = json.loads(line)
+            except ValueError:
+                continue  # truncated by a killed iperf3
+            kind = event.get("event")
+            if kind == "interval":
+                doc["intervals"].append(event["data"])
+            elif kind in ("start", "end", "error"):
+                doc[kind] = event["data"]
+    return doc
+
+
+def load_iperf_json(json_path: Path) -> Dict[str, Any]:
+    """The -J document of a client log in either format (the last one if --logfile was appended to)."""
+    if is_event_log(json_path):
+        return load_events(json_path)  # --json-stream output
+    raw = json_path.read_text().strip()
+    if "}\n{" in raw:
+        raw = "{" + raw.split("}\n{")[-1]
+    return json.loads(raw)
+
+
+@dataclass
+class FlowMetrics:
+    """Running aggregates of one iperf3 client log."""
+
+    label: str
+    streams: int = 0
+    intervals: int = 0
+    seconds: float = 0.0
+    bytes: int = 0
+    last_bps: Optional[float] = None
+    retransmits: int = 0
+    rtt_ms: Optional[float] = None  # mean over intervals of the streams' smoothed RTT
+    max_snd_cwnd: Optional[int] = None
+    done: bool = False
+    error: Optional[str] = None
+    average_bps: Optional[float] = None  # receiver-side figure from the end event
+    bad_lines: int = 0  # event lines that were not valid JSON, skipped
+
+    @property
+    def mean_bps(self) -> Optional[float]:
+        if self.average_bps is not None:
+            return self.average_bps
+        return self.bytes * 8 / self.seconds if self.seconds else None
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {**asdict(self), "mean_bps": self.mean_bps}
+
+
+class StreamTail:
+    """Follow one --json-stream log, folding new events into its FlowMetrics."""
+
+    def __init__(self, path: Path, label: str):
+        self.path = path
+        self.metrics = FlowMetrics(label)
+        self._offset = 0
+        self._partial = b""
+        self._rtt_samples = 0
+
+    def poll(self) -> int:
+        """Read what was appended since the last call; returns the number of events applied."""
+        try:
+            with self.path.open("rb") as fh:
+                fh.seek(self._offset)
+                data = fh.read()
+        except FileNotFoundError:
+            return 0
+        self._offset += len(data)
+        lines = (self._partial + data).split(b"\n")
+        self._partial = lines.pop()  # incomplete last line, kept for the next poll
+        applied = 0
+        for line in lines:
+            if not line.startswith(EVENT_PREFIX.encode()):
+                continue
+            try:
+                event = json.loads(line)
+            except ValueError:
+                # a killed iperf3 or a reused --logfile leaves garbled lines; keep tailing
+                self.metrics.bad_lines += 1
+                continue
+            self.apply(event)
+            applied += 1
+        return applied
+
+    def apply(self, event: Dict[str, Any]) -> None:
+        metrics = self.metrics
+        kind, data = event.get("event"), event.get("data")
+        if kind == "start":
+            metrics.streams = len(data.get("connected", []))
+        elif kind == "interval":
+            total = data.get("sum", {})
+            metrics.intervals += 1
+            metrics.seconds += total.get("seconds", 0.0)
+            metrics.bytes += total.get("bytes", 0)
+            metrics.last_bps = total.get("bits_per_second")
+            metrics.retransmits += total.get("retransmits", 0) or 0
+            rtts = [stream["rtt"] for stream in data.get("streams", []) if stream.get("rtt")]
+            if rtts:
+                rtt_ms = sum(rtts) / len(rtts) / 1000.0
+                self._rtt_samples += 1
+                previous = metrics.rtt_ms or 0.0
+                metrics.rtt_ms = previous + (rtt_ms - previous) / self._rtt_samples
+            cwnds = [stream["snd_cwnd"] for stream in data.get("streams", []) if stream.get("snd_cwnd")]
+            if cwnds:
+                metrics.max_snd_cwnd = max(cwnds + [metrics.max_snd_cwnd or 0])
+        elif kind == "end":
+            metrics.done = True
+            end_sum = data.get("sum_received") or data.get("sum_sent") or {}
+            metrics.average_bps = end_sum.get("bits_per_second")
+            sent = data.get("sum_sent", {})
+            if "retransmits" in sent:
+                metrics.retransmits = sent["retransmits"]
+        elif kind == "error":
+            metrics.done = True
+            metrics.error = str(data)
+
+
+class LiveMetrics:
+    """The StreamTails of one run, polled together."""
+
+    def __init__(self, tails: Iterable[StreamTail] = ()):
+        self.tails: Dict[str, StreamTail] = {tail.metrics.label: tail for tail in tails}
+
+    def add(self, path: Path, label: str) -> StreamTail:
+        tail = self.tails[label] = StreamTail(path, label)
+        return tail
+
+    def poll(self) -> int:
+        return sum(tail.poll() for tail in list(self.tails.values()))
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        """label -> FlowMetrics.as_dict(), safe to call from another thread."""
+        return {label: tail.metrics.as_dict() for label, tail in list(self.tails.items())}
+
+    async def follow(self, stop: asyncio.Event, interval: float = 0.5) -> None:
+        """Poll every interval until stop is set, then once more to catch the end events."""
+        while not stop.is_set():
+            self.poll()
+            try:
+                await asyncio.wait_for(stop.wait(), interval)
+            except asyncio.TimeoutError:
+                pass
+        self.poll()
+
+    async def serve(self, port: int, host: str = "127.0.0.1") -> asyncio.AbstractServer:
+        """Answer any HTTP GET with the current snapshot as JSON."""
+
+        async def handle(reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+            try:
+                while (await reader.readline()).strip():
+                    pass  # request line and headers are ignored
+                body = json.dumps(self.snapshot(), indent=2).encode()
+                writer.write(
+                    b"HTTP/1.1 200 OK\r\nContent-Type: application/json\r\n"
+                    + f"Content-Length: {len(body)}\r\nConnection: close\r\n\r\n".encode()
+                    + body
+                )
+                await writer.drain()
+            except ConnectionError:
+                pass
+            finally:
+                writer.close()
+
+        return await asyncio.start_server(handle, host, port)
+
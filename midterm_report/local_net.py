@@ -0,0 +1,308 @@
+#!/usr/bin/env python3
+"""Unprivileged stand-in for Mininet: shaped TCP relays over loopback.
+
+LocalNet offers the part of the Mininet API that run_scenarios uses (addHost,
+addSwitch, addLink with TCLink keywords, start/stop, host.popen/cmd/IP), so a
+ScenarioSpec runs unchanged with `run_spec(spec, backend="local")` as an
+ordinary user. Every host gets a public loopback address (IP()) and a private
+one. Starting an iperf3 server on a host binds it to the private address and
+opens a relay on the public address:port. The relay sends each byte through
+the client's uplink and then the server's downlink, and replies take the
+reverse path. Each link direction is an EmulatedLink with a
+token bucket at the TCLink rate, a drop-tail budget of max_queue_size packets
+(exceeding it stalls the sender, since a byte stream cannot drop), fixed delay,
+and random loss. A lost packet costs a retransmission and one extra round trip;
+no sender backs off, so loss trims throughput far less than under real TCP.
+The relay terminates TCP, so the end hosts' cwnd/ssthresh reflect the loopback
+hop rather than the emulated path; throughput, delay and queueing do follow
+the configured links.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import itertools
+import os
+import random
+import shlex
+import subprocess
+import threading
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from fluid_model import DEFAULT_QUEUE, MSS_BYTES, WIRE_BYTES, delay_seconds
+
+CHUNK_BYTES = 16 * MSS_BYTES  # relay read size; shaping and loss are per packet inside it
+CONNECT_TIMEOUT = 5.0  # the relay listens before the server behind it does
+
+_NET_IDS = itertools.count()
+
+
+class EmulatedLink:
+    """One direction of a TCLink, scheduled on a virtual clock (loop.time())."""
+
+    __slots__ = ("rate", "delay", "loss", "limit", "next_free", "drops")
+
+    def __init__(
+        self,
+        bw_mbps: Optional[float] = None,
+        delay: float = 0.0,
+        loss_percent: float = 0.0,
+        limit: Optional[int] = None,
+    ):
+        self.rate = float("inf") if not bw_mbps else bw_mbps * 1e6 / 8  # wire bytes/s
+        self.delay = delay
+        self.loss = loss_percent / 100.0
+        self.limit = (limit or DEFAULT_QUEUE) * WIRE_BYTES
+        self.next_free = 0.0
+        self.drops = 0
+
+    def backlog(self, now: float) -> float:
+        """Wire bytes queued or in service at now."""
+        if self.next_free <= now:
+            return 0.0
+        return (self.next_free - now) * self.rate
+
+    def transmit(self, now: float, wire: float, packets: int) -> Tuple[float, int]:
+        """Reserve the link for wire bytes arriving at now; (arrival at far end, packets lost)."""
+        start = max(now, self.next_free)
+        self.next_free = start + wire / self.rate
+        lost = sum(random.random() < self.loss for _ in range(packets)) if self.loss else 0
+        self.drops += lost
+        return self.next_free + self.delay, lost
+
+
+def _wire_bytes(size: int) -> Tuple[float, int]:
+    packets = -(-size // MSS_BYTES)
+    return size + packets * (WIRE_BYTES - MSS_BYTES), packets
+
+
+def _option(argv: Sequence[str], names: Sequence[str]) -> Optional[str]:
+    for idx, arg in enumerate(argv[:-1]):
+        if arg in names:
+            return argv[idx + 1]
+    return None
+
+
+class LocalSwitch:
+    def __init__(self, name: str):
+        self.name = name
+
+
+class LocalIntf:
+    """One end of a LocalLink; config() shapes traffic leaving through it, like TCIntf."""
+
+    def __init__(self, host: "LocalHost", direction: str):
+        self.host = host
+        self.direction = direction  # "up" (host -> switch) or "down"
+
+    def config(
+        self,
+        bw: Optional[float] = None,
+        delay: Optional[str] = None,
+        loss: float = 0.0,
+        max_queue_size: Optional[int] = None,
+        **_params,
+    ) -> None:
+        seconds = delay_seconds(delay) if delay else 0.0
+        setattr(self.host, self.direction, EmulatedLink(bw, seconds, loss or 0.0, max_queue_size))
+
+
+class LocalLink:
+    def __init__(self, host: "LocalHost"):
+        self.intf1 = LocalIntf(host, "up")
+        self.intf2 = LocalIntf(host, "down")
+
+
+class LocalHost:
+    """A Mininet-like host whose processes run directly on this machine."""
+
+    def __init__(self, net: "LocalNet", name: str, ip: str, private_ip: str):
+        self.net = net
+        self.name = name
+        self.ip = ip
+        self.private_ip = private_ip
+        self.up = EmulatedLink()  # host -> switch
+        self.down = EmulatedLink()  # switch -> host
+        self.processes: List[subprocess.Popen] = []
+
+    def IP(self) -> str:  # noqa: N802 (Mininet's name)
+        return self.ip
+
+    def popen(self, cmd, **kwargs) -> subprocess.Popen:
+        argv = shlex.split(cmd) if isinstance(cmd, str) else list(cmd)
+        argv = self._route(argv)
+        kwargs.setdefault("stdout", subprocess.PIPE)
+        kwargs.setdefault("stderr", subprocess.PIPE)
+        proc = subprocess.Popen(argv, **kwargs)
+        self.processes = [old for old in self.processes if old.poll() is None] + [proc]
+        return proc
+
+    def cmd(self, cmd: str) -> str:
+        return subprocess.run(cmd, shell=True, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True).stdout
+
+    def _route(self, argv: List[str]) -> List[str]:
+        """Pin iperf3 to this host's addresses so the relay sits on the path."""
+        if not argv or os.path.basename(argv[0]) != "iperf3":
+            return argv
+        if "-s" in argv or "--server" in argv:
+            self.net.expose(self, int(_option(argv, ("-p", "--port")) or 5201))
+            return argv + ["-B", self.private_ip]
+        if ("-c" in argv or "--client" in argv) and _option(argv, ("-B", "--bind")) is None:
+            return argv + ["-B", self.ip]
+        return argv
+
+
+class LocalNet:
+    """Star topologies of LocalHosts; accepts and ignores Mininet's constructor options."""
+
+    def __init__(self, **_options):
+        # a distinct 127.x.y.0/24 per net keeps parallel sweep workers apart
+        net_id = (os.getpid() * 64 + next(_NET_IDS)) % (250 * 250)
+        self.subnet = f"127.{net_id // 250 + 2}.{net_id % 250}"
+        self.hosts: List[LocalHost] = []
+        self.switches: List[LocalSwitch] = []
+        self._by_ip: Dict[str, LocalHost] = {}
+        self._servers: Dict[Tuple[str, int], asyncio.AbstractServer] = {}
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+
+    def addHost(self, name: str, **_params) -> LocalHost:  # noqa: N802
+        index = len(self.hosts) + 1
+        if index > 120:
+            raise ValueError("LocalNet supports at most 120 hosts")
+        host = LocalHost(self, name, f"{self.subnet}.{index}", f"{self.subnet}.{index + 128}")
+        self.hosts.append(host)
+        self._by_ip[host.ip] = host
+        return host
+
+    def addSwitch(self, name: str, **_params) -> LocalSwitch:  # noqa: N802
+        switch = LocalSwitch(name)
+        self.switches.append(switch)
+        return switch
+
+    def addLink(  # noqa: N802
+        self,
+        node1,
+        node2,
+        bw: Optional[float] = None,
+        delay: Optional[str] = None,
+        loss: float = 0.0,
+        max_queue_size: Optional[int] = None,
+        **_params,
+    ) -> LocalLink:
+        """Host-switch link with TCLink shaping, applied in both directions."""
+        host = node1 if isinstance(node1, LocalHost) else node2
+        if not isinstance(host, LocalHost) or isinstance(node1, LocalHost) == isinstance(node2, LocalHost):
+            raise ValueError("LocalNet links must join one host and one switch")
+        link = LocalLink(host)
+        for intf in (link.intf1, link.intf2):
+            intf.config(bw=bw, delay=delay, loss=loss, max_queue_size=max_queue_size)
+        return link
+
+    def start(self) -> None:
+        if self._loop is not None:
+            return
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, name="local-net", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        for host in self.hosts:
+            for proc in host.processes:
+                if proc.poll() is None:
+                    proc.terminate()
+                    proc.wait()
+        if self._loop is None:
+            return
+        asyncio.run_coroutine_threadsafe(self._close_servers(), self._loop).result()
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+        self._loop.close()
+        self._loop = None
+
+    def expose(self, host: LocalHost, port: int) -> None:
+        """Relay host.IP():port to the server on host.private_ip:port."""
+        if self._loop is None:
+            raise RuntimeError("LocalNet.start() must be called first")
+        if (host.ip, port) not in self._servers:
+            self._servers[(host.ip, port)] = asyncio.run_coroutine_threadsafe(
+                asyncio.start_server(
+                    lambda reader, writer: self._relay(host, port, reader, writer), host.ip, port
+                ),
+                self._loop,
+            ).result()
+
+    async def _close_servers(self) -> None:
+        for server in self._servers.values():
+            server.close()
+            await server.wait_closed()
+        self._servers.clear()
+        tasks = [task for task in asyncio.all_tasks() if task is not asyncio.current_task()]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def _relay(self, server: LocalHost, port: int, reader, writer) -> None:
+        client = self._by_ip.get(writer.get_extra_info("peername")[0])
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + CONNECT_TIMEOUT
+        while True:
+            try:
+                up_reader, up_writer = await asyncio.open_connection(server.private_ip, port)
+                break
+            except OSError:
+                if loop.time() > deadline:
+                    writer.close()
+                    return
+                await asyncio.sleep(0.02)
+        forward = [client.up, server.down] if client else [server.down]
+        backward = [server.up, client.down] if client else [server.up]
+        rtt = sum(link.delay for link in forward + backward)
+        try:
+            await asyncio.gather(
+                _pump(reader, up_writer, forward, rtt),
+                _pump(up_reader, writer, backward, rtt),
+            )
+        except (ConnectionError, OSError):
+            pass
+        finally:
+            writer.close()
+            up_writer.close()
+
+
+def _deliver(writer, data: bytes) -> None:
+    if not writer.is_closing():
+        writer.write(data)
+
+
+async def _pump(reader, writer, links: List[EmulatedLink], rtt: float) -> None:
+    """Copy reader to writer through links, keeping byte order."""
+    loop = asyncio.get_running_loop()
+    horizon = rtt + sum(link.limit / link.rate for link in links)
+    last = 0.0
+    while True:
+        data = await reader.read(CHUNK_BYTES)
+        if not data:
+            break
+        wire, packets = _wire_bytes(len(data))
+        now = loop.time()
+        # a full queue holds the sender back instead of dropping
+        wait = max((link.backlog(now) + wire - link.limit) / link.rate for link in links)
+        # and so does data still held back by retransmissions
+        wait = max(wait, last - now - horizon)
+        if wait > 0:
+            await asyncio.sleep(wait)
+            now = loop.time()
+        at, penalty = now, 0.0
+        for link in links:
+            arrival, lost = link.transmit(at, wire, packets)
+            while lost:  # resent packets use the link again and cost a round trip
+                _, lost = link.transmit(at, lost * WIRE_BYTES, lost)
+                penalty += rtt
+            at = arrival
+        last = max(last, at + penalty)
+        loop.call_at(last, _deliver, writer, data)
+        await writer.drain()
+    await asyncio.sleep(max(last - loop.time(), 0.0))
+    if writer.can_write_eof() and not writer.is_closing():
+        writer.write_eof()
@@ -0,0 +1,309 @@
+#!/usr/bin/env python3
+"""Event-driven execution of an iperf3 launch plan on one asyncio loop.
+
+run_scenarios.run_flows plans the launches (flow_group.plan_launches) and hands
+them to run_launches, which:
+
+- starts every --one-off server and waits until their ports are actually
+  listening (polled with `ss -Htln` every 20 ms) instead of sleeping;
+- starts each client at its scheduled offset and awaits all process exits
+  concurrently through pidfds registered with the loop; clients that exit
+  non-zero fail the run once everything is cleaned up;
+- tails the clients' `--json-stream` logs into an optional LiveMetrics
+  (iperf_stream.py), optionally served over HTTP while the run lasts;
+- runs the cwnd monitors alongside. The "ss" backend is a task sampling on a
+  fixed grid (start + k * interval, missed ticks skipped), so sample times do
+  not drift with the cost of each ss(8) call. "diag" is sock_diag.py in the
+  host, stopped with SIGTERM, and "probe" is a tcp_probe subscription.
+
+Hosts only need Mininet's popen() and IP(), so LocalNet hosts work too.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import os
+import signal
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import AsyncIterator, Dict, Iterable, List, Optional, Set
+
+import tcp_probe
+from flow_group import IperfLaunch, plan_monitors
+from iperf_stream import LiveMetrics, supports_json_stream
+from sample_store import SampleWriter
+from scenario_spec import ScenarioSpec
+from ss_parser import FIELDS, parse_ss_lines
+from tracing import span
+
+SOCK_DIAG = Path(__file__).resolve().parent / "sock_diag.py"
+READY_TIMEOUT = 5.0
+SERVER_EXIT_TIMEOUT = 5.0
+QUIET = {"stdout": subprocess.DEVNULL, "stderr": subprocess.DEVNULL}
+
+
+async def wait_exit(proc, timeout: Optional[float] = None) -> bool:
+    """Await proc's exit (pidfd readiness, 50 ms polling without pidfd); False on timeout."""
+    if proc.poll() is not None:
+        return True
+    loop = asyncio.get_running_loop()
+    try:
+        fd = os.pidfd_open(proc.pid)
+    except (AttributeError, OSError):
+        deadline = None if timeout is None else loop.time() + timeout
+        while proc.poll() is None:
+            if deadline is not None and loop.time() >= deadline:
+                return False
+            await asyncio.sleep(0.05)
+        return True
+    exited = loop.create_future()
+    loop.add_reader(fd, lambda: exited.done() or exited.set_result(None))
+    try:
+        await asyncio.wait_for(exited, timeout)
+    except asyncio.TimeoutError:
+        return False
+    finally:
+        loop.remove_reader(fd)
+        os.close(fd)
+    proc.wait()
+    return True
+
+
+async def host_output(host, argv: List[str]) -> str:
+    """Run argv in host and return its stdout, reading it as it arrives."""
+    proc = host.popen(argv, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
+    loop = asyncio.get_running_loop()
+    fd = proc.stdout.fileno()
+    os.set_blocking(fd, False)
+    chunks: List[bytes] = []
+    eof = loop.create_future()
+
+    def readable() -> None:
+        try:
+            chunk = os.read(fd, 1 << 16)
+        except BlockingIOError:
+            return
+        if chunk:
+            chunks.append(chunk)
+        elif not eof.done():
+            eof.set_result(None)
+
+    loop.add_reader(fd, readable)
+    try:
+        await eof
+    finally:
+        loop.remove_reader(fd)
+        proc.stdout.close()
+    await wait_exit(proc)
+    return b"".join(chunks).decode(errors="replace")
+
+
+async def wait_listening(
+    hosts, ports_by_host: Dict[str, Iterable[int]], timeout: float = READY_TIMEOUT
+) -> Dict[str, Set[int]]:
+    """Wait until every (host, port) has a listening TCP socket.
+
+    Returns the ports per host that were still not listening at the timeout,
+    so an empty dict means every server came up.
+    """
+    pending: Dict[str, Set[int]] = {name: set(ports) for name, ports in ports_by_host.items()}
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout
+
+    async def probe(name: str) -> None:
+        output = await host_output(hosts[name], ["ss", "-Htln"])
+        pending[name] -= {
+            int(line.split()[3].rpartition(":")[2]) for line in output.splitlines() if len(line.split()) > 3
+        }
+        if not pending[name]:
+            del pending[name]
+
+    while pending:
+        await asyncio.gather(*(probe(name) for name in list(pending)))
+        if not pending:
+            break
+        if loop.time() >= deadline:
+            return pending
+        await asyncio.sleep(0.02)
+    return pending
+
+
+async def ticks(interval: float, stop: asyncio.Event) -> AsyncIterator[float]:
+    """Yield wall-clock times on the grid start + k * interval until stop is set, then once more."""
+    loop = asyncio.get_running_loop()
+    start = loop.time()
+    tick = 0
+    while True:
+        yield time.time()
+        if stop.is_set():
+            return
+        tick += 1
+        delay = start + tick * interval - loop.time()
+        if delay < 0:
+            # fell behind; skip the missed ticks instead of bursting
+            tick += int(-delay // interval) + 1
+            delay = start + tick * interval - loop.time()
+        try:
+            await asyncio.wait_for(stop.wait(), max(delay, 0.0))
+        except asyncio.TimeoutError:
+            pass
+
+
+async def sample_ss(
+    host, log_path: Path, stop: asyncio.Event, interval: float, port: int, last_port: int, fmt: str = "text"
+) -> None:
+    """Log `ss -tin` for the port range as the text ss_parser reads, or parsed into a sample store."""
+    if last_port == port:
+        query = f"( dport = :{port} )"
+    else:
+        query = f"( dport >= :{port} and dport <= :{last_port} )"
+    if fmt == "bin":
+        with SampleWriter(log_path, source="ss") as writer:
+            async for timestamp in ticks(interval, stop):
+                output = await host_output(host, ["ss", "-tin", query])
+                for key, series in parse_ss_lines([f"{timestamp:.6f}", *output.splitlines(), "--"]).items():
+                    for idx in range(len(series)):
+                        writer.append(timestamp, key, "ESTAB", [series.columns[name][idx] for name in FIELDS])
+        return
+    with log_path.open("w") as log_file:
+        async for timestamp in ticks(interval, stop):
+            output = await host_output(host, ["ss", "-tin", query])
+            log_file.write(f"{timestamp:.6f}\n{output.strip()}\n--\n")
+            log_file.flush()
+
+
+class Monitor:
+    """cwnd/RTT sampler for flows towards port..last_port on one host."""
+
+    def __init__(
+        self, host, log_path: Path, interval: float, port: int, last_port: int, backend: str, fmt: str = "text"
+    ):
+        self.backend = backend
+        self.process = None
+        self.probe = None
+        self.task = None
+        self.stop_event = None
+        if self.backend == "probe":
+            self.probe = tcp_probe.subscribe(port, log_path, addrs=[host.IP()], last_port=last_port)
+        elif self.backend == "diag":
+            self.process = host.popen(
+                [sys.executable, str(SOCK_DIAG), "--out", str(log_path), "--interval", str(interval),
+                 "--dport", f"{port}-{last_port}", "--format", fmt],
+                **QUIET,
+            )
+        else:
+            self.stop_event = asyncio.Event()
+            self.task = asyncio.create_task(
+                sample_ss(host, log_path, self.stop_event, interval, port, last_port, fmt)
+            )
+
+    async def stop(self) -> None:
+        if self.probe is not None:
+            self.probe.close()
+        elif self.process is not None:
+            # SIGTERM makes sock_diag.py take one final sample and flush
+            self.process.send_signal(signal.SIGTERM)
+            await wait_exit(self.process)
+        else:
+            self.stop_event.set()
+            await self.task
+
+
+async def run_launches(
+    hosts,
+    spec: ScenarioSpec,
+    launches: List[IperfLaunch],
+    log_dir: Path,
+    monitor_backend: str,
+    live: Optional[LiveMetrics] = None,
+    metrics_port: Optional[int] = None,
+    monitor_format: str = "text",
+) -> None:
+    """Run the planned iperf3 servers, clients and monitors to completion.
+
+    monitor_format "bin" makes the ss and diag monitors write sample_store
+    files (tcp_probe logs stay text).
+    Client logs are followed into live (one entry per launch label) and, with
+    metrics_port, its snapshot is served on http://127.0.0.1:<metrics_port>/.
+    """
+    loop = asyncio.get_running_loop()
+    json_flags = ["-J", "--json-stream"] if supports_json_stream() else ["-J"]
+    monitors = [
+        Monitor(hosts[client], log_dir / log_name, spec.monitor.interval, low, high, monitor_backend, monitor_format)
+        for (client, log_name), (low, high) in plan_monitors(launches).items()
+    ]
+    servers = [
+        hosts[launch.server].popen(
+            ["iperf3", "-s", "--one-off", "--logfile", str(log_dir / launch.server_log), "-p", str(launch.port)],
+            **QUIET,
+        )
+        for launch in launches
+    ]
+    ports_by_host: Dict[str, Set[int]] = {}
+    for launch in launches:
+        ports_by_host.setdefault(launch.server, set()).add(launch.port)
+    with span("servers.wait_listening", servers=len(servers)):
+        missing = await wait_listening(hosts, ports_by_host)
+    if missing:
+        await asyncio.gather(*(monitor.stop() for monitor in monitors))
+        for server in servers:
+            if server.poll() is None:
+                server.terminate()
+                server.wait()
+        down = "; ".join(f"{name} port {', '.join(map(str, sorted(ports)))}" for name, ports in sorted(missing.items()))
+        raise RuntimeError(f"iperf3 servers not listening after {READY_TIMEOUT:.0f} s: {down}")
+
+    started = loop.time()
+
+    async def client(launch: IperfLaunch) -> int:
+        await asyncio.sleep(max(started + launch.start - loop.time(), 0.0))
+        argv = ["iperf3", "-c", hosts[launch.server].IP(), "-t", str(spec.duration), "-i", "1", *json_flags,
+                "-p", str(launch.port)]
+        if launch.streams > 1:
+            argv += ["-P", str(launch.streams)]
+        if launch.congestion is not None:
+            argv += ["-C", launch.congestion]
+        argv += ["--logfile", str(log_dir / launch.client_log)]
+        with span("iperf.client", lane=f"client {launch.label}", label=launch.label, streams=launch.streams):
+            proc = hosts[launch.client].popen(argv, **QUIET)
+            await wait_exit(proc)
+        return proc.returncode
+
+    stop_live = asyncio.Event()
+    follower = endpoint = None
+    if live is not None:
+        for launch in launches:
+            live.add(log_dir / launch.client_log, launch.label)
+        follower = asyncio.create_task(live.follow(stop_live))
+        if metrics_port is not None:
+            endpoint = await live.serve(metrics_port)
+
+    # a failing follower must neither skip the cleanup nor hide the clients' own error
+    follow_error: Optional[BaseException] = None
+    try:
+        statuses = await asyncio.gather(*(client(launch) for launch in launches))
+    finally:
+        stop_live.set()
+        if follower is not None:
+            (follow_error,) = await asyncio.gather(follower, return_exceptions=True)
+        try:
+            if endpoint is not None:
+                endpoint.close()
+                await endpoint.wait_closed()
+            with span("monitors.stop", backend=monitor_backend, monitors=len(monitors)):
+                await asyncio.gather(*(monitor.stop() for monitor in monitors))
+        finally:
+            # --one-off servers exit on their own once their client is done
+            with span("servers.exit"):
+                exited = await asyncio.gather(*(wait_exit(server, SERVER_EXIT_TIMEOUT) for server in servers))
+            for server, done in zip(servers, exited):
+                if not done:
+                    server.terminate()
+                    server.wait()
+    failed = [f"{launch.label} (exit {status})" for launch, status in zip(launches, statuses) if status != 0]
+    if failed:
+        raise RuntimeError(f"iperf3 clients failed: {', '.join(failed)}")
+    if follow_error is not None:
+        raise follow_error
@@ -0,0 +1,440 @@
+#!/usr/bin/env python3
+"""Packet-level discrete-event TCP simulator with pluggable congestion control.
+
+Meant for trying window-update policies (congestion_control.py) against the
+scenarios before writing them as a kernel module. Every ScenarioSpec link is a
+pair of Link objects, one per direction, like the two netem/tbf interfaces of
+a TCLink: a FIFO drop-tail queue (max_queue_size, default 1000) drained at bw,
+then the link delay, with random loss applied on enqueue. Data segments cross
+the client link and then the server link; ACKs are 66-byte packets whose
+serialization is ignored, so the return path is delay and loss only.
+
+Senders implement RFC 6298 RTO (200 ms floor, exponential backoff), RTT
+sampling from echoed send timestamps, and SACK-based loss recovery in the
+spirit of RFC 6675 (as Linux does for Reno): every ACK also names the segment
+that triggered it, three duplicate ACKs enter fast recovery, unSACKed
+segments below the highest SACK count as lost, and a pipe estimate decides
+when to retransmit holes or send new data. A timeout marks every outstanding
+unSACKed segment lost and repairs them in slow start. Receivers ACK every
+segment (no delayed ACK) and buffer out-of-order data.
+
+Events are plain tuples on one heapq, `(time, seq, kind, conn, a, b, c)`.
+Because data segments have one size, a link's backlog follows from its
+next-free time and needs no dequeue event, so a delivered segment costs three
+events (switch hop, receiver, ACK). Connections and links use __slots__;
+samples go into preallocated NumPy arrays. Results are
+fluid_model.FluidResult objects tagged "packet", with the same summary(),
+FlowSeries and write_logs().
+"""
+
+from __future__ import annotations
+
+import argparse
+import heapq
+import math
+import random
+import time
+from collections import deque
+from pathlib import Path
+from typing import List, Optional, Type, Union
+
+import numpy as np
+
+from congestion_control import CongestionControl, get_controller
+from fluid_model import MSS_BYTES, WIRE_BYTES, FluidResult, ModelFlow, delay_seconds, model_flows
+from scenario_spec import SCENARIO_SPECS, ScenarioSpec
+
+DEFAULT_QUEUE = 1000
+MIN_RTO = 0.2
+MAX_RTO = 120.0
+INITIAL_RTO = 1.0
+DUPACK_THRESHOLD = 3
+
+# event kinds
+EV_START = 0
+EV_HOP = 1  # data segment reaches the next link
+EV_DATA = 2  # data segment reaches the receiver
+EV_ACK = 3
+EV_RTO = 4
+EV_SAMPLE = 5
+
+
+class PacketSimResult(FluidResult):
+    MODEL = "packet"
+
+
+class Link:
+    """One direction of a TCLink: drop-tail FIFO at a fixed rate, then delay."""
+
+    __slots__ = ("tx_time", "delay", "loss", "limit", "next_free", "drops")
+
+    def __init__(self, bw_mbps: float, delay: float, loss_percent: float, limit: Optional[int]):
+        self.tx_time = WIRE_BYTES * 8 / (bw_mbps * 1e6)
+        self.delay = delay
+        self.loss = loss_percent / 100.0
+        self.limit = limit or DEFAULT_QUEUE
+        self.next_free = 0.0
+        self.drops = 0
+
+    def backlog(self, now: float) -> float:
+        """Packets queued or in service at now."""
+        return max(self.next_free - now, 0.0) / self.tx_time
+
+
+class Connection:
+    """Sender and receiver state of one TCP connection, in segments."""
+
+    __slots__ = (
+        "index", "cc", "path", "ack_delay", "ack_loss", "stop",
+        "cwnd", "ssthresh", "snd_una", "snd_nxt", "recover", "in_recovery", "after_rto", "dupacks",
+        "sacked", "high_sack", "retx", "retx_order", "lost_upto", "hole",
+        "srtt", "rttvar", "min_rtt", "rto", "rto_deadline", "rto_pending", "retransmits",
+        "rcv_nxt", "out_of_order",
+    )
+
+    def __init__(self, index: int, cc: CongestionControl, path: tuple, ack_delay: float, ack_loss: float, stop: float):
+        self.index = index
+        self.cc = cc
+        self.path = path  # links crossed by data segments, in order
+        self.ack_delay = ack_delay
+        self.ack_loss = ack_loss
+        self.stop = stop  # no new data after this time (iperf3 -t)
+        self.cwnd = 0.0
+        self.ssthresh = math.inf
+        self.snd_una = 0
+        self.snd_nxt = 0
+        self.recover = 0
+        self.in_recovery = False
+        self.after_rto = False
+        self.dupacks = 0
+        self.sacked: set = set()  # SACKed segments above snd_una
+        self.high_sack = -1
+        self.retx: set = set()  # retransmissions believed in flight
+        self.retx_order: deque = deque()  # (send time, seq) of retransmissions
+        self.lost_upto = 0  # in recovery, unSACKed segments below this are lost
+        self.hole = 0  # next candidate for retransmission
+        self.srtt: Optional[float] = None
+        self.rttvar = 0.0
+        self.min_rtt: Optional[float] = None
+        self.rto = INITIAL_RTO
+        self.rto_deadline = math.inf
+        self.rto_pending = False
+        self.retransmits = 0
+        self.rcv_nxt = 0
+        self.out_of_order: set = set()
+        cc.init(self)
+
+    @property
+    def flight(self) -> int:
+        return self.snd_nxt - self.snd_una
+
+    def forget_below(self, ack: int) -> None:
+        """Advance snd_una to ack and drop scoreboard entries it covers."""
+        for marks in (self.sacked, self.retx):
+            if not marks:
+                continue
+            if ack - self.snd_una < len(marks):
+                for seq in range(self.snd_una, ack):
+                    marks.discard(seq)
+            else:
+                marks.difference_update([seq for seq in marks if seq < ack])
+        self.snd_una = ack
+
+    def enter_recovery(self, lost_upto: int, after_rto: bool) -> None:
+        self.in_recovery = True
+        self.after_rto = after_rto
+        self.recover = self.snd_nxt
+        self.lost_upto = lost_upto
+        self.retx.clear()
+        self.retx_order.clear()
+        self.hole = self.snd_una
+        self.dupacks = 0
+
+    def detect_lost_retransmits(self, delivered_sent_at: float) -> None:
+        """A retransmission sent before a segment that has arrived was lost too.
+
+        The data path is FIFO, so this is RACK's rule without a reordering
+        window; the hole becomes eligible for another retransmission.
+        """
+        order = self.retx_order
+        while order and order[0][0] < delivered_sent_at:
+            _, seq = order.popleft()
+            if seq in self.retx and seq >= self.snd_una and seq not in self.sacked:
+                self.retx.discard(seq)
+                if seq < self.hole:
+                    self.hole = seq
+
+    def rtt_sample(self, rtt: float) -> None:
+        if self.srtt is None:
+            self.srtt = rtt
+            self.rttvar = rtt / 2
+        else:
+            self.rttvar = 0.75 * self.rttvar + 0.25 * abs(self.srtt - rtt)
+            self.srtt = 0.875 * self.srtt + 0.125 * rtt
+        if self.min_rtt is None or rtt < self.min_rtt:
+            self.min_rtt = rtt
+        self.rto = min(max(self.srtt + 4 * self.rttvar, MIN_RTO), MAX_RTO)
+
+
+def _build(spec: ScenarioSpec, flows: List[ModelFlow], controller: Type[CongestionControl]):
+    """One Connection per flow, and the links that carry data segments."""
+    up = {}
+    down = {}
+    for host, link in spec.links:
+        up[host] = Link(link.bw, delay_seconds(link.delay), link.loss, link.max_queue_size)
+        down[host] = Link(link.bw, delay_seconds(link.delay), link.loss, link.max_queue_size)
+    conns = []
+    for index, flow in enumerate(flows):
+        client, server = flow.launch.client, flow.launch.server
+        ack_links = (up[server], down[client])
+        conns.append(
+            Connection(
+                index,
+                controller(),
+                (up[client], down[server]),
+                sum(link.delay for link in ack_links),
+                1.0 - math.prod(1.0 - link.loss for link in ack_links),
+                flow.start + spec.duration,
+            )
+        )
+    data_links = list({id(link): link for conn in conns for link in conn.path}.values())
+    return conns, data_links
+
+
+def simulate(
+    spec: ScenarioSpec,
+    cc: Union[str, Type[CongestionControl]] = "reno",
+    record_interval: float = 0.1,
+    seed: int = 0,
+) -> PacketSimResult:
+    """Run spec once and return per-flow delivery, cwnd, ssthresh and RTT samples."""
+    controller = get_controller(cc) if isinstance(cc, str) else cc
+    flows = model_flows(spec)
+    conns, data_links = _build(spec, flows, controller)
+    horizon = max((conn.stop for conn in conns), default=0.0)
+    records = int(horizon / record_interval) + 1
+
+    times = np.arange(records) * record_interval
+    delivered = np.zeros((len(conns), records))
+    cwnd_rec = np.zeros((len(conns), records))
+    ssthresh_rec = np.zeros((len(conns), records))
+    rtt_rec = np.full((len(conns), records), np.nan)
+    queue_rec = np.zeros(records)
+    queue_delay = np.zeros(records)
+
+    heap: list = []
+    push = heapq.heappush
+    pop = heapq.heappop
+    rand = random.Random(seed).random
+    counter = 0
+
+    for conn, flow in zip(conns, flows):
+        counter += 1
+        push(heap, (flow.start, counter, EV_START, conn, 0, 0.0, 0))
+    counter += 1
+    push(heap, (0.0, counter, EV_SAMPLE, None, 0, 0.0, 0))
+
+    def transmit(conn: Connection, seq: int, now: float) -> None:
+        """Put one segment on the first link; schedules its arrival at the next hop."""
+        nonlocal counter
+        link = conn.path[0]
+        if link.loss and rand() < link.loss:
+            return
+        free = link.next_free
+        if free - now >= link.limit * link.tx_time:
+            link.drops += 1
+            return
+        free = (free if free > now else now) + link.tx_time
+        link.next_free = free
+        counter += 1
+        push(heap, (free + link.delay, counter, EV_HOP, conn, seq, now, 0))
+
+    def send_data(conn: Connection, now: float) -> None:
+        """Send what the window allows: holes first in recovery, then new data."""
+        nonlocal counter
+        if conn.in_recovery:
+            # pipe: segments above the lost range plus retransmissions in flight
+            pipe = conn.snd_nxt - conn.lost_upto + len(conn.retx)
+            sacked = conn.sacked
+            while pipe < conn.cwnd:
+                hole = conn.hole if conn.hole > conn.snd_una else conn.snd_una
+                while hole < conn.lost_upto and hole in sacked:
+                    hole += 1
+                if hole < conn.lost_upto:
+                    transmit(conn, hole, now)
+                    conn.retx.add(hole)
+                    conn.retx_order.append((now, hole))
+                    conn.retransmits += 1
+                    conn.hole = hole + 1
+                elif now < conn.stop:
+                    transmit(conn, conn.snd_nxt, now)
+                    conn.snd_nxt += 1
+                else:
+                    break
+                pipe += 1
+        elif now < conn.stop:
+            limit = conn.snd_una + int(conn.cwnd)
+            seq = conn.snd_nxt
+            while seq < limit:
+                transmit(conn, seq, now)
+                seq += 1
+            conn.snd_nxt = seq if seq > conn.snd_nxt else conn.snd_nxt
+        if conn.snd_una < conn.snd_nxt and not conn.rto_pending:
+            conn.rto_deadline = now + conn.rto
+            conn.rto_pending = True
+            counter += 1
+            push(heap, (conn.rto_deadline, counter, EV_RTO, conn, 0, 0.0, 0))
+
+    while heap:
+        now, _, kind, conn, a, b, c = pop(heap)
+        if now > horizon:
+            break
+
+        if kind == EV_HOP:
+            # segment a (sent at b) enters the server-side link
+            link = conn.path[1]
+            if link.loss and rand() < link.loss:
+                continue
+            free = link.next_free
+            if free - now >= link.limit * link.tx_time:
+                link.drops += 1
+                continue
+            free = (free if free > now else now) + link.tx_time
+            link.next_free = free
+            counter += 1
+            push(heap, (free + link.delay, counter, EV_DATA, conn, a, b, 0))
+
+        elif kind == EV_DATA:
+            rcv_nxt = conn.rcv_nxt
+            if a == rcv_nxt:
+                rcv_nxt += 1
+                pending = conn.out_of_order
+                if pending:
+                    while rcv_nxt in pending:
+                        pending.remove(rcv_nxt)
+                        rcv_nxt += 1
+                conn.rcv_nxt = rcv_nxt
+            elif a > rcv_nxt:
+                conn.out_of_order.add(a)
+            if conn.ack_loss and rand() < conn.ack_loss:
+                continue
+            # cumulative ACK, echoed timestamp, and the segment it answers (SACK)
+            counter += 1
+            push(heap, (now + conn.ack_delay, counter, EV_ACK, conn, rcv_nxt, b, a))
+
+        elif kind == EV_ACK:
+            ack = a
+            if c > ack and c >= conn.snd_una and c not in conn.sacked:
+                conn.sacked.add(c)
+                conn.retx.discard(c)
+                if c > conn.high_sack:
+                    conn.high_sack = c
+                if conn.in_recovery and c >= conn.lost_upto:
+                    conn.lost_upto = c + 1
+            if conn.retx_order:
+                conn.detect_lost_retransmits(b)
+            if ack > conn.snd_una:
+                acked = ack - conn.snd_una
+                conn.forget_below(ack)
+                conn.dupacks = 0
+                rtt = now - b
+                conn.rtt_sample(rtt)
+                if conn.snd_nxt < ack:
+                    conn.snd_nxt = ack
+                if conn.in_recovery and ack >= conn.recover:
+                    conn.in_recovery = False
+                    if not conn.after_rto:
+                        conn.cwnd = conn.ssthresh
+                elif not conn.in_recovery or conn.after_rto:
+                    # slow start continues while repairing after a timeout
+                    conn.cc.on_ack(conn, acked, rtt, now)
+                if conn.lost_upto < ack:
+                    conn.lost_upto = ack
+                conn.rto_deadline = now + conn.rto
+                send_data(conn, now)
+            elif ack == conn.snd_una and c > ack:
+                conn.dupacks += 1
+                if conn.in_recovery:
+                    send_data(conn, now)
+                elif conn.dupacks >= DUPACK_THRESHOLD and ack >= conn.recover:
+                    conn.cc.on_loss(conn, now)
+                    conn.enter_recovery(conn.high_sack + 1, after_rto=False)
+                    send_data(conn, now)
+
+        elif kind == EV_RTO:
+            conn.rto_pending = False
+            if conn.snd_una >= conn.snd_nxt:
+                continue
+            if now < conn.rto_deadline:
+                conn.rto_pending = True
+                counter += 1
+                push(heap, (conn.rto_deadline, counter, EV_RTO, conn, 0, 0.0, 0))
+                continue
+            conn.cc.on_rto(conn, now)
+            # everything outstanding and not SACKed counts as lost
+            conn.enter_recovery(conn.snd_nxt, after_rto=True)
+            conn.rto = min(conn.rto * 2, MAX_RTO)
+            send_data(conn, now)
+
+        elif kind == EV_SAMPLE:
+            rec = a
+            for conn in conns:
+                delivered[conn.index, rec] = conn.rcv_nxt * MSS_BYTES
+                cwnd_rec[conn.index, rec] = conn.cwnd
+                ssthresh_rec[conn.index, rec] = conn.ssthresh
+                if conn.srtt is not None:
+                    rtt_rec[conn.index, rec] = conn.srtt * 1e3
+            for link in data_links:
+                backlog = link.backlog(now)
+                queue_rec[rec] += backlog
+                queue_delay[rec] += backlog * link.tx_time
+            if rec + 1 < records:
+                counter += 1
+                push(heap, (times[rec + 1], counter, EV_SAMPLE, None, rec + 1, 0.0, 0))
+
+        else:  # EV_START
+            send_data(conn, now)
+
+    result = PacketSimResult(
+        spec,
+        flows,
+        times,
+        delivered,
+        np.array([conn.retransmits for conn in conns], dtype=np.float64),
+        cwnd_rec,
+        np.where(np.isinf(ssthresh_rec), np.nan, ssthresh_rec),
+        rtt_rec,
+        queue_rec,
+        cong=controller.name,
+    )
+    result.mean_queue_delay_ms = float(queue_delay.mean() * 1e3)
+    result.events = counter  # events scheduled, for benchmarks
+    return result
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Run a scenario in the packet-level TCP simulator.")
+    parser.add_argument("scenario", choices=sorted(SCENARIO_SPECS))
+    parser.add_argument("--cc", default="reno")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out", type=Path, help="write summary.json and cwnd logs here")
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    result = simulate(SCENARIO_SPECS[args.scenario], cc=args.cc, seed=args.seed)
+    elapsed = time.perf_counter() - started
+    summary = result.summary()
+    iperf = summary["iperf"]
+    per_flow = {"flow": iperf} if "average_bps" in iperf else iperf
+    for label, data in per_flow.items():
+        rate = data.get("average_bps") or data.get("total_bps") or 0.0
+        print(f"{label:>8}: {rate / 1e6:8.2f} Mbps  retransmits {data.get('retransmits', '-')}")
+    if summary.get("fairness_index") is not None:
+        print(f"Jain index {summary['fairness_index']:.3f}")
+    print(f"mean queueing delay {result.mean_queue_delay_ms:.1f} ms, simulated in {elapsed:.2f} s")
+    if args.out is not None:
+        result.write_logs(args.out)
+
+
+if __name__ == "__main__":
+    main()
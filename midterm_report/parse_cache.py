@@ -0,0 +1,259 @@
+#!/usr/bin/env python3
+"""On-disk columnar cache for parsed cwnd logs.
+
+Each cached log gets one entry directory holding a `meta.json` fingerprint
+(resolved path, size, mtime, and the version of the cache and of the parser
+that read the log) and one `.npy` file per column. Loads memory-map the
+`.npy` files, so per-flow arrays are zero-copy views into the page cache. An
+entry whose fingerprint no longer matches its log is rebuilt on the next
+load, and the least recently used entries are evicted once the store grows
+past `max_entries`. IntervalTable and split_intervals/attach_intervals are
+the columnar iperf3 intervals that results_store.py keeps.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import math
+import os
+import shutil
+import tempfile
+from pathlib import Path
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+import sample_store
+import sock_diag
+import tcp_probe
+from ss_parser import FIELDS, PARSER_VERSION, FlowKey, FlowSeries, parse_ss_log
+
+CACHE_VERSION = 1
+INTERVAL_FIELDS = ("start", "end", "bits_per_second", "retransmits")
+FlowLoader = Tuple[Callable[[Path], Dict[FlowKey, FlowSeries]], int]  # (parser, its PARSER_VERSION)
+# monitor logs that start with a magic line; anything else is an `ss -tin` dump
+FLOW_LOADERS: Dict[str, FlowLoader] = {
+    sample_store.LOG_MAGIC: (sample_store.parse_store, sample_store.PARSER_VERSION),
+    sock_diag.LOG_MAGIC: (sock_diag.parse_diag_log, sock_diag.PARSER_VERSION),
+    tcp_probe.LOG_MAGIC: (tcp_probe.parse_probe_log, tcp_probe.PARSER_VERSION),
+}
+SS_LOADER: FlowLoader = (parse_ss_log, PARSER_VERSION)
+
+
+class IntervalTable:
+    """Columnar iperf3 intervals; iterates as the original list of dicts."""
+
+    __slots__ = ("start", "end", "bits_per_second", "retransmits")
+
+    def __init__(self, start: np.ndarray, end: np.ndarray, bits_per_second: np.ndarray, retransmits: np.ndarray):
+        self.start = start
+        self.end = end
+        self.bits_per_second = bits_per_second
+        self.retransmits = retransmits  # NaN where iperf3 reported none
+
+    @classmethod
+    def from_intervals(cls, intervals: List[dict]) -> "IntervalTable":
+        def column(name: str) -> np.ndarray:
+            return np.array(
+                [np.nan if iv.get(name) is None else iv[name] for iv in intervals], dtype=np.float64
+            )
+
+        return cls(*(column(name) for name in INTERVAL_FIELDS))
+
+    def __len__(self) -> int:
+        return len(self.start)
+
+    def __iter__(self) -> Iterator[dict]:
+        for start, end, bps, retrans in zip(
+            self.start.tolist(), self.end.tolist(), self.bits_per_second.tolist(), self.retransmits.tolist()
+        ):
+            yield {
+                "start": start,
+                "end": end,
+                "bits_per_second": bps,
+                "retransmits": None if math.isnan(retrans) else int(retrans),
+            }
+
+
+def flow_loader(path: Path) -> FlowLoader:
+    """The parser for path's log format, chosen by its first line, and that parser's version."""
+    with path.open("rb") as fh:
+        magic = fh.readline(64).decode(errors="replace").rstrip("\n")  # binary-safe
+    return FLOW_LOADERS.get(magic, SS_LOADER)
+
+
+def parse_flow_log(path: Path) -> Dict[FlowKey, FlowSeries]:
+    return flow_loader(path)[0](path)
+
+
+class ParseCache:
+    def __init__(self, root: Path, max_entries: int = 256):
+        self.root = root
+        self.max_entries = max_entries
+
+    # -- entry bookkeeping -------------------------------------------------
+
+    def _entry_dir(self, source: Path, kind: str) -> Path:
+        digest = hashlib.sha1(f"{kind}:{source.resolve()}".encode()).hexdigest()[:20]
+        return self.root / digest
+
+    @staticmethod
+    def _fingerprint(source: Path, kind: str) -> dict:
+        stat = source.stat()
+        version = [CACHE_VERSION]
+        if kind == "ss":
+            version.append(flow_loader(source)[1])
+        return {
+            "kind": kind,
+            "source": str(source.resolve()),
+            "size": stat.st_size,
+            "mtime_ns": stat.st_mtime_ns,
+            "version": version,
+        }
+
+    def _lookup(self, source: Path, kind: str, fingerprint: dict) -> Optional[dict]:
+        entry = self._entry_dir(source, kind)
+        meta_path = entry / "meta.json"
+        try:
+            meta = json.loads(meta_path.read_text())
+        except (OSError, ValueError):
+            return None
+        if meta.get("fingerprint") != fingerprint:
+            shutil.rmtree(entry, ignore_errors=True)
+            return None
+        os.utime(meta_path)  # mark as recently used for eviction
+        return meta
+
+    def _store(self, source: Path, kind: str, meta: dict, arrays: Dict[str, np.ndarray], fingerprint: dict) -> None:
+        """Write an entry atomically; a read-only cache dir just disables caching.
+
+        fingerprint is the source's, taken before it was read. If the source
+        changed since (e.g. a monitor is still appending), nothing is stored.
+        """
+        if self._fingerprint(source, kind) != fingerprint:
+            return
+        entry = self._entry_dir(source, kind)
+        try:
+            self.root.mkdir(parents=True, exist_ok=True)
+            tmp = Path(tempfile.mkdtemp(dir=self.root, prefix=".tmp-"))
+        except OSError:
+            return
+        try:
+            for name, values in arrays.items():
+                np.save(tmp / f"{name}.npy", np.ascontiguousarray(values))
+            meta = dict(meta, fingerprint=fingerprint)
+            (tmp / "meta.json").write_text(json.dumps(meta))
+            if self._lookup(source, kind, fingerprint) is not None:
+                # another process (e.g. a parallel plot worker) stored it meanwhile; readers may be using it
+                shutil.rmtree(tmp, ignore_errors=True)
+                return
+            shutil.rmtree(entry, ignore_errors=True)
+            try:
+                os.replace(tmp, entry)
+            except OSError:
+                shutil.rmtree(tmp, ignore_errors=True)  # lost the race to another writer
+                return
+        except BaseException:
+            shutil.rmtree(tmp, ignore_errors=True)
+            raise
+        self.evict()
+
+    def _array(self, source: Path, kind: str, name: str) -> np.ndarray:
+        return np.load(self._entry_dir(source, kind) / f"{name}.npy", mmap_mode="r")
+
+    def evict(self) -> None:
+        """Drop entries whose source vanished, then the least recently used."""
+        if not self.root.exists():
+            return
+        entries = []
+        for entry in self.root.iterdir():
+            meta_path = entry / "meta.json"
+            try:
+                meta = json.loads(meta_path.read_text())
+                source = Path(meta["fingerprint"]["source"])
+                used = meta_path.stat().st_mtime
+            except (OSError, ValueError, KeyError):
+                if entry.name.startswith(".tmp-"):
+                    continue  # another writer in progress
+                shutil.rmtree(entry, ignore_errors=True)
+                continue
+            if not source.exists():
+                shutil.rmtree(entry, ignore_errors=True)
+                continue
+            entries.append((used, entry))
+        entries.sort()
+        for _, entry in entries[: max(0, len(entries) - self.max_entries)]:
+            shutil.rmtree(entry, ignore_errors=True)
+
+    # -- cwnd logs ---------------------------------------------------------
+
+    def load_flows(self, path: Path) -> Dict[FlowKey, FlowSeries]:
+        """Per-flow samples from an `ss -tin` dump, a sock_diag or tcp_probe log, or a sample store."""
+        if not path.exists():
+            return {}
+        fingerprint = self._fingerprint(path, "ss")
+        meta = self._lookup(path, "ss", fingerprint)
+        if meta is None:
+            flows = parse_flow_log(path)
+            self._store_ss_log(path, flows, fingerprint)
+            return flows
+
+        times = self._array(path, "ss", "times")
+        columns = {field: self._array(path, "ss", field) for field in FIELDS}
+        flows = {}
+        for *key, start, stop in meta["flows"]:
+            key = tuple(key)
+            flows[key] = FlowSeries(
+                key,
+                times[start:stop],
+                {field: values[start:stop] for field, values in columns.items()},
+            )
+        return flows
+
+    def _store_ss_log(self, path: Path, flows: Dict[FlowKey, FlowSeries], fingerprint: dict) -> None:
+        # rows are laid out flow by flow so every flow is one contiguous slice
+        index = []
+        offset = 0
+        for key, series in flows.items():
+            index.append([*key, offset, offset + len(series)])
+            offset += len(series)
+        series_list = list(flows.values())
+        arrays = {
+            "times": np.concatenate([s.times for s in series_list]) if series_list else np.empty(0),
+        }
+        for field in FIELDS:
+            arrays[field] = (
+                np.concatenate([s.columns[field] for s in series_list]) if series_list else np.empty(0)
+            )
+        self._store(path, "ss", {"flows": index}, arrays, fingerprint)
+
+
+def split_intervals(node, arrays: Dict[str, np.ndarray], trail: List[str]):
+    """Replace each `intervals` list with a column reference, filling arrays."""
+    if isinstance(node, list):
+        return [split_intervals(item, arrays, trail + [str(idx)]) for idx, item in enumerate(node)]
+    if not isinstance(node, dict):
+        return node
+    out = {}
+    for key, value in node.items():
+        if key == "intervals" and isinstance(value, list):
+            prefix = ".".join(trail + [key])
+            table = IntervalTable.from_intervals(value)
+            for field in INTERVAL_FIELDS:
+                arrays[f"{prefix}.{field}"] = getattr(table, field)
+            out[key] = {"$columns": prefix}
+        else:
+            out[key] = split_intervals(value, arrays, trail + [key])
+    return out
+
+
+def attach_intervals(node, load):
+    if isinstance(node, list):
+        return [attach_intervals(item, load) for item in node]
+    if not isinstance(node, dict):
+        return node
+    if set(node) == {"$columns"}:
+        prefix = node["$columns"]
+        return IntervalTable(*(load(f"{prefix}.{field}") for field in INTERVAL_FIELDS))
+    return {key: attach_intervals(value, load) for key, value in node.items()}
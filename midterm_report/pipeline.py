@@ -0,0 +1,224 @@
+#!/usr/bin/env python3
+"""One command for the whole experiment pipeline.
+
+    python3 pipeline.py [--data-dir DIR] COMMAND ...
+
+    run        run the baseline scenarios (run_scenarios.py; root for Mininet)
+    sweep      run a parameter sweep (sweep.py)
+    parse      parse cwnd and iperf3 logs and print their flows
+    summarize  print the stored scenario results
+    plot       rebuild the stale figures and metrics table (generate_visuals.py)
+    table      print metrics_table.md, rebuilding it first only if it is stale
+
+Every command imports its subsystem when it runs, so summarize and table on
+an up-to-date data directory load neither numpy nor matplotlib nor Mininet;
+benchmarks/bench_startup.py checks that they start in about 100 ms. run and
+sweep take exactly the options of the scripts they stand for (`run --help`).
+
+--data-dir (default $PIPELINE_DATA_DIR, else this directory) is where the
+scenario logs, summary.json, the results store, the caches and the sweep
+and comparison results live. It is passed on in the environment, so worker
+processes and the scripts themselves see the same directory.
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import sys
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+DATA_ENV = "PIPELINE_DATA_DIR"  # read by artifacts.py when it is imported
+SCRIPTS = {"run": "run_scenarios", "sweep": "sweep"}  # commands that hand their arguments to a script's main()
+
+
+def run_script(module: str, argv: List[str]) -> None:
+    """module.main() as if the script had been started with argv."""
+    import importlib
+
+    main = importlib.import_module(module).main
+    sys.argv = [str(Path(__file__).resolve().parent / f"{module}.py"), *argv]
+    main()
+
+
+def cmd_parse(args: argparse.Namespace) -> None:
+    import numpy as np
+
+    from artifacts import BASE_DIR
+    from cc_events import flow_label, summarize as summarize_events
+    from parse_cache import ParseCache
+    from run_scenarios import parse_iperf_json, parse_iperf_streams
+    from ss_parser import select_primary_flow
+
+    cache = ParseCache(BASE_DIR / ".cache")
+    for path in args.logs:
+        if path.suffix == ".json":
+            result = parse_iperf_json(path)
+            mbps = (result["average_bps"] or 0.0) / 1e6
+            retransmits = "-" if result["retransmits"] is None else result["retransmits"]
+            print(
+                f"{path}: iperf3, {len(parse_iperf_streams(path))} streams, {len(result['intervals'])} intervals, "
+                f"{mbps:.2f} Mbps, {retransmits} retransmits"
+            )
+            continue
+        flows = cache.load_flows(path)
+        samples = sum(len(flow.times) for flow in flows.values())
+        print(f"{path}: {len(flows)} flows, {samples} samples")
+        primary = select_primary_flow(flows)
+        events = summarize_events(flows) if args.events else {}
+        for key, flow in flows.items():
+            cwnd = flow.columns["cwnd"][~np.isnan(flow.columns["cwnd"])]
+            rtt = flow.columns["rtt"][~np.isnan(flow.columns["rtt"])]
+            line = (
+                f"{'*' if key == primary else ' '} {flow_label(key):45s} {len(flow.times):8d} samples "
+                f"{flow.times[-1] - flow.times[0] if len(flow.times) else 0.0:8.1f} s  "
+                f"cwnd max {cwnd.max() if len(cwnd) else float('nan'):7.0f}  "
+                f"rtt mean {rtt.mean() if len(rtt) else float('nan'):7.1f} ms"
+            )
+            if args.events:
+                entry = events[flow_label(key)]
+                line += f"  MD/RTO {entry['md_events']}/{entry['rto_events']}"
+            print(line)
+
+
+def _throughput(iperf: dict) -> str:
+    if "average_bps" in iperf:
+        return f"{(iperf['average_bps'] or 0.0) / 1e6:.2f}"
+    cells = []
+    for label, result in iperf.items():
+        if "connections" in result:
+            cells.append(f"{label}: {result['total_bps'] / 1e6:.2f} ({result['connections']} conns)")
+        else:
+            cells.append(f"{label}: {(result['average_bps'] or 0.0) / 1e6:.2f}")
+    return " / ".join(cells)
+
+
+def _retransmits(iperf: dict) -> str:
+    results = [iperf] if "average_bps" in iperf else list(iperf.values())
+    counts = [result.get("retransmits") for result in results]
+    return "-" if all(count is None for count in counts) else str(sum(count or 0 for count in counts))
+
+
+def _jain(entry: dict) -> str:
+    if entry.get("fairness_index") is not None:
+        return f"{entry['fairness_index']:.3f}"
+    groups = [result for result in entry["iperf"].values() if isinstance(result, dict) and "connections" in result]
+    values = [f"{group['fairness_index']:.3f}" for group in groups if group.get("fairness_index") is not None]
+    return " / ".join(values) or "-"
+
+
+def _events(entry: dict) -> str:
+    flows = [flow for log in entry.get("cc_events", {}).values() for flow in log.values()]
+    if not flows:
+        return "-"
+    return f"{sum(flow['md_events'] for flow in flows)} / {sum(flow['rto_events'] for flow in flows)}"
+
+
+def cmd_summarize(args: argparse.Namespace) -> None:
+    import json
+
+    from artifacts import RESULTS, SUMMARY_PATH
+
+    RESULTS.sync_json(SUMMARY_PATH)
+    scenarios = args.scenarios or RESULTS.scenarios()
+    unknown = sorted(set(scenarios) - set(RESULTS.scenarios()))
+    if unknown:
+        sys.exit(f"not in {RESULTS.root}: {', '.join(unknown)}")
+    entries = [RESULTS.load(scenario, intervals=False) for scenario in scenarios]
+    if args.json:
+        print(json.dumps(entries, indent=2))
+        return
+    print("| scenario | throughput (Mbps) | retransmits | Jain | MD / RTO |")
+    print("| --- | --- | --- | --- | --- |")
+    for entry in entries:
+        iperf = entry["iperf"]
+        cells = (entry["scenario"], _throughput(iperf), _retransmits(iperf), _jain(entry), _events(entry))
+        print(f"| {' | '.join(cells)} |")
+
+
+def cmd_plot(args: argparse.Namespace) -> None:
+    import artifacts
+    import tracing
+
+    with tracing.session(args.trace, args.profile, "plot"):
+        artifacts.build(args)
+
+
+def cmd_table(args: argparse.Namespace) -> None:
+    from artifacts import MANIFEST_PATH, RESULTS, SUMMARY_PATH, TABLE_PATH, add_table_target
+    from build_graph import BuildGraph
+
+    RESULTS.sync_json(SUMMARY_PATH)
+    graph = BuildGraph(MANIFEST_PATH)
+    add_table_target(graph)
+    for target, reasons in graph.stale(args.force):
+        print(f"rebuilding {graph.key(target.output)}: {', '.join(reasons)}", file=sys.stderr)
+        func, job_args = target.job
+        func(*job_args)
+        graph.record(target)
+        graph.save()
+    sys.stdout.write(TABLE_PATH.read_text())
+
+
+COMMANDS: Dict[str, Callable[[argparse.Namespace], None]] = {
+    "parse": cmd_parse,
+    "summarize": cmd_summarize,
+    "plot": cmd_plot,
+    "table": cmd_table,
+}
+
+
+def data_dir_option(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument(
+        "--data-dir", type=Path, metavar="DIR", help=f"data directory (default: ${DATA_ENV} or {Path(__file__).parent})"
+    )
+
+
+def build_parser() -> argparse.ArgumentParser:
+    """The full parser; imports artifacts, so the data directory must be settled first."""
+    import artifacts
+    import tracing
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    data_dir_option(parser)
+    sub = parser.add_subparsers(dest="command", required=True, metavar="COMMAND")
+    for name, module in SCRIPTS.items():
+        # no options of their own: --help and everything else goes to the script
+        sub.add_parser(name, add_help=False, help=f"{module}.py (same options)")
+
+    parse = sub.add_parser("parse", help="parse cwnd/ss/diag/probe/sample-store logs and iperf3 JSON")
+    parse.add_argument("logs", type=Path, nargs="+")
+    parse.add_argument("--events", action="store_true", help="also count cc_events MD/RTO per flow")
+
+    summarize = sub.add_parser("summarize", help="scenario results from the results store")
+    summarize.add_argument("scenarios", nargs="*", help="only these scenarios (default: all, in run order)")
+    summarize.add_argument("--json", action="store_true", help="print the entries (intervals as column references)")
+
+    plot = sub.add_parser("plot", help="rebuild stale figures and the metrics table")
+    artifacts.add_arguments(plot)
+    tracing.add_arguments(plot)
+
+    table = sub.add_parser("table", help="print metrics_table.md (rebuilt if stale)")
+    table.add_argument("--force", action="store_true", help="rebuild it even if it is up to date")
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    data = argparse.ArgumentParser(add_help=False)
+    data_dir_option(data)
+    known, _ = data.parse_known_args(argv)
+    if known.data_dir is not None:
+        os.environ[DATA_ENV] = str(known.data_dir.resolve())
+    parser = build_parser()
+    args, rest = parser.parse_known_args(argv)
+    if args.command in SCRIPTS:
+        run_script(SCRIPTS[args.command], rest)
+    elif rest:
+        parser.error(f"unrecognized arguments: {' '.join(rest)}")
+    else:
+        COMMANDS[args.command](args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,268 @@
+#!/usr/bin/env python3
+"""Columnar results store: one partition per scenario, intervals as .npy columns.
+
+summary.json keeps every scenario's full interval lists in one indented file,
+so reading one scenario parses all of them. The store splits each run_spec
+summary entry into:
+
+    results/
+      manifest.json                      order, digest and interval tables per scenario
+      <scenario>/<version>/meta.json     the entry with each `intervals` list
+                                         replaced by {"$columns": <table>}
+      <scenario>/<version>/<table>.<field>.npy
+
+Each flow's intervals are their own table (e.g. iperf.h1.intervals), so a
+loader touches only the scenario and columns it asks for. Columns are
+memory-mapped. A write puts a new version directory in place and then swaps
+the manifest, so readers never see a half-written partition.
+
+Reading the manifest and a scenario's meta.json (load(..., intervals=False))
+needs no numpy; the methods that write or map columns import it (and the
+writers shutil and tempfile), which keeps summaries quick to start.
+
+summary.json stays available as an export. The manifest remembers the
+digest of the JSON file it last exported or imported, so sync_json picks up
+hand edits (e.g. cc_events.py --annotate).
+
+    python3 results_store.py import summary.json results/
+    python3 results_store.py export results/ summary.json
+    python3 results_store.py info results/
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+from pathlib import Path
+from typing import TYPE_CHECKING, Dict, Iterable, List, Optional, Sequence
+
+from build_graph import MISSING, file_digest, value_digest
+
+if TYPE_CHECKING:
+    import numpy as np
+
+STORE_VERSION = 1
+
+
+def _export_value(value: float):
+    """JSON number as iperf3 wrote it: integral values without a fraction."""
+    return int(value) if isinstance(value, float) and value.is_integer() else value
+
+
+def _plain(node):
+    """node with every IntervalTable turned back into a list of dicts (interval lists are kept as they are)."""
+    from parse_cache import IntervalTable  # numpy; only writers and exports get here
+
+    if isinstance(node, IntervalTable):
+        return [{key: _export_value(value) for key, value in row.items()} for row in node]
+    if isinstance(node, list):
+        return [_plain(item) for item in node]
+    if isinstance(node, dict):
+        return {
+            key: value if key == "intervals" and isinstance(value, list) else _plain(value)
+            for key, value in node.items()
+        }
+    return node
+
+
+class ResultsStore:
+    def __init__(self, root: Path):
+        self.root = root
+        self._manifest: Optional[dict] = None
+
+    # -- manifest ----------------------------------------------------------
+
+    @property
+    def manifest(self) -> dict:
+        if self._manifest is None:
+            try:
+                self._manifest = json.loads((self.root / "manifest.json").read_text())
+            except (OSError, ValueError):
+                self._manifest = {"version": STORE_VERSION, "order": [], "scenarios": {}, "json_digest": None}
+        return self._manifest
+
+    def _save_manifest(self) -> None:
+        self.root.mkdir(parents=True, exist_ok=True)
+        tmp = self.root / "manifest.json.tmp"
+        tmp.write_text(json.dumps(self.manifest, indent=2))
+        os.replace(tmp, self.root / "manifest.json")
+
+    def scenarios(self) -> List[str]:
+        return list(self.manifest["order"])
+
+    def digest(self, scenario: str) -> Optional[str]:
+        """value_digest of the scenario's entry as written, or None."""
+        info = self.manifest["scenarios"].get(scenario)
+        return None if info is None else info["digest"]
+
+    def tables(self, scenario: str) -> Dict[str, int]:
+        """Interval tables of a scenario and their row counts."""
+        return dict(self.manifest["scenarios"][scenario]["tables"])
+
+    def _partition(self, scenario: str) -> Path:
+        return self.root / scenario / self.manifest["scenarios"][scenario]["version"]
+
+    # -- writing -----------------------------------------------------------
+
+    def _write_partition(self, scenario: str, version: str, entry: dict) -> Dict[str, int]:
+        import shutil
+        import tempfile
+
+        import numpy as np
+        from parse_cache import INTERVAL_FIELDS, split_intervals
+
+        arrays: Dict[str, np.ndarray] = {}
+        skeleton = split_intervals(_plain(entry), arrays, [])
+        target = self.root / scenario / version
+        if not (target / "meta.json").exists():
+            target.parent.mkdir(parents=True, exist_ok=True)
+            tmp = Path(tempfile.mkdtemp(dir=target.parent, prefix=".tmp-"))
+            try:
+                for name, values in arrays.items():
+                    np.save(tmp / f"{name}.npy", np.ascontiguousarray(values))
+                (tmp / "meta.json").write_text(json.dumps(skeleton))
+                shutil.rmtree(target, ignore_errors=True)
+                os.replace(tmp, target)
+            except BaseException:
+                shutil.rmtree(tmp, ignore_errors=True)
+                raise
+        suffix = "." + INTERVAL_FIELDS[0]
+        return {name[: -len(suffix)]: len(values) for name, values in arrays.items() if name.endswith(suffix)}
+
+    def put_many(self, entries: Iterable[dict]) -> List[str]:
+        """Store run_spec summary entries, replacing same-named scenarios and keeping the order of the rest.
+
+        Returns the scenarios whose entry changed; unchanged entries are not rewritten.
+        """
+        changed = []
+        stale = []
+        for entry in entries:
+            scenario = entry["scenario"]
+            digest = value_digest(_plain(entry))
+            if self.digest(scenario) == digest:
+                continue
+            old = self.manifest["scenarios"].get(scenario)
+            version = digest[:16]
+            tables = self._write_partition(scenario, version, entry)
+            self.manifest["scenarios"][scenario] = {"version": version, "digest": digest, "tables": tables}
+            if old is None:
+                self.manifest["order"].append(scenario)
+            elif old["version"] != version:
+                stale.append(self.root / scenario / old["version"])
+            changed.append(scenario)
+        if changed:
+            import shutil
+
+            self._save_manifest()
+            for path in stale:
+                shutil.rmtree(path, ignore_errors=True)  # readers that mapped it keep their pages
+        return changed
+
+    def put(self, entry: dict) -> bool:
+        return bool(self.put_many([entry]))
+
+    # -- reading -----------------------------------------------------------
+
+    def load(self, scenario: str, intervals: bool = True) -> dict:
+        """One scenario's entry; its intervals as memory-mapped IntervalTables.
+
+        With intervals=False no column file is opened and each `intervals`
+        stays a {"$columns": <table>} reference for columns().
+        """
+        partition = self._partition(scenario)
+        skeleton = json.loads((partition / "meta.json").read_text())
+        if not intervals:
+            return skeleton
+        import numpy as np
+        from parse_cache import attach_intervals
+
+        return attach_intervals(skeleton, lambda name: np.load(partition / f"{name}.npy", mmap_mode="r"))
+
+    def columns(
+        self, scenario: str, table: str = "iperf.intervals", fields: Optional[Sequence[str]] = None
+    ) -> Dict[str, np.ndarray]:
+        """Only the requested interval columns (default: all) of one table, memory-mapped."""
+        import numpy as np
+        from parse_cache import INTERVAL_FIELDS
+
+        if table not in self.manifest["scenarios"][scenario]["tables"]:
+            raise KeyError(f"{scenario} has no interval table {table!r}")
+        partition = self._partition(scenario)
+        return {
+            field: np.load(partition / f"{table}.{field}.npy", mmap_mode="r") for field in fields or INTERVAL_FIELDS
+        }
+
+    def load_all(self, intervals: bool = True) -> List[dict]:
+        return [self.load(scenario, intervals) for scenario in self.scenarios()]
+
+    # -- JSON interchange --------------------------------------------------
+
+    def export_json(self, path: Path, scenarios: Optional[Sequence[str]] = None) -> None:
+        """Write the summary.json list (every scenario, or just these) as run_scenarios used to."""
+        entries = [_plain(self.load(scenario)) for scenario in (scenarios or self.scenarios())]
+        tmp = path.with_name(path.name + ".tmp")
+        tmp.write_text(json.dumps(entries if scenarios is None or len(entries) != 1 else entries[0], indent=2))
+        os.replace(tmp, path)
+        if scenarios is None:
+            self.manifest["json_digest"] = file_digest(path)
+            self._save_manifest()
+
+    def import_json(self, path: Path) -> List[str]:
+        entries = json.loads(path.read_text())
+        changed = self.put_many(entries if isinstance(entries, list) else [entries])
+        self.manifest["json_digest"] = file_digest(path)
+        self._save_manifest()
+        return changed
+
+    def pending_json(self, path: Path) -> Dict[str, str]:
+        """Scenario -> entry digest for what sync_json(path) would import; writes nothing."""
+        if file_digest(path) in (MISSING, self.manifest.get("json_digest")):
+            return {}
+        entries = json.loads(path.read_text())
+        pending = {}
+        for entry in entries if isinstance(entries, list) else [entries]:
+            digest = value_digest(_plain(entry))
+            if self.digest(entry["scenario"]) != digest:
+                pending[entry["scenario"]] = digest
+        return pending
+
+    def sync_json(self, path: Path) -> List[str]:
+        """Import path if it changed since the store last exported or imported it."""
+        digest = file_digest(path)
+        if digest == MISSING or digest == self.manifest.get("json_digest"):
+            return []
+        return self.import_json(path)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Import, export and inspect the columnar results store.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    imp = sub.add_parser("import", help="summary.json -> store")
+    imp.add_argument("json", type=Path)
+    imp.add_argument("store", type=Path)
+    exp = sub.add_parser("export", help="store -> summary.json")
+    exp.add_argument("store", type=Path)
+    exp.add_argument("json", type=Path)
+    exp.add_argument("--scenario", action="append", help="export only this scenario (one object if given once)")
+    info = sub.add_parser("info", help="scenarios, interval tables and sizes")
+    info.add_argument("store", type=Path)
+    args = parser.parse_args()
+
+    if args.command == "import":
+        changed = ResultsStore(args.store).import_json(args.json)
+        print(f"{args.json} -> {args.store}: {', '.join(changed) or 'unchanged'}")
+    elif args.command == "export":
+        ResultsStore(args.store).export_json(args.json, args.scenario)
+        print(f"{args.store} -> {args.json} ({args.json.stat().st_size} B)")
+    else:
+        store = ResultsStore(args.store)
+        for scenario in store.scenarios():
+            partition = store._partition(scenario)
+            size = sum(path.stat().st_size for path in partition.iterdir())
+            tables = ", ".join(f"{table} ({rows})" for table, rows in store.tables(scenario).items())
+            print(f"{scenario}: {size} B, {tables or 'no intervals'}")
+
+
+if __name__ == "__main__":
+    main()
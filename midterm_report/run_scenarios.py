@@ -3,20 +3,44 @@
 Automates baseline TCP Reno experiments for five scenarios described in the
 assignment. Each scenario spins up a dedicated Mininet topology, runs iperf3
 flows, samples congestion window statistics via ss(8), and stores raw logs plus
-summary metrics under experiments/1029/.
+summary metrics in the data directory (artifacts.BASE_DIR: $PIPELINE_DATA_DIR or
+this directory; a results_store partition per scenario, exported as
+summary.json). With `--backend local` the same scenarios run
+without root on local_net's loopback link emulator. `--trace DIR` records
+where the time goes (topology setup, iperf3, teardown, parsing, analysis) as
+a Chrome trace; see tracing.py.
 """
 
+import argparse
+import asyncio
 import json
-import threading
-import time
-from contextlib import contextmanager
+from contextlib import contextmanager, nullcontext
 from pathlib import Path
 
-from mininet.link import TCLink
-from mininet.log import setLogLevel
-from mininet.net import Mininet
-
-BASE_DIR = Path("/home/gty/Computer-Networks_SWE3022_42/experiments/1029")
+import tracing
+from artifacts import BASE_DIR
+from cc_events import summarize_logs
+from fairness import ThroughputMatrix, summarize as summarize_fairness
+from flow_group import jain_index, plan_launches, raise_fd_limit
+from iperf_stream import LiveMetrics, load_iperf_json
+from orchestrator import run_launches
+from parse_cache import parse_flow_log
+from results_store import ResultsStore
+from scenario_spec import SCENARIO_SPECS, ScenarioSpec
+from topology_pool import TopologyPool
+from tracing import profiled, span, traced
+
+# "diag" samples tcp_info in-process over netlink (sock_diag.py), "ss" forks ss(8),
+# "probe" records every cwnd/ssthresh/srtt change from the tcp_probe tracepoint.
+MONITOR_BACKEND = "diag"
+# "bin" writes monitor logs as sample_store records (tcp_probe stays text), "text" as before
+MONITOR_FORMAT = "bin"
+# "mininet" (root, network namespaces and tc) or "local" (local_net.LocalNet)
+NET_BACKEND = "mininet"
+# serve live per-flow iperf3 metrics as JSON on http://127.0.0.1:<port>/ during runs
+METRICS_PORT = None
+# also export the results store as summary.json and <scenario>_summary.json
+JSON_EXPORT = True
 
 
 def ensure_dir(path: Path) -> Path:
@@ -25,82 +49,28 @@ def ensure_dir(path: Path) -> Path:
 
 
 @contextmanager
-def simple_net():
-    net = Mininet(link=TCLink, controller=None, build=False)
+def simple_net(backend: str | None = None):
+    backend = backend or NET_BACKEND
+    if backend == "local":
+        from local_net import LocalNet
+
+        net = LocalNet()
+    elif backend == "mininet":
+        from mininet.link import TCLink
+        from mininet.net import Mininet
+
+        net = Mininet(link=TCLink, controller=None, build=False)
+    else:
+        raise ValueError(f"unknown network backend {backend!r}")
     try:
         yield net
     finally:
         net.stop()
 
 
-def sample_loop(host, log_path: Path, stop_event: threading.Event, interval: float = 0.5):
-    """
-    Poll ss(8) from the given host until stop_event is set, logging RTT/cwnd/retrans stats.
-    """
-    cmd = "ss -tin '( dport = :5201 )'"
-    with log_path.open("w") as log_file:
-        while not stop_event.is_set():
-            timestamp = time.time()
-            output = host.cmd(cmd)
-            log_file.write(f"{timestamp:.6f}\n{output.strip()}\n--\n")
-            log_file.flush()
-            stop_event.wait(interval)
-        # final sample after completion
-        timestamp = time.time()
-        output = host.cmd(cmd)
-        log_file.write(f"{timestamp:.6f}\n{output.strip()}\n--\n")
-        log_file.flush()
-
-
-def run_iperf(
-    host_client,
-    host_server,
-    duration,
-    log_dir: Path,
-    label="flow",
-    monitor_host=None,
-    monitor_log: Path | None = None,
-    monitor_interval: float = 0.5,
-):
-    server_log = log_dir / f"{label}_server.log"
-    client_log = log_dir / f"{label}_client.json"
-    if server_log.exists():
-        server_log.unlink()
-    if client_log.exists():
-        client_log.unlink()
-    server = host_server.popen(f"iperf3 -s --one-off --logfile {server_log}")
-    time.sleep(1.0)
-    client = host_client.popen(
-        f"iperf3 -c {host_server.IP()} -t {duration} -i 1 -J --logfile {client_log}"
-    )
-    monitor_thread = None
-    stop_event = None
-    if monitor_host is not None and monitor_log is not None:
-        stop_event = threading.Event()
-        monitor_thread = threading.Thread(
-            target=sample_loop,
-            args=(monitor_host, monitor_log, stop_event, monitor_interval),
-            daemon=True,
-        )
-        monitor_thread.start()
-
-    client.wait()
-    if stop_event is not None:
-        stop_event.set()
-        monitor_thread.join()
-
-    time.sleep(1.0)
-    if server.poll() is None:
-        server.terminate()
-        server.wait()
-    return client_log
-
-
+@traced("parse.iperf_json")
 def parse_iperf_json(json_path: Path):
-    raw = json_path.read_text().strip()
-    if "}\n{" in raw:
-        raw = "{" + raw.split("}\n{")[-1]
-    data = json.loads(raw)
+    data = load_iperf_json(json_path)
     intervals = [
         {
             "start": iv["sum"]["start"],
@@ -120,225 +90,214 @@ def parse_iperf_json(json_path: Path):
     }
 
 
-def scenario1():
+@traced("parse.iperf_streams")
+def parse_iperf_streams(json_path: Path):
     """
-    Single Reno flow through a 10 Mbps bottleneck to illustrate slow start and AIMD.
+    Per-connection results of one (possibly -P) iperf3 client, keyed by the
+    connection's local/remote ports so they can be matched with cwnd logs.
     """
-    name = "scenario1_basic_aimd"
-    duration = 60
-    log_dir = ensure_dir(BASE_DIR / name)
-    with simple_net() as net:
-        h1 = net.addHost("h1")
-        h2 = net.addHost("h2")
-        s1 = net.addSwitch("s1", failMode="standalone")
-        net.addLink(h1, s1, bw=10, delay="30ms", max_queue_size=100)
-        net.addLink(h2, s1, bw=10, delay="30ms", max_queue_size=100)
-        net.start()
-
-        client_json = run_iperf(
-            h1,
-            h2,
-            duration,
-            log_dir,
-            monitor_host=h1,
-            monitor_log=log_dir / "cwnd.log",
+    data = load_iperf_json(json_path)
+    sockets = {conn["socket"]: conn for conn in data.get("start", {}).get("connected", [])}
+    streams = []
+    for stream in data.get("end", {}).get("streams", []):
+        sender = stream.get("sender", {})
+        receiver = stream.get("receiver", {})
+        conn = sockets.get(sender.get("socket"), {})
+        streams.append(
+            {
+                "local_port": conn.get("local_port"),
+                "remote_port": conn.get("remote_port"),
+                "average_bps": receiver.get("bits_per_second") or sender.get("bits_per_second"),
+                "bytes": receiver.get("bytes") or sender.get("bytes"),
+                "retransmits": sender.get("retransmits"),
+                "max_snd_cwnd": sender.get("max_snd_cwnd"),
+                "mean_rtt_us": sender.get("mean_rtt"),
+            }
         )
-    return {
-        "scenario": name,
-        "description": "Baseline AIMD over single bottleneck",
-        "iperf": parse_iperf_json(client_json),
-    }
+    return streams
+
+
+def run_flows(hosts, spec: ScenarioSpec, log_dir: Path, live: LiveMetrics | None = None):
+    """
+    Run every flow and flow group of spec: one --one-off iperf3 server per
+    launch, clients started on their schedule, and one shared monitor per
+    (client host, cwnd log), all driven by orchestrator.run_launches. Returns
+    {label: parse_iperf_json(...)} for plain flows and {label: {"flows": [...],
+    ...}} with per-connection results for flow groups. Running per-launch
+    throughput/retransmit/RTT aggregates are kept in live (a fresh LiveMetrics
+    if None) and served on METRICS_PORT when set.
+    """
+    launches = plan_launches(spec)
+    for launch in launches:
+        for name in (launch.client_log, launch.server_log):
+            if (log_dir / name).exists():
+                (log_dir / name).unlink()
+    monitor_backend = spec.monitor.backend or MONITOR_BACKEND
+    live = live if live is not None else LiveMetrics()
+    with span("iperf.run", scenario=spec.name, launches=len(launches), duration=spec.duration):
+        asyncio.run(run_launches(hosts, spec, launches, log_dir, monitor_backend, live, METRICS_PORT, MONITOR_FORMAT))
+
+    results = {}
+    groups = {}
+    for launch in launches:
+        client_log = log_dir / launch.client_log
+        if launch.group is None:
+            results[launch.label] = parse_iperf_json(client_log)
+            continue
+        flows = groups.setdefault(launch.group, [])
+        for stream in parse_iperf_streams(client_log):
+            flows.append({"client": launch.client, "server": launch.server, "port": launch.port, **stream})
+    for label, flows in groups.items():
+        rates = [flow["average_bps"] for flow in flows]
+        results[label] = {
+            "flows": flows,
+            "connections": len(flows),
+            "total_bps": sum(rate for rate in rates if rate),
+            "fairness_index": jain_index(rates),
+        }
+        with profiled("analysis.group_fairness", group=label, connections=len(flows)):
+            matrix = group_matrix([launch for launch in launches if launch.group == label], log_dir)
+            if matrix is not None:
+                results[label]["fairness"] = summarize_fairness(matrix)
+    return results
+
+
+def group_matrix(launches, log_dir: Path) -> ThroughputMatrix | None:
+    """Per-connection throughput over time of one flow group, from bytes_acked in its cwnd logs."""
+    ports = {launch.port for launch in launches}
+    flows = {}
+    for log_name in sorted({launch.cwnd_log for launch in launches}):
+        if (log_dir / log_name).exists():
+            flows.update(
+                (key, series) for key, series in parse_flow_log(log_dir / log_name).items() if key[3] in ports
+            )
+    return ThroughputMatrix.from_samples(flows) if flows else None
+
+
+def run_spec(
+    spec: ScenarioSpec,
+    log_dir: Path | None = None,
+    prefix: str = "",
+    backend: str | None = None,
+    pool: TopologyPool | None = None,
+    live: LiveMetrics | None = None,
+):
+    """
+    Build the star topology of spec (every host linked to s1), run its flows and
+    return the summary entry. prefix is prepended to node names so that several
+    specs can run side by side without clashing interface or bridge names;
+    backend selects simple_net's network (default NET_BACKEND). With a pool the
+    network of the previous run is reconfigured instead (prefix and backend are
+    then the pool's). live receives the flows' running iperf3 metrics. The
+    entry's "cc_events" holds cc_events.summarize() of each cwnd log, and
+    "fairness" (per group: iperf[group]["fairness"]) the windowed Jain,
+    convergence and share statistics of fairness.summarize().
+    """
+    with span("run_spec", scenario=spec.name):
+        log_dir = ensure_dir(log_dir or BASE_DIR / spec.name)
+        raise_fd_limit()  # before the hosts fork, so iperf3 inherits it
+        with nullcontext(pool) if pool is not None else TopologyPool(backend, prefix) as net_pool:
+            results = run_flows(net_pool.acquire(spec), spec, log_dir, live)
+
+        summary = {"scenario": spec.name, "description": spec.description}
+        if len(results) == 1 and not spec.groups:
+            summary["iperf"] = next(iter(results.values()))
+        else:
+            summary["iperf"] = results
+            if len(spec.flows) > 1:
+                summary["fairness_index"] = jain_index([results[flow.label]["average_bps"] for flow in spec.flows])
+                with profiled("analysis.fairness", flows=len(spec.flows)):
+                    matrix = ThroughputMatrix.from_intervals(
+                        {flow.label: results[flow.label]["intervals"] for flow in spec.flows},
+                        {flow.label: flow.start_delay for flow in spec.flows},
+                    )
+                    summary["fairness"] = summarize_fairness(matrix)
+        with profiled("analysis.cc_events"):
+            events = summarize_logs(log_dir)
+        if events:
+            summary["cc_events"] = events
+        return summary
+
+
+def scenario1(pool=None):
+    """
+    Single Reno flow through a 10 Mbps bottleneck to illustrate slow start and AIMD.
+    """
+    return run_spec(SCENARIO_SPECS["scenario1_basic_aimd"], pool=pool)
 
 
-def scenario2():
+def scenario2(pool=None):
     """
     Lossy link (5% random loss) to demonstrate Reno treating all loss as congestion.
     """
-    name = "scenario2_lossy_link"
-    duration = 60
-    log_dir = ensure_dir(BASE_DIR / name)
-    with simple_net() as net:
-        h1 = net.addHost("h1")
-        h2 = net.addHost("h2")
-        s1 = net.addSwitch("s1", failMode="standalone")
-        net.addLink(h1, s1, bw=10, delay="20ms", loss=5, max_queue_size=100)
-        net.addLink(h2, s1, bw=10, delay="20ms", loss=5, max_queue_size=100)
-        net.start()
-
-        client_json = run_iperf(
-            h1,
-            h2,
-            duration,
-            log_dir,
-            monitor_host=h1,
-            monitor_log=log_dir / "cwnd.log",
-        )
-    return {
-        "scenario": name,
-        "description": "Random loss (5%)",
-        "iperf": parse_iperf_json(client_json),
-    }
+    return run_spec(SCENARIO_SPECS["scenario2_lossy_link"], pool=pool)
 
 
-def scenario3():
+def scenario3(pool=None):
     """
     High bandwidth-delay product path to highlight Reno's slow window growth.
     """
-    name = "scenario3_high_bdp"
-    duration = 90
-    log_dir = ensure_dir(BASE_DIR / name)
-    with simple_net() as net:
-        h1 = net.addHost("h1")
-        h2 = net.addHost("h2")
-        s1 = net.addSwitch("s1", failMode="standalone")
-        net.addLink(h1, s1, bw=100, delay="150ms", max_queue_size=2000)
-        net.addLink(h2, s1, bw=100, delay="150ms", max_queue_size=2000)
-        net.start()
-
-        client_json = run_iperf(
-            h1,
-            h2,
-            duration,
-            log_dir,
-            monitor_host=h1,
-            monitor_log=log_dir / "cwnd.log",
-            monitor_interval=0.75,
-        )
-    return {
-        "scenario": name,
-        "description": "High BDP path (100 Mbps, 150 ms RTT)",
-        "iperf": parse_iperf_json(client_json),
-    }
+    return run_spec(SCENARIO_SPECS["scenario3_high_bdp"], pool=pool)
 
 
-def scenario4():
+def scenario4(pool=None):
     """
     Competing flows with different RTTs to expose RTT unfairness.
     """
-    name = "scenario4_rtt_unfairness"
-    duration = 60
-    log_dir = ensure_dir(BASE_DIR / name)
-    with simple_net() as net:
-        h1 = net.addHost("h1")
-        h2 = net.addHost("h2")
-        h3 = net.addHost("h3")
-        s1 = net.addSwitch("s1", failMode="standalone")
-        net.addLink(h1, s1, bw=20, delay="10ms", max_queue_size=200)
-        net.addLink(h3, s1, bw=20, delay="100ms", max_queue_size=200)
-        net.addLink(h2, s1, bw=20, delay="10ms", max_queue_size=200)
-        net.start()
-
-        server1_log = log_dir / "server_h1.log"
-        server2_log = log_dir / "server_h3.log"
-        stop_h1 = threading.Event()
-        stop_h3 = threading.Event()
-        monitor_h1 = threading.Thread(
-            target=sample_loop,
-            args=(h1, log_dir / "h1_cwnd.log", stop_h1, 0.5),
-            daemon=True,
-        )
-        monitor_h3 = threading.Thread(
-            target=sample_loop,
-            args=(h3, log_dir / "h3_cwnd.log", stop_h3, 0.5),
-            daemon=True,
-        )
-        monitor_h1.start()
-        monitor_h3.start()
-
-        client1_log = log_dir / "h1_client.json"
-        client2_log = log_dir / "h3_client.json"
-        for path in (client1_log, client2_log, server1_log, server2_log):
-            if path.exists():
-                path.unlink()
-        server1 = h2.popen(
-            f"iperf3 -s --one-off --logfile {server1_log} -p 5201"
-        )
-        server2 = h2.popen(
-            f"iperf3 -s --one-off --logfile {server2_log} -p 5202"
-        )
-        time.sleep(1.0)
-        client1 = h1.popen(
-            f"iperf3 -c {h2.IP()} -t {duration} -i 1 -J -p 5201 --logfile {client1_log}"
-        )
-        time.sleep(0.5)
-        client2 = h3.popen(
-            f"iperf3 -c {h2.IP()} -t {duration} -i 1 -J -p 5202 --logfile {client2_log}"
-        )
-
-        client1.wait()
-        client2.wait()
-        time.sleep(1.0)
-        for server in (server1, server2):
-            if server.poll() is None:
-                server.terminate()
-                server.wait()
-        stop_h1.set()
-        stop_h3.set()
-        monitor_h1.join()
-        monitor_h3.join()
-
-    data1 = parse_iperf_json(client1_log)
-    data2 = parse_iperf_json(client2_log)
-    throughputs = [tp for tp in (data1["average_bps"], data2["average_bps"]) if tp]
-    fairness = None
-    if len(throughputs) == 2:
-        fairness = (sum(throughputs) ** 2) / (2 * sum(tp ** 2 for tp in throughputs))
-    return {
-        "scenario": name,
-        "description": "RTT unfairness (short vs long RTT flows)",
-        "iperf": {"h1": data1, "h3": data2},
-        "fairness_index": fairness,
-    }
+    return run_spec(SCENARIO_SPECS["scenario4_rtt_unfairness"], pool=pool)
 
 
-def scenario5():
+def scenario5(pool=None):
     """
-    Large queue (bufferbloat) inducing high latency; optional UDP burst commented out.
+    Large queue (bufferbloat) inducing high latency.
     """
-    name = "scenario5_bufferbloat"
-    duration = 60
-    log_dir = ensure_dir(BASE_DIR / name)
-    with simple_net() as net:
-        h1 = net.addHost("h1")
-        h2 = net.addHost("h2")
-        s1 = net.addSwitch("s1", failMode="standalone")
-        net.addLink(h1, s1, bw=10, delay="20ms", max_queue_size=2000)
-        net.addLink(h2, s1, bw=10, delay="20ms", max_queue_size=2000)
-        net.start()
-
-        client_json = run_iperf(
-            h1,
-            h2,
-            duration,
-            log_dir,
-            monitor_host=h1,
-            monitor_log=log_dir / "cwnd.log",
-        )
-
-        # Optional UDP burst for queue build-up (disabled by default; uncomment if needed).
-        # h1.cmd("iperf3 -u -c 10.0.0.2 -t 10 -b 8M -l 1200 >> {}/udp_burst.log 2>&1 &".format(log_dir))
-    return {
-        "scenario": name,
-        "description": "Bufferbloat with oversized queue",
-        "iperf": parse_iperf_json(client_json),
-    }
+    # Optional UDP burst for queue build-up (disabled by default): run
+    # "iperf3 -u -c 10.0.0.2 -t 10 -b 8M -l 1200" on h1 alongside the flow.
+    return run_spec(SCENARIO_SPECS["scenario5_bufferbloat"], pool=pool)
 
 
 def main():
-    setLogLevel("warning")
-    summaries = []
-    for func in (scenario1, scenario2, scenario3, scenario4, scenario5):
-        print(f"Running {func.__name__} ...")
-        summary = func()
-        summaries.append(summary)
-        # flush incremental summary per scenario
-        (BASE_DIR / f"{summary['scenario']}_summary.json").write_text(
-            json.dumps(summary, indent=2)
-        )
-        print(f"Completed {summary['scenario']}")
-    (BASE_DIR / "summary.json").write_text(json.dumps(summaries, indent=2))
+    global METRICS_PORT, NET_BACKEND
+    scenarios = {func.__name__: func for func in (scenario1, scenario2, scenario3, scenario4, scenario5)}
+    parser = argparse.ArgumentParser(description="Run the five baseline scenarios.")
+    parser.add_argument("scenarios", nargs="*", help=f"run only these of {', '.join(scenarios)} (default: all)")
+    parser.add_argument("--backend", choices=("mininet", "local"), default=NET_BACKEND)
+    parser.add_argument("--metrics-port", type=int, help="serve live iperf3 metrics on this local port")
+    tracing.add_arguments(parser)
+    args = parser.parse_args()
+    unknown = sorted(set(args.scenarios) - set(scenarios))
+    if unknown:
+        parser.error(f"unknown scenario(s): {', '.join(unknown)}")
+    NET_BACKEND = args.backend
+    METRICS_PORT = args.metrics_port
+    if NET_BACKEND == "mininet":
+        from mininet.log import setLogLevel
+
+        setLogLevel("warning")
+    BASE_DIR.mkdir(parents=True, exist_ok=True)
+    with tracing.session(args.trace, args.profile):
+        results = ResultsStore(BASE_DIR / "results")
+        results.sync_json(BASE_DIR / "summary.json")  # keep hand edits of the last export
+        changed = []
+        with TopologyPool() as pool:
+            for name in args.scenarios or scenarios:
+                print(f"Running {name} ...")
+                summary = scenarios[name](pool)
+                # flush incremental summary per scenario
+                with span("results.put", scenario=summary["scenario"]):
+                    if results.put(summary):
+                        changed.append(summary["scenario"])
+                if JSON_EXPORT:
+                    (BASE_DIR / f"{summary['scenario']}_summary.json").write_text(
+                        json.dumps(summary, indent=2)
+                    )
+                print(f"Completed {summary['scenario']}")
+        print(pool.report())
+        print(f"results: {', '.join(changed) or 'unchanged'}")
+        if JSON_EXPORT and changed:
+            with span("results.export_json"):
+                results.export_json(BASE_DIR / "summary.json")
 
 
 if __name__ == "__main__":
-    BASE_DIR.mkdir(parents=True, exist_ok=True)
     main()
@@ -0,0 +1,322 @@
+#!/usr/bin/env python3
+"""Append-only binary store for cwnd/RTT samples.
+
+Text monitor logs cost 150-400 bytes per sample and are flushed line by line;
+at 1000 flows that is gigabytes per run. A sample store packs each sample into
+one fixed 64-byte record and writes the records in chunks:
+
+    b"# sample_store v1\\n"               magic line (parse_cache dispatches on it)
+    <u4 length><JSON header>              fields and their dtypes
+    chunk*                                appended as the writer's buffer fills
+
+    chunk = <CHUNK_HEAD: b"CHNK", count, first time, last time, table length>
+            <JSON {"flows": [[id, local addr, local port, peer addr, peer port]],
+                   "states": [[code, name]]}>   flows/states first seen in it
+            <count records of RECORD_DTYPE>
+
+Each chunk head gives the time span of its records, so SampleStore finds the
+chunks that overlap a time range without touching the records. It
+memory-maps the file and returns records as NumPy views. A truncated last
+chunk (writer killed mid-write) is ignored.
+
+    python3 sample_store.py convert cwnd.log cwnd.smp
+    python3 sample_store.py info cwnd.smp
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import mmap
+import struct
+import time
+from pathlib import Path
+from typing import BinaryIO, Dict, Iterator, List, NamedTuple, Optional, Sequence, Tuple
+
+import numpy as np
+
+from ss_parser import FIELDS, FlowKey, FlowSeries
+
+LOG_MAGIC = "# sample_store v1"
+PARSER_VERSION = 1  # bump when the parsed output changes so cached results are rebuilt
+_MAGIC_LINE = (LOG_MAGIC + "\n").encode()
+CHUNK_HEAD = struct.Struct("<4sIddI4x")
+_HEADER_LEN = struct.Struct("<I")
+# byte counters need float64; the rest fit float32 (NaN when a sample lacks them)
+FIELD_DTYPES = {name: "<f8" if name.startswith("bytes_") else "<f4" for name in FIELDS}
+RECORD_DTYPE = np.dtype(
+    [("time", "<f8"), ("flow", "<u4"), ("state", "u1"), ("_pad", "V3")]
+    + [(name, FIELD_DTYPES[name]) for name in FIELDS]
+)
+
+
+def _pad8(size: int) -> int:
+    return -size % 8
+
+
+class ChunkInfo(NamedTuple):
+    offset: int  # of the first record
+    count: int
+    first: float
+    last: float
+
+
+class SampleWriter:
+    """Buffer samples and append them as chunks of up to chunk_records.
+
+    A chunk is also written once its oldest sample is max_delay seconds old,
+    so a slow sampler still reaches the disk regularly.
+    """
+
+    def __init__(self, path: Path, chunk_records: int = 4096, max_delay: float = 5.0, source: Optional[str] = None):
+        self.path = path
+        self.max_delay = max_delay
+        self._fh: BinaryIO = path.open("wb")
+        header = json.dumps(
+            {"fields": [[name, FIELD_DTYPES[name]] for name in FIELDS], "record_size": RECORD_DTYPE.itemsize,
+             "source": source}
+        ).encode()
+        self._fh.write(_MAGIC_LINE + _HEADER_LEN.pack(len(header)) + header)
+        self._fh.write(b"\0" * _pad8(len(_MAGIC_LINE) + _HEADER_LEN.size + len(header)))
+        self._buffer = np.zeros(chunk_records, dtype=RECORD_DTYPE)
+        self._count = 0
+        self._opened_at = 0.0
+        self._flows: Dict[FlowKey, int] = {}
+        self._states: Dict[str, int] = {}
+        self._new_flows: List[list] = []
+        self._new_states: List[list] = []
+
+    def __enter__(self) -> "SampleWriter":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def append(self, timestamp: float, key: FlowKey, state: str, values: Sequence[float]) -> None:
+        """One sample; values follow ss_parser.FIELDS."""
+        flow = self._flows.get(key)
+        if flow is None:
+            flow = self._flows[key] = len(self._flows)
+            self._new_flows.append([flow, *key])
+        code = self._states.get(state)
+        if code is None:
+            code = self._states[state] = len(self._states)
+            self._new_states.append([code, state])
+        if self._count == 0:
+            self._opened_at = time.monotonic()
+        self._buffer[self._count] = (timestamp, flow, code, b"", *values)
+        self._count += 1
+        if self._count == len(self._buffer) or time.monotonic() - self._opened_at >= self.max_delay:
+            self.flush()
+
+    def append_many(
+        self, timestamp: float, keys: Sequence[FlowKey], state: str, columns: Dict[str, np.ndarray]
+    ) -> None:
+        """One sample of each flow in keys, taken at timestamp; columns holds one array per FIELDS entry."""
+        flows = np.empty(len(keys), dtype=np.uint32)
+        for idx, key in enumerate(keys):
+            flow = self._flows.get(key)
+            if flow is None:
+                flow = self._flows[key] = len(self._flows)
+                self._new_flows.append([flow, *key])
+            flows[idx] = flow
+        code = self._states.get(state)
+        if code is None:
+            code = self._states[state] = len(self._states)
+            self._new_states.append([code, state])
+        done = 0
+        while done < len(keys):
+            if self._count == 0:
+                self._opened_at = time.monotonic()
+            take = min(len(keys) - done, len(self._buffer) - self._count)
+            rows = self._buffer[self._count:self._count + take]
+            rows["time"] = timestamp
+            rows["flow"] = flows[done:done + take]
+            rows["state"] = code
+            for name in FIELDS:
+                rows[name] = columns[name][done:done + take]
+            self._count += take
+            done += take
+            if self._count == len(self._buffer) or time.monotonic() - self._opened_at >= self.max_delay:
+                self.flush()
+
+    def flush(self) -> None:
+        if not self._count and not self._new_flows:
+            return
+        records = self._buffer[: self._count]
+        table = json.dumps({"flows": self._new_flows, "states": self._new_states}).encode()
+        first = float(records["time"].min()) if self._count else 0.0
+        last = float(records["time"].max()) if self._count else 0.0
+        self._fh.write(CHUNK_HEAD.pack(b"CHNK", self._count, first, last, len(table)))
+        self._fh.write(table + b"\0" * _pad8(len(table)))
+        self._fh.write(records.tobytes())
+        self._fh.flush()
+        self._count = 0
+        self._new_flows, self._new_states = [], []
+
+    def close(self) -> None:
+        if not self._fh.closed:
+            self.flush()
+            self._fh.close()
+
+
+class SampleStore:
+    """Read-only, memory-mapped view of a sample store."""
+
+    def __init__(self, path: Path):
+        self.path = path
+        with path.open("rb") as fh:
+            size = fh.seek(0, 2)
+            self._map = mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ) if size else b""
+        if not bytes(self._map[: len(_MAGIC_LINE)]) == _MAGIC_LINE:
+            raise ValueError(f"{path} is not a sample store")
+        pos = len(_MAGIC_LINE)
+        (length,) = _HEADER_LEN.unpack_from(self._map, pos)
+        pos += _HEADER_LEN.size
+        self.header = json.loads(bytes(self._map[pos : pos + length]))
+        pos += length + _pad8(pos + length)
+        self.flows: Dict[int, FlowKey] = {}
+        self.states: Dict[int, str] = {}
+        self.chunks: List[ChunkInfo] = []
+        while pos + CHUNK_HEAD.size <= len(self._map):
+            tag, count, first, last, table_len = CHUNK_HEAD.unpack_from(self._map, pos)
+            start = pos + CHUNK_HEAD.size + table_len + _pad8(table_len)
+            end = start + count * RECORD_DTYPE.itemsize
+            if tag != b"CHNK" or end > len(self._map):
+                break  # torn write at the tail
+            table = json.loads(bytes(self._map[pos + CHUNK_HEAD.size : pos + CHUNK_HEAD.size + table_len]))
+            for flow, local_addr, local_port, peer_addr, peer_port in table["flows"]:
+                self.flows[flow] = (local_addr, local_port, peer_addr, peer_port)
+            for code, name in table["states"]:
+                self.states[code] = name
+            if count:
+                self.chunks.append(ChunkInfo(start, count, first, last))
+            pos = end
+
+    def __enter__(self) -> "SampleStore":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def close(self) -> None:
+        if isinstance(self._map, mmap.mmap):
+            try:
+                self._map.close()
+            except BufferError:
+                pass  # record views are still alive; the map closes with them
+
+    def __len__(self) -> int:
+        return sum(chunk.count for chunk in self.chunks)
+
+    def _chunk(self, chunk: ChunkInfo) -> np.ndarray:
+        return np.frombuffer(self._map, dtype=RECORD_DTYPE, count=chunk.count, offset=chunk.offset)
+
+    def records(self, start: Optional[float] = None, end: Optional[float] = None) -> np.ndarray:
+        """Records with start <= time <= end; a zero-copy view when one chunk covers them."""
+        chunks = [
+            chunk for chunk in self.chunks
+            if (start is None or chunk.last >= start) and (end is None or chunk.first <= end)
+        ]
+        if not chunks:
+            return np.zeros(0, dtype=RECORD_DTYPE)
+        records = self._chunk(chunks[0]) if len(chunks) == 1 else np.concatenate([self._chunk(c) for c in chunks])
+        if start is not None or end is not None:
+            times = records["time"]
+            keep = np.ones(len(records), dtype=bool)
+            if start is not None:
+                keep &= times >= start
+            if end is not None:
+                keep &= times <= end
+            if not keep.all():
+                records = records[keep]
+        return records
+
+    def iter_records(self, batch_records: int = 1 << 16) -> Iterator[np.ndarray]:
+        """Records in file order, whole chunks at a time up to about batch_records, so one pass holds one batch."""
+        batch: List[ChunkInfo] = []
+        size = 0
+        for chunk in self.chunks:
+            batch.append(chunk)
+            size += chunk.count
+            if size >= batch_records:
+                yield self._chunk(batch[0]) if len(batch) == 1 else np.concatenate([self._chunk(c) for c in batch])
+                batch, size = [], 0
+        if batch:
+            yield self._chunk(batch[0]) if len(batch) == 1 else np.concatenate([self._chunk(c) for c in batch])
+
+    def split_flows(
+        self, records: np.ndarray, states: Optional[Sequence[str]] = ("ESTAB",)
+    ) -> Iterator[Tuple[FlowKey, np.ndarray]]:
+        """(flow key, its records in time order) for the records in one of states."""
+        if states is not None:
+            codes = [code for code, name in self.states.items() if name in states]
+            records = records[np.isin(records["state"], codes)]
+        order = np.lexsort((records["time"], records["flow"]))
+        records = records[order]
+        ids, starts = np.unique(records["flow"], return_index=True)
+        bounds = list(starts[1:]) + [len(records)]
+        for flow, lo, hi in zip(ids.tolist(), starts.tolist(), bounds):
+            yield self.flows[flow], records[lo:hi]
+
+    def flow_series(
+        self, states: Optional[Sequence[str]] = ("ESTAB",), start: Optional[float] = None, end: Optional[float] = None
+    ) -> Dict[FlowKey, FlowSeries]:
+        """Per-flow tables in the shape ss_parser and sock_diag return."""
+        flows: Dict[FlowKey, FlowSeries] = {}
+        for key, part in self.split_flows(self.records(start, end), states):
+            flows[key] = FlowSeries(
+                key,
+                part["time"].astype(np.float64),
+                {name: part[name].astype(np.float64) for name in FIELDS},
+            )
+        return flows
+
+
+def parse_store(path: Path, states: Optional[Sequence[str]] = ("ESTAB",)) -> Dict[FlowKey, FlowSeries]:
+    with SampleStore(path) as store:
+        return store.flow_series(states)
+
+
+def convert(source: Path, target: Path) -> int:
+    """Rewrite a text monitor log (ss, sock_diag or tcp_probe) as a sample store; returns records written."""
+    from parse_cache import parse_flow_log  # parse_cache imports this module
+
+    flows = parse_flow_log(source)
+    rows = [
+        (float(t), key, series, idx)
+        for key, series in flows.items()
+        for idx, t in enumerate(series.times.tolist())
+    ]
+    rows.sort(key=lambda row: row[0])
+    with SampleWriter(target, source=str(source)) as writer:
+        for timestamp, key, series, idx in rows:
+            writer.append(timestamp, key, "ESTAB", [series.columns[name][idx] for name in FIELDS])
+    return len(rows)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Convert and inspect binary sample stores.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    conv = sub.add_parser("convert", help="text cwnd log -> sample store")
+    conv.add_argument("source", type=Path)
+    conv.add_argument("target", type=Path)
+    info = sub.add_parser("info", help="flows, chunks and time span of a store")
+    info.add_argument("store", type=Path)
+    args = parser.parse_args()
+
+    if args.command == "convert":
+        count = convert(args.source, args.target)
+        print(f"{args.source} ({args.source.stat().st_size} B) -> {args.target} "
+              f"({args.target.stat().st_size} B, {count} records)")
+        return
+    with SampleStore(args.store) as store:
+        span = (store.chunks[0].first, store.chunks[-1].last) if store.chunks else (0.0, 0.0)
+        print(f"{len(store)} records, {len(store.flows)} flows, {len(store.chunks)} chunks, "
+              f"{span[1] - span[0]:.1f} s")
+        for flow, key in sorted(store.flows.items()):
+            print(f"  {flow:5d}  {key[0]}:{key[1]} -> {key[2]}:{key[3]}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,249 @@
+#!/usr/bin/env python3
+"""Declarative scenario definitions and parameter-grid expansion.
+
+A ScenarioSpec describes one experiment on the star topology every scenario
+uses (each host hangs off switch s1): the per-host access links, the iperf3
+flows, the run duration and the cwnd monitor. run_scenarios.run_spec executes a
+spec; sweep.py expands grids of them. This module imports nothing heavy so
+specs can be built, hashed and listed on machines without Mininet.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import itertools
+import json
+from dataclasses import asdict, dataclass, field, fields, replace
+from typing import Any, Dict, List, Mapping, Optional, Sequence, Tuple
+
+
+@dataclass(frozen=True)
+class LinkSpec:
+    """TCLink parameters of one host's link to s1 (same keywords as net.addLink)."""
+
+    bw: float
+    delay: str
+    loss: float = 0.0
+    max_queue_size: Optional[int] = None
+
+    def __post_init__(self):
+        # normalise numbers so 10 and 10.0 hash to the same configuration
+        object.__setattr__(self, "bw", float(self.bw))
+        object.__setattr__(self, "loss", float(self.loss))
+
+    def tc_params(self) -> Dict[str, Any]:
+        params: Dict[str, Any] = {"bw": self.bw, "delay": self.delay}
+        if self.loss:
+            params["loss"] = self.loss
+        if self.max_queue_size is not None:
+            params["max_queue_size"] = self.max_queue_size
+        return params
+
+
+@dataclass(frozen=True)
+class FlowSpec:
+    """One iperf3 client->server flow; logs are named after label."""
+
+    label: str
+    client: str
+    server: str
+    port: int = 5201
+    start_delay: float = 0.0
+    monitor_log: Optional[str] = None  # defaults to "<label>_cwnd.log"
+    congestion: Optional[str] = None  # iperf3 -C (TCP_CONGESTION); None keeps the host's sysctl default
+
+    @property
+    def cwnd_log(self) -> str:
+        return self.monitor_log or f"{self.label}_cwnd.log"
+
+
+@dataclass(frozen=True)
+class FlowGroupSpec:
+    """count iperf3 connections dealt round-robin over (client, server) pairs.
+
+    Connections are packed into clients of up to streams_per_process streams
+    (`iperf3 -P`), each on its own port counting up from base_port, or from
+    past the highest port the flows and earlier groups use on its servers.
+    Clients are launched stagger seconds apart starting at start_delay;
+    stagger=0 starts them together.
+    """
+
+    label: str
+    pairs: Tuple[Tuple[str, str], ...]
+    count: int
+    base_port: int = 5301
+    streams_per_process: int = 128
+    start_delay: float = 0.0
+    stagger: float = 0.0
+    congestion: Optional[str] = None  # iperf3 -C for every connection of the group
+
+    def __post_init__(self):
+        object.__setattr__(self, "pairs", tuple(tuple(pair) for pair in self.pairs))
+
+    def cwnd_log(self, host: str) -> str:
+        return f"{self.label}_{host}_cwnd.log"
+
+
+@dataclass(frozen=True)
+class MonitorSpec:
+    backend: Optional[str] = None  # None -> run_scenarios.MONITOR_BACKEND
+    interval: float = 0.5
+
+
+@dataclass(frozen=True)
+class ScenarioSpec:
+    name: str
+    description: str
+    links: Tuple[Tuple[str, LinkSpec], ...]  # (host, link to s1), in addLink order
+    flows: Tuple[FlowSpec, ...]
+    duration: int = 60
+    monitor: MonitorSpec = field(default_factory=MonitorSpec)
+    groups: Tuple[FlowGroupSpec, ...] = ()
+
+    @property
+    def hosts(self) -> List[str]:
+        return [host for host, _ in self.links]
+
+    def to_dict(self) -> Dict[str, Any]:
+        data = asdict(self)
+        data["links"] = {host: asdict(link) for host, link in self.links}
+        if not self.groups:
+            del data["groups"]  # keeps hashes of group-less specs unchanged
+        for item in (*data["flows"], *data.get("groups", ())):
+            if item["congestion"] is None:
+                del item["congestion"]  # likewise for specs that leave the algorithm to the sysctl
+        return data
+
+    @classmethod
+    def from_dict(cls, data: Mapping[str, Any]) -> "ScenarioSpec":
+        return cls(
+            name=data["name"],
+            description=data.get("description", ""),
+            links=tuple((host, LinkSpec(**link)) for host, link in data["links"].items()),
+            flows=tuple(FlowSpec(**flow) for flow in data["flows"]),
+            duration=data.get("duration", 60),
+            monitor=MonitorSpec(**data.get("monitor", {})),
+            groups=tuple(FlowGroupSpec(**group) for group in data.get("groups", ())),
+        )
+
+    def config_hash(self) -> str:
+        """Stable hash of everything that affects the measurement (not the name)."""
+        data = self.to_dict()
+        data.pop("name")
+        data.pop("description")
+        canonical = json.dumps(data, sort_keys=True, separators=(",", ":"))
+        return hashlib.sha1(canonical.encode()).hexdigest()[:16]
+
+
+def _star(bw: float, delay: str, hosts: Sequence[str] = ("h1", "h2"), **kwargs) -> Tuple[Tuple[str, LinkSpec], ...]:
+    return tuple((host, LinkSpec(bw=bw, delay=delay, **kwargs)) for host in hosts)
+
+
+_SINGLE_FLOW = (FlowSpec(label="flow", client="h1", server="h2", monitor_log="cwnd.log"),)
+
+SCENARIO_SPECS: Dict[str, ScenarioSpec] = {
+    spec.name: spec
+    for spec in (
+        ScenarioSpec(
+            name="scenario1_basic_aimd",
+            description="Baseline AIMD over single bottleneck",
+            links=_star(10, "30ms", max_queue_size=100),
+            flows=_SINGLE_FLOW,
+        ),
+        ScenarioSpec(
+            name="scenario2_lossy_link",
+            description="Random loss (5%)",
+            links=_star(10, "20ms", loss=5, max_queue_size=100),
+            flows=_SINGLE_FLOW,
+        ),
+        ScenarioSpec(
+            name="scenario3_high_bdp",
+            description="High BDP path (100 Mbps, 150 ms RTT)",
+            links=_star(100, "150ms", max_queue_size=2000),
+            flows=_SINGLE_FLOW,
+            duration=90,
+            monitor=MonitorSpec(interval=0.75),
+        ),
+        ScenarioSpec(
+            name="scenario4_rtt_unfairness",
+            description="RTT unfairness (short vs long RTT flows)",
+            links=(
+                ("h1", LinkSpec(bw=20, delay="10ms", max_queue_size=200)),
+                ("h3", LinkSpec(bw=20, delay="100ms", max_queue_size=200)),
+                ("h2", LinkSpec(bw=20, delay="10ms", max_queue_size=200)),
+            ),
+            flows=(
+                FlowSpec(label="h1", client="h1", server="h2", port=5201),
+                FlowSpec(label="h3", client="h3", server="h2", port=5202, start_delay=0.5),
+            ),
+        ),
+        ScenarioSpec(
+            name="scenario5_bufferbloat",
+            description="Bufferbloat with oversized queue",
+            links=_star(10, "20ms", max_queue_size=2000),
+            flows=_SINGLE_FLOW,
+        ),
+        ScenarioSpec(
+            name="many_flows_1000",
+            description="1000 Reno connections from two senders sharing a 100 Mbps bottleneck",
+            links=_star(100, "20ms", hosts=("h1", "h3", "h2"), max_queue_size=1000),
+            flows=(),
+            groups=(FlowGroupSpec(label="bulk", pairs=(("h1", "h2"), ("h3", "h2")), count=1000, stagger=0.1),),
+            monitor=MonitorSpec(interval=1.0),
+        ),
+    )
+}
+
+
+def _set_path(spec: ScenarioSpec, path: str, value: Any) -> ScenarioSpec:
+    """Return spec with a dotted parameter replaced.
+
+    Paths: `duration`, `monitor.interval`, `links.<host>.<param>` and
+    `links.*.<param>` (every host), `flows.<index>.<param>`,
+    `groups.<index>.<param>`.
+    """
+    head, _, rest = path.partition(".")
+    if head == "links":
+        host, _, param = rest.partition(".")
+        links = tuple(
+            (name, replace(link, **{param: value}) if host in ("*", name) else link)
+            for name, link in spec.links
+        )
+        if host != "*" and host not in spec.hosts:
+            raise KeyError(f"{spec.name} has no host {host!r}")
+        return replace(spec, links=links)
+    if head in ("flows", "groups"):
+        index, _, param = rest.partition(".")
+        items = list(getattr(spec, head))
+        items[int(index)] = replace(items[int(index)], **{param: value})
+        return replace(spec, **{head: tuple(items)})
+    if head == "monitor":
+        return replace(spec, monitor=replace(spec.monitor, **{rest: value}))
+    if head not in {f.name for f in fields(ScenarioSpec)}:
+        raise KeyError(f"unknown scenario parameter {path!r}")
+    return replace(spec, **{head: value})
+
+
+def with_congestion(spec: ScenarioSpec, algorithm: str) -> ScenarioSpec:
+    """spec with every flow and flow group using algorithm, named <name>[cc=<algorithm>]."""
+    return replace(
+        spec,
+        name=f"{spec.name}[cc={algorithm}]",
+        flows=tuple(replace(flow, congestion=algorithm) for flow in spec.flows),
+        groups=tuple(replace(group, congestion=algorithm) for group in spec.groups),
+    )
+
+
+def expand_grid(base: ScenarioSpec, grid: Mapping[str, Sequence[Any]]) -> List[ScenarioSpec]:
+    """Cartesian product of grid values applied to base, one spec per point."""
+    keys = list(grid)
+    points = []
+    for values in itertools.product(*(grid[key] for key in keys)):
+        spec = base
+        labels = []
+        for key, value in zip(keys, values):
+            spec = _set_path(spec, key, value)
+            labels.append(f"{key.rsplit('.', 1)[-1]}={value}")
+        name = base.name if not labels else f"{base.name}[{','.join(labels)}]"
+        points.append(replace(spec, name=name))
+    return points
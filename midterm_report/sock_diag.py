@@ -0,0 +1,368 @@
+#!/usr/bin/env python3
+"""In-process TCP socket sampler over NETLINK_SOCK_DIAG.
+
+Replaces forking `ss -tin` in orchestrator.sample_ss. One netlink dump
+returns `struct tcp_info` for every matching socket of the current network
+namespace, so a sample costs a couple of syscalls instead of a process spawn
+plus text formatting. Run it inside a Mininet host with `host.popen(...)` so
+it sees that host's namespace; it writes one tab-separated record per socket
+and sample (see LOG_MAGIC / LOG_COLUMNS), which parse_diag_log turns into the
+same per-flow FlowSeries that ss_parser produces for `ss` dumps.
+"""
+
+from __future__ import annotations
+
+import argparse
+import operator
+import os
+import signal
+import socket
+import struct
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, TextIO, Tuple, Union
+
+import numpy as np
+
+from sample_store import SampleWriter
+from ss_parser import FIELDS, FlowKey, FlowSeries
+
+NETLINK_SOCK_DIAG = 4
+SOCK_DIAG_BY_FAMILY = 20
+NLM_F_REQUEST = 0x01
+NLM_F_DUMP = 0x300
+NLMSG_ERROR = 2
+NLMSG_DONE = 3
+
+INET_DIAG_INFO = 2
+INET_DIAG_CONG = 4
+INET_DIAG_REQ_BYTECODE = 1
+INET_DIAG_BC_S_GE = 2
+INET_DIAG_BC_S_LE = 3
+INET_DIAG_BC_D_GE = 4
+INET_DIAG_BC_D_LE = 5
+
+TCP_STATES = {
+    1: "ESTAB", 2: "SYN-SENT", 3: "SYN-RECV", 4: "FIN-WAIT-1", 5: "FIN-WAIT-2", 6: "TIME-WAIT",
+    7: "UNCONN", 8: "CLOSE-WAIT", 9: "LAST-ACK", 10: "LISTEN", 11: "CLOSING",
+}
+TCP_ESTABLISHED = 1
+TCP_INFINITE_SSTHRESH = 0x7FFFFFFF
+
+_NLMSGHDR = struct.Struct("=IHHII")
+_RTATTR = struct.Struct("=HH")
+_REQ_V2 = struct.Struct("=BBBxI")
+_SOCKID = struct.Struct("!HH16s16sI8s")  # ports and addresses are big-endian
+_DIAG_MSG = struct.Struct("=BBBB")
+_DIAG_MSG_LEN = _DIAG_MSG.size + _SOCKID.size + 20  # expires, rqueue, wqueue, uid, inode
+
+# struct tcp_info up to tcpi_bytes_sent (Linux >= 4.19); shorter replies from
+# older kernels are zero-padded.
+_TCP_INFO = struct.Struct("=8B24I4Q6IQ3Q2IQ")
+_TCP_INFO_INDEX = {
+    name: idx
+    for idx, name in enumerate(
+        ["state", "ca_state", "retransmits", "probes", "backoff", "options", "wscale", "app_limited",
+         "rto", "ato", "snd_mss", "rcv_mss", "unacked", "sacked", "lost", "retrans", "fackets",
+         "last_data_sent", "last_ack_sent", "last_data_recv", "last_ack_recv",
+         "pmtu", "rcv_ssthresh", "rtt", "rttvar", "snd_ssthresh", "snd_cwnd", "advmss", "reordering",
+         "rcv_rtt", "rcv_space", "total_retrans",
+         "pacing_rate", "max_pacing_rate", "bytes_acked", "bytes_received",
+         "segs_out", "segs_in", "notsent_bytes", "min_rtt", "data_segs_in", "data_segs_out",
+         "delivery_rate", "busy_time", "rwnd_limited", "sndbuf_limited",
+         "delivered", "delivered_ce", "bytes_sent"]
+    )
+}
+
+PortSpec = Union[int, Tuple[int, int]]  # one port or an inclusive (low, high) range
+
+LOG_MAGIC = "# sock_diag v1"
+PARSER_VERSION = 1  # bump when the parsed output changes so cached results are rebuilt
+LOG_COLUMNS: Tuple[str, ...] = (
+    "time", "local_addr", "local_port", "peer_addr", "peer_port", "state", "cong",
+) + FIELDS
+
+
+@dataclass
+class DiagRecord:
+    key: FlowKey
+    state: str
+    cong: str
+    values: Tuple[float, ...]  # one per ss_parser.FIELDS, in ss(8) units, NaN if unset
+
+    def as_line(self, timestamp: float) -> str:
+        local_addr, local_port, peer_addr, peer_port = self.key
+        values = "\t".join("nan" if v != v else repr(v) for v in self.values)
+        return f"{timestamp:.6f}\t{local_addr}\t{local_port}\t{peer_addr}\t{peer_port}\t{self.state}\t{self.cong}\t{values}\n"
+
+
+def _port_bytecode(conditions: Sequence[Tuple[int, int, int, int]]) -> bytes:
+    """inet_diag bytecode accepting sockets whose ports lie in every given range.
+
+    Each condition is (GE op, LE op, low, high) and compiles to `port >= low`
+    followed by `port <= high`; a failed comparison jumps past the end
+    (len + 4), which the kernel treats as reject.
+    """
+    length = 16 * len(conditions)
+    ops = []
+    for idx, (ge, le, low, high) in enumerate(conditions):
+        offset = 16 * idx
+        ops.append(struct.pack("=BBHBBH", ge, 8, length - offset + 4, 0, 0, low))
+        ops.append(struct.pack("=BBHBBH", le, 8, length - offset - 8 + 4, 0, 0, high))
+    return b"".join(ops)
+
+
+def _port_range(port: PortSpec) -> Tuple[int, int]:
+    return (port, port) if isinstance(port, int) else (port[0], port[1])
+
+
+def parse_port_range(text: str) -> Tuple[int, int]:
+    """`5201` or `5301-5308` (inclusive) from the command line."""
+    low, _, high = text.partition("-")
+    return int(low), int(high or low)
+
+
+_PICK = operator.itemgetter(
+    *(
+        _TCP_INFO_INDEX[name]
+        for name in (
+            "snd_cwnd", "snd_ssthresh", "rtt", "rttvar", "min_rtt", "bytes_sent", "bytes_acked",
+            "retrans", "total_retrans", "delivery_rate", "pacing_rate",
+        )
+    )
+)
+_NAN = float("nan")
+
+
+def _tcp_values(info: bytes) -> Tuple[float, ...]:
+    """Map tcp_info onto ss_parser.FIELDS in the units ss(8) prints."""
+    if len(info) < _TCP_INFO.size:
+        info = info + bytes(_TCP_INFO.size - len(info))
+    (cwnd, ssthresh, rtt, rttvar, min_rtt, bytes_sent, bytes_acked,
+     retrans, total_retrans, delivery_rate, pacing_rate) = _PICK(_TCP_INFO.unpack_from(info))
+    return (
+        float(cwnd),
+        float(ssthresh) if ssthresh < TCP_INFINITE_SSTHRESH else _NAN,
+        rtt / 1000.0 if rtt else _NAN,
+        rttvar / 1000.0 if rtt else _NAN,
+        min_rtt / 1000.0 if min_rtt else _NAN,
+        float(bytes_sent) if bytes_sent else _NAN,
+        float(bytes_acked) if bytes_acked else _NAN,
+        float(total_retrans) if total_retrans or retrans else _NAN,
+        delivery_rate * 8.0 if delivery_rate else _NAN,
+        pacing_rate * 8.0 if pacing_rate and pacing_rate != 0xFFFFFFFFFFFFFFFF else _NAN,
+    )
+
+
+class DiagSampler:
+    """Dump TCP sockets of the current netns over one reusable netlink socket.
+
+    dport/sport are filtered in the kernel with inet_diag bytecode; addresses
+    and extra ports are checked on the socket id before tcp_info is decoded.
+    """
+
+    def __init__(
+        self,
+        dport: Optional[PortSpec] = None,
+        sport: Optional[PortSpec] = None,
+        addrs: Optional[Sequence[str]] = None,
+        family: int = socket.AF_INET,
+        states: Iterable[int] = (TCP_ESTABLISHED,),
+    ):
+        self.dport = dport
+        self.sport = sport
+        self.addrs = set(addrs) if addrs else None
+        self.family = family
+        self.addr_len = 4 if family == socket.AF_INET else 16
+        self._sock = socket.socket(socket.AF_NETLINK, socket.SOCK_DGRAM, NETLINK_SOCK_DIAG)
+        self._sock.bind((0, 0))
+        self._seq = 0
+        self._request_body = self._build_request(states)
+
+    def close(self) -> None:
+        self._sock.close()
+
+    def __enter__(self) -> "DiagSampler":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def _build_request(self, states: Iterable[int]) -> bytes:
+        state_mask = 0
+        for state in states:
+            state_mask |= 1 << state
+        ext = (1 << (INET_DIAG_INFO - 1)) | (1 << (INET_DIAG_CONG - 1))
+        body = _REQ_V2.pack(self.family, socket.IPPROTO_TCP, ext, state_mask) + bytes(_SOCKID.size)
+        conditions = []
+        if self.dport is not None:
+            conditions.append((INET_DIAG_BC_D_GE, INET_DIAG_BC_D_LE, *_port_range(self.dport)))
+        if self.sport is not None:
+            conditions.append((INET_DIAG_BC_S_GE, INET_DIAG_BC_S_LE, *_port_range(self.sport)))
+        if conditions:
+            bytecode = _port_bytecode(conditions)
+            body += _RTATTR.pack(_RTATTR.size + len(bytecode), INET_DIAG_REQ_BYTECODE) + bytecode
+        return body
+
+    def sample(self) -> List[DiagRecord]:
+        self._seq += 1
+        header = _NLMSGHDR.pack(
+            _NLMSGHDR.size + len(self._request_body),
+            SOCK_DIAG_BY_FAMILY,
+            NLM_F_REQUEST | NLM_F_DUMP,
+            self._seq,
+            0,
+        )
+        self._sock.send(header + self._request_body)
+        records: List[DiagRecord] = []
+        while True:
+            data = self._sock.recv(1 << 17)
+            offset = 0
+            while offset + _NLMSGHDR.size <= len(data):
+                length, msg_type, _flags, seq, _pid = _NLMSGHDR.unpack_from(data, offset)
+                if length < _NLMSGHDR.size:
+                    return records
+                if msg_type == NLMSG_DONE:
+                    return records
+                if msg_type == NLMSG_ERROR:
+                    (errno,) = struct.unpack_from("=i", data, offset + _NLMSGHDR.size)
+                    if errno:
+                        raise OSError(-errno, os.strerror(-errno))
+                    return records
+                if seq == self._seq:
+                    record = self._decode(data, offset + _NLMSGHDR.size, offset + length)
+                    if record is not None:
+                        records.append(record)
+                offset += (length + 3) & ~3
+
+    def _decode(self, data: bytes, start: int, end: int) -> Optional[DiagRecord]:
+        family, state, _timer, _retrans = _DIAG_MSG.unpack_from(data, start)
+        sport, dport, src, dst, _ifindex, _cookie = _SOCKID.unpack_from(data, start + _DIAG_MSG.size)
+        local_addr = socket.inet_ntop(family, src[: self.addr_len])
+        peer_addr = socket.inet_ntop(family, dst[: self.addr_len])
+        if self.addrs is not None and local_addr not in self.addrs and peer_addr not in self.addrs:
+            return None
+
+        info = b""
+        cong = ""
+        offset = start + _DIAG_MSG_LEN
+        while offset + _RTATTR.size <= end:
+            attr_len, attr_type = _RTATTR.unpack_from(data, offset)
+            if attr_len < _RTATTR.size:
+                break
+            payload = data[offset + _RTATTR.size:offset + attr_len]
+            if attr_type == INET_DIAG_INFO:
+                info = payload
+            elif attr_type == INET_DIAG_CONG:
+                cong = payload.split(b"\0", 1)[0].decode()
+            offset += (attr_len + 3) & ~3
+        if not info:
+            return None
+        return DiagRecord(
+            key=(local_addr, sport, peer_addr, dport),
+            state=TCP_STATES.get(state, str(state)),
+            cong=cong or "-",
+            values=_tcp_values(info),
+        )
+
+
+def write_header(fh: TextIO) -> None:
+    fh.write(LOG_MAGIC + "\n")
+    fh.write("\t".join(LOG_COLUMNS) + "\n")
+
+
+def _ticks(interval: float, stop_event: threading.Event) -> Iterator[float]:
+    """Wall-clock times on a fixed grid (no drift) until stop_event is set, then once more."""
+    start = time.monotonic()
+    tick = 0
+    while True:
+        yield time.time()
+        if stop_event.is_set():
+            return
+        tick += 1
+        delay = start + tick * interval - time.monotonic()
+        if delay < 0:
+            # fell behind; skip the missed ticks instead of bursting
+            tick += int(-delay // interval) + 1
+            delay = start + tick * interval - time.monotonic()
+        stop_event.wait(max(delay, 0.0))
+
+
+def sample_loop(
+    sampler: DiagSampler,
+    log_path: Path,
+    stop_event: threading.Event,
+    interval: float = 0.01,
+    fmt: str = "text",
+) -> None:
+    """Sample on a fixed grid until stop_event is set, then once more.
+
+    fmt "text" writes the tab-separated log below; "bin" writes a
+    sample_store file (fixed records, written in chunks).
+    """
+    if fmt == "bin":
+        with SampleWriter(log_path, source="sock_diag") as writer:
+            for timestamp in _ticks(interval, stop_event):
+                for record in sampler.sample():
+                    writer.append(timestamp, record.key, record.state, record.values)
+        return
+    with log_path.open("w", buffering=1 << 16) as log_file:
+        write_header(log_file)
+        for timestamp in _ticks(interval, stop_event):
+            for record in sampler.sample():
+                log_file.write(record.as_line(timestamp))
+
+
+def parse_diag_log(path: Path, states: Optional[Sequence[str]] = ("ESTAB",)) -> Dict[FlowKey, FlowSeries]:
+    """Load a sock_diag log into the same per-flow tables as ss_parser."""
+    if not path.exists():
+        return {}
+    rows_by_flow: Dict[FlowKey, List[List[str]]] = {}
+    with path.open() as fh:
+        for line in fh:
+            if line.startswith("#") or line.startswith("time\t"):
+                continue
+            parts = line.rstrip("\n").split("\t")
+            if len(parts) != len(LOG_COLUMNS) or (states is not None and parts[5] not in states):
+                continue
+            key = (parts[1], int(parts[2]), parts[3], int(parts[4]))
+            rows_by_flow.setdefault(key, []).append([parts[0]] + parts[7:])
+
+    flows: Dict[FlowKey, FlowSeries] = {}
+    for key, rows in rows_by_flow.items():
+        table = np.array(rows, dtype=np.float64)
+        flows[key] = FlowSeries(
+            key, table[:, 0].copy(), {name: table[:, idx + 1].copy() for idx, name in enumerate(FIELDS)}
+        )
+    return flows
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Sample tcp_info over NETLINK_SOCK_DIAG.")
+    parser.add_argument("--out", type=Path, required=True)
+    parser.add_argument("--interval", type=float, default=0.01, help="seconds between samples (>= 0.01)")
+    parser.add_argument("--dport", type=parse_port_range, help="port or inclusive range, e.g. 5301-5308")
+    parser.add_argument("--sport", type=parse_port_range)
+    parser.add_argument("--addr", action="append", help="keep sockets with this local or peer address")
+    parser.add_argument("--ipv6", action="store_true")
+    parser.add_argument("--duration", type=float, help="stop after this many seconds")
+    parser.add_argument("--format", choices=("text", "bin"), default="text", help="bin: sample_store records")
+    args = parser.parse_args()
+
+    stop_event = threading.Event()
+    for signum in (signal.SIGTERM, signal.SIGINT):
+        signal.signal(signum, lambda *_: stop_event.set())
+    if args.duration is not None:
+        timer = threading.Timer(args.duration, stop_event.set)
+        timer.daemon = True
+        timer.start()
+
+    family = socket.AF_INET6 if args.ipv6 else socket.AF_INET
+    with DiagSampler(dport=args.dport, sport=args.sport, addrs=args.addr, family=family) as sampler:
+        sample_loop(sampler, args.out, stop_event, max(args.interval, 0.01), args.format)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,219 @@
+#!/usr/bin/env python3
+"""Single-pass parser for `ss -tin` dumps written by orchestrator.sample_ss.
+
+The line loop only classifies lines (timestamp, socket header, info line) and
+remembers which flow each info line belongs to. Every flow in the log is kept,
+keyed by its 4-tuple. Fields are pulled out column-wise: the first access to a
+field runs one regex scan over all info lines at once and converts the values
+in NumPy, so the per-line Python cost does not grow with the number of fields
+and fields nobody reads are never parsed. Missing values are NaN.
+"""
+
+from __future__ import annotations
+
+import re
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Mapping, Optional, Sequence, Tuple
+
+import numpy as np
+
+FlowKey = Tuple[str, int, str, int]  # (local_addr, local_port, peer_addr, peer_port)
+
+# Bump whenever the parsed output changes so cached results are rebuilt.
+PARSER_VERSION = 1
+
+# Each field is led by a literal needle that appears at most once per info
+# line. `rtt:<srtt>/<rttvar>` feeds two columns, `retrans:<outstanding>/<total>`
+# keeps the running total, and rates are printed as `pacing_rate 11617376bps`
+# (or `11.6Mbps` in human-readable mode).
+_FIELD_PATTERNS: Dict[str, Tuple[str, re.Pattern]] = {
+    "cwnd": (" cwnd:", re.compile(r" cwnd:(\d+)")),
+    "ssthresh": (" ssthresh:", re.compile(r" ssthresh:(\d+)")),
+    "rtt": (" rtt:", re.compile(r" rtt:([\d.]+)/")),
+    "rttvar": (" rtt:", re.compile(r" rtt:[\d.]+/([\d.]+)")),
+    "minrtt": (" minrtt:", re.compile(r" minrtt:([\d.]+)")),
+    "bytes_sent": (" bytes_sent:", re.compile(r" bytes_sent:(\d+)")),
+    "bytes_acked": (" bytes_acked:", re.compile(r" bytes_acked:(\d+)")),
+    "retrans": (" retrans:", re.compile(r" retrans:\d+/(\d+)")),
+    "delivery_rate": (" delivery_rate ", re.compile(r" delivery_rate ([\d.]+[KMG]?)bps")),
+    "pacing_rate": (" pacing_rate ", re.compile(r" pacing_rate ([\d.]+[KMG]?)bps")),
+}
+FIELDS: Tuple[str, ...] = tuple(_FIELD_PATTERNS)
+_RATE_SCALE = {"K": 1e3, "M": 1e6, "G": 1e9}
+
+
+def _to_float(values: List[str]) -> np.ndarray:
+    try:
+        return np.array(values, dtype=np.float64)
+    except ValueError:
+        # human-readable rates such as `11.6Mbps`
+        return np.array(
+            [float(v[:-1]) * _RATE_SCALE[v[-1]] if v[-1] in _RATE_SCALE else float(v) for v in values],
+            dtype=np.float64,
+        )
+
+
+class _InfoBlock:
+    """All kept info lines of one log, with lazily extracted full-length columns."""
+
+    def __init__(self, infos: List[str]):
+        self.infos = infos
+        self.block = "\n".join(infos)
+        self._columns: Dict[str, np.ndarray] = {}
+
+    def column(self, field: str) -> np.ndarray:
+        values = self._columns.get(field)
+        if values is None:
+            values = self._columns[field] = self._extract(*_FIELD_PATTERNS[field])
+        return values
+
+    def _extract(self, needle: str, pattern: re.Pattern) -> np.ndarray:
+        count = len(self.infos)
+        found = pattern.findall(self.block)
+        if len(found) == count:
+            # the field is on every line, so matches are already aligned
+            return _to_float(found)
+        out = np.full(count, np.nan)
+        if not found:
+            return out
+        present = np.fromiter((needle in info for info in self.infos), dtype=bool, count=count)
+        if int(present.sum()) != len(found):
+            # a needle without a parsable value; locate the matches themselves
+            lengths = np.fromiter((len(info) + 1 for info in self.infos), dtype=np.int64, count=count)
+            line_starts = np.cumsum(lengths) - lengths
+            starts = np.fromiter((m.start() for m in pattern.finditer(self.block)), dtype=np.int64)
+            present = np.searchsorted(line_starts, starts, side="right") - 1
+        out[present] = _to_float(found)
+        return out
+
+
+class _FlowColumns(Mapping):
+    """Read-only field -> array view of one flow's rows in a shared _InfoBlock."""
+
+    def __init__(self, block: _InfoBlock, rows: np.ndarray):
+        self._block = block
+        self._rows = rows
+        self._cache: Dict[str, np.ndarray] = {}
+
+    def __getitem__(self, field: str) -> np.ndarray:
+        values = self._cache.get(field)
+        if values is None:
+            values = self._cache[field] = self._block.column(field)[self._rows]
+        return values
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(FIELDS)
+
+    def __len__(self) -> int:
+        return len(FIELDS)
+
+
+class FlowSeries:
+    """Columnar samples of one flow: epoch timestamps plus one array per field."""
+
+    __slots__ = ("key", "times", "columns")
+
+    def __init__(self, key: FlowKey, times: np.ndarray, columns: Mapping[str, np.ndarray]):
+        self.key = key
+        self.times = times  # float64 epoch seconds
+        self.columns = columns  # float64, NaN when the sample lacks the field
+
+    def __len__(self) -> int:
+        return len(self.times)
+
+    def last_valid(self, field: str) -> Optional[float]:
+        values = self.columns[field]
+        valid = np.flatnonzero(~np.isnan(values))
+        return float(values[valid[-1]]) if valid.size else None
+
+
+def _split_endpoint(endpoint: str) -> Tuple[str, int]:
+    addr, _, port = endpoint.rpartition(":")
+    return addr.strip("[]"), int(port) if port.isdigit() else -1
+
+
+def _flow_key(local: str, peer: str) -> FlowKey:
+    local_addr, local_port = _split_endpoint(local)
+    peer_addr, peer_port = _split_endpoint(peer)
+    return (local_addr, local_port, peer_addr, peer_port)
+
+
+def parse_ss_lines(
+    lines: Iterable[str], states: Optional[Sequence[str]] = ("ESTAB",)
+) -> Dict[FlowKey, FlowSeries]:
+    """Parse an ss(8) dump into one FlowSeries per 4-tuple.
+
+    Only records whose state is listed in states are kept; pass states=None to
+    keep SYN-SENT/FIN-WAIT records as well.
+    """
+    infos: List[str] = []
+    stamps: List[str] = []
+    flow_ids: List[int] = []
+    flow_index: Dict[Tuple[str, str], int] = {}
+    flow_keys: List[FlowKey] = []
+
+    timestamp: Optional[str] = None
+    current = -1
+    for raw_line in lines:
+        first = raw_line[:1]
+        if first == "\t" or first == " ":
+            if current >= 0 and timestamp is not None:
+                infos.append(raw_line.rstrip("\n"))
+                stamps.append(timestamp)
+                flow_ids.append(current)
+            current = -1
+            continue
+        line = raw_line.strip()
+        if not line or line == "--" or line.startswith("State"):
+            current = -1
+            continue
+        if line[0].isdigit() and line.replace(".", "", 1).isdigit():
+            timestamp = line
+            current = -1
+            continue
+        parts = line.split()
+        if len(parts) < 5 or (states is not None and parts[0] not in states):
+            current = -1
+            continue
+        endpoints = (parts[3], parts[4])
+        current = flow_index.get(endpoints, -1)
+        if current < 0:
+            current = flow_index[endpoints] = len(flow_keys)
+            flow_keys.append(_flow_key(*endpoints))
+
+    if not infos:
+        return {}
+
+    block = _InfoBlock(infos)
+    times = np.array(stamps, dtype=np.float64)
+    ids = np.array(flow_ids, dtype=np.int64)
+    order = np.argsort(ids, kind="stable")
+    bounds = np.searchsorted(ids[order], np.arange(len(flow_keys) + 1))
+
+    flows: Dict[FlowKey, FlowSeries] = {}
+    for flow_id, key in enumerate(flow_keys):
+        rows = order[bounds[flow_id]:bounds[flow_id + 1]]
+        flows[key] = FlowSeries(key, times[rows], _FlowColumns(block, rows))
+    return flows
+
+
+def parse_ss_log(path: Path, states: Optional[Sequence[str]] = ("ESTAB",)) -> Dict[FlowKey, FlowSeries]:
+    if not path.exists():
+        return {}
+    with path.open() as fh:
+        return parse_ss_lines(fh, states)
+
+
+def select_primary_flow(flows: Dict[FlowKey, FlowSeries]) -> Optional[FlowKey]:
+    """Pick the flow that sent the most bytes (the iperf3 data connection)."""
+    best_key = None
+    best_metric = -np.inf
+    for key, series in flows.items():
+        last_bytes = series.last_valid("bytes_sent")
+        if last_bytes is not None and last_bytes > best_metric:
+            best_metric = last_bytes
+            best_key = key
+    if best_key is None and flows:
+        # fall back to the flow with the longest sample list
+        best_key = max(flows, key=lambda k: len(flows[k]))
+    return best_key
@@ -0,0 +1,180 @@
+#!/usr/bin/env python3
+"""
+Parameter sweeps over declarative scenarios, run in parallel and resumable.
+
+A sweep file is JSON:
+
+    {
+      "base": "scenario1_basic_aimd",          # or a full ScenarioSpec dict
+      "grid": {"links.*.bw": [10, 50, 100], "links.*.loss": [0, 1, 5]}
+    }
+
+Every grid point is one ScenarioSpec whose results live in
+`<out>/<config hash>/` (spec.json, summary.json and the raw logs). A point
+with a summary.json is complete and skipped on the next run, so an interrupted
+sweep resumes where it stopped. Points run in a process pool; each worker
+prefixes its Mininet node names with its own slot id so concurrent topologies
+never share interface or bridge names, and keeps its topology alive between
+points (topology_pool.TopologyPool), only reconfiguring the links. Run with
+sudo, like run_scenarios.py. `--trace DIR` records every worker's phases into
+one Chrome trace (tracing.py).
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import multiprocessing
+import os
+import traceback
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+import tracing
+from artifacts import BASE_DIR
+from scenario_spec import SCENARIO_SPECS, ScenarioSpec, expand_grid
+
+_SLOT: Optional[int] = None
+_POOL = None  # this worker's TopologyPool
+
+
+def load_sweep(path: Path) -> List[ScenarioSpec]:
+    data = json.loads(path.read_text())
+    base = data["base"]
+    base_spec = SCENARIO_SPECS[base] if isinstance(base, str) else ScenarioSpec.from_dict(base)
+    return expand_grid(base_spec, data.get("grid", {}))
+
+
+def point_dir(out_dir: Path, spec: ScenarioSpec) -> Path:
+    return out_dir / spec.config_hash()
+
+
+def is_complete(out_dir: Path, spec: ScenarioSpec) -> bool:
+    return (point_dir(out_dir, spec) / "summary.json").exists()
+
+
+def write_json(path: Path, data) -> None:
+    tmp = path.with_suffix(path.suffix + ".tmp")
+    tmp.write_text(json.dumps(data, indent=2))
+    os.replace(tmp, path)
+
+
+def _init_worker(slots) -> None:
+    global _SLOT
+    _SLOT = slots.get()
+
+
+def _run_point(spec_data: dict, directory: str, backend: Optional[str] = None) -> dict:
+    # imported here so planning and --dry-run work without Mininet
+    import run_scenarios
+
+    if (backend or run_scenarios.NET_BACKEND) == "mininet":
+        from mininet.log import setLogLevel
+
+        setLogLevel("warning")
+    global _POOL
+    if _POOL is None:
+        from multiprocessing.util import Finalize
+
+        from topology_pool import TopologyPool
+
+        _POOL = TopologyPool(backend, prefix=f"p{_SLOT}")
+        Finalize(_POOL, _close_pool, args=(_POOL,), exitpriority=10)
+    spec = ScenarioSpec.from_dict(spec_data)
+    directory = Path(directory)
+    summary = run_scenarios.run_spec(spec, log_dir=directory / "logs", pool=_POOL)
+    write_json(directory / "summary.json", summary)
+    return summary
+
+
+def _close_pool(pool) -> None:
+    pool.close()
+    print(f"worker {_SLOT}: {pool.report()}")
+
+
+def run_points(points: List[Tuple[ScenarioSpec, Path]], workers: int = 1, backend: Optional[str] = None) -> None:
+    """Run each (spec, directory) in a worker pool, submitted in the given order.
+
+    A point's summary.json lands in its directory; a failure leaves error.txt
+    there instead and does not stop the others.
+    """
+    if not points:
+        return
+    ctx = multiprocessing.get_context("fork")
+    slots = ctx.Queue()
+    for slot in range(1, workers + 1):
+        slots.put(slot)
+    with ProcessPoolExecutor(
+        max_workers=workers, mp_context=ctx, initializer=_init_worker, initargs=(slots,)
+    ) as pool:
+        futures = {
+            pool.submit(_run_point, spec.to_dict(), str(directory), backend): (spec, directory)
+            for spec, directory in points
+        }
+        for future in as_completed(futures):
+            spec, directory = futures[future]
+            error_path = directory / "error.txt"
+            try:
+                future.result()
+            except Exception:
+                error_path.write_text(traceback.format_exc())
+                print(f"FAILED {spec.name} (see {error_path})")
+            else:
+                if error_path.exists():
+                    error_path.unlink()
+                print(f"Completed {spec.name}")
+
+
+def run_sweep(
+    specs: List[ScenarioSpec], out_dir: Path, workers: int = 1, backend: Optional[str] = None
+) -> List[dict]:
+    """Run every incomplete point and return all summaries in grid order."""
+    out_dir.mkdir(parents=True, exist_ok=True)
+    pending = []
+    for spec in specs:
+        directory = point_dir(out_dir, spec)
+        directory.mkdir(exist_ok=True)
+        write_json(directory / "spec.json", spec.to_dict())
+        if not is_complete(out_dir, spec):
+            pending.append(spec)
+    print(f"{len(specs) - len(pending)}/{len(specs)} points cached, running {len(pending)}")
+    # points with the same hosts back to back, so workers reconfigure rather than rebuild
+    pending.sort(key=lambda spec: sorted(spec.hosts))
+
+    run_points([(spec, point_dir(out_dir, spec)) for spec in pending], workers, backend)
+
+    summaries = []
+    for spec in specs:
+        summary_path = point_dir(out_dir, spec) / "summary.json"
+        if summary_path.exists():
+            summary = json.loads(summary_path.read_text())
+            summary["config_hash"] = spec.config_hash()
+            summaries.append(summary)
+    write_json(out_dir / "sweep_summary.json", summaries)
+    return summaries
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Run a scenario parameter sweep.")
+    parser.add_argument("sweep", type=Path, help="sweep definition (JSON)")
+    parser.add_argument("--out", type=Path, help="results directory (default: <data dir>/sweeps/<sweep name>)")
+    parser.add_argument("--workers", type=int, default=max(1, (os.cpu_count() or 2) // 2))
+    parser.add_argument("--backend", choices=("mininet", "local"), help="network backend (default: mininet)")
+    parser.add_argument("--dry-run", action="store_true", help="list points and their cache state")
+    tracing.add_arguments(parser)
+    args = parser.parse_args()
+
+    specs = load_sweep(args.sweep)
+    out_dir = args.out or BASE_DIR / "sweeps" / args.sweep.stem
+    if args.dry_run:
+        for spec in specs:
+            state = "done" if is_complete(out_dir, spec) else "todo"
+            print(f"{state}  {spec.config_hash()}  {spec.name}")
+        return
+    with tracing.session(args.trace, args.profile):
+        run_sweep(specs, out_dir, args.workers, args.backend)
+
+
+if __name__ == "__main__":
+    main()
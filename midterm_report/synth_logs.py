@@ -0,0 +1,368 @@
+#!/usr/bin/env python3
+"""Synthetic monitor logs and iperf3 client JSON at any scale.
+
+The recorded scenarios give five small logs. To see how parsing, alignment,
+analysis and plotting behave at 1000 flows or over an hour, generate() plays
+one iperf3 client with `-P flows` parallel streams over a shared drop-tail
+bottleneck and writes what the pipeline would have recorded:
+
+- the cwnd log, as `ss -tin` text (orchestrator.sample_ss) or as a sample
+  store (sample_store.py), one sample of every flow per `interval`, plus the
+  iperf3 control connection;
+- the iperf3 `-J` client log: one-second intervals per stream, end sums,
+  and start.timestamp.timesecs a fraction of a second before the first
+  sample, so align.py has something to do.
+
+The model is coarse Reno, vectorised over flows and advanced one sampling
+interval at a time:
+
+- the window grows by 2^(dt/RTT) in slow start and by dt/RTT per interval
+  after it;
+- the RTT is the base RTT plus the bottleneck queue that the windows fill
+  beyond the BDP;
+- a flow's rate is cwnd / RTT, scaled down to the link capacity.
+
+Losses halve the window. A queue overflow hits about half of the flows, and
+`loss` adds one of these patterns:
+
+    none             queue overflows only
+    random:<p>       each packet is lost with probability p
+    burst:<p>        each flow enters a loss burst with probability p per
+                     sample; a burst lasts 2-4 samples and starts with
+                     an RTO (cwnd back to 1)
+    periodic:<s>     every flow loses a packet every s seconds
+
+It does not reproduce TCP exactly. It gives the logs realistic shape, field
+coverage and volume.
+
+    python3 synth_logs.py /tmp/synth --flows 1000 --duration 120 --interval 0.5 --loss random:1e-5
+    python3 synth_logs.py /tmp/synth --flows 10 --duration 3600 --format text
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+from sample_store import SampleWriter
+from ss_parser import FIELDS, FlowKey
+
+MSS = 1448
+CLIENT = "10.0.0.1"
+SERVER = "10.0.0.2"
+SERVER_PORT = 5201
+LOSS_KINDS = ("none", "random", "burst", "periodic")
+SS_HEADER = "State    Recv-Q Send-Q Local Address:Port  Peer Address:PortProcess"
+
+
+@dataclass(frozen=True)
+class SynthConfig:
+    flows: int = 1
+    duration: int = 60  # iperf3 -t, seconds
+    interval: float = 0.5  # seconds between monitor samples
+    loss: str = "none"  # see the module docstring
+    bandwidth: float = 10.0  # Mbps, shared bottleneck
+    rtt: float = 20.0  # ms, base RTT
+    queue: int = 100  # packets of bottleneck buffer
+    seed: int = 0
+    epoch: int = 1_700_000_000  # whole second the test starts in
+
+    def loss_pattern(self) -> Tuple[str, float]:
+        kind, _, value = self.loss.partition(":")
+        if kind not in LOSS_KINDS or (kind != "none") != bool(value):
+            raise ValueError(f"loss must be none, random:<p>, burst:<p> or periodic:<s>, not {self.loss!r}")
+        return kind, float(value) if value else 0.0
+
+
+class _Reno:
+    """Window, counters and RTT of every flow, advanced one sampling interval per step()."""
+
+    def __init__(self, config: SynthConfig, rng: np.random.Generator):
+        self.config = config
+        self.rng = rng
+        self.kind, self.param = config.loss_pattern()
+        n = config.flows
+        self.capacity = config.bandwidth * 1e6 / 8  # bytes per second
+        self.bdp = self.capacity * config.rtt / 1e3 / MSS  # packets
+        self.cwnd = np.full(n, 10.0)
+        self.ssthresh = np.full(n, np.inf)
+        self.sent = np.zeros(n)
+        self.acked = np.zeros(n)
+        self.retrans = np.zeros(n)
+        self.rtt = np.full(n, config.rtt)
+        self.rttvar = np.full(n, config.rtt / 2)
+        self.minrtt = np.full(n, np.inf)
+        self.rate = np.zeros(n)  # bytes per second over the last step
+        self.burst = np.zeros(n, dtype=np.int64)  # samples left in a loss burst
+        self.phase = rng.uniform(0.0, max(self.param, 1e-9), n) if self.kind == "periodic" else None
+
+    def step(self, now: float, dt: float) -> None:
+        config, rng = self.config, self.rng
+        n = config.flows
+        queued = np.clip(self.cwnd.sum() - self.bdp, 0.0, config.queue)
+        rtt = config.rtt + queued * MSS / self.capacity * 1e3 + rng.exponential(0.02 * config.rtt, n)
+        self.rttvar = 0.75 * self.rttvar + 0.25 * np.abs(rtt - self.rtt)
+        self.rtt = rtt
+        self.minrtt = np.minimum(self.minrtt, rtt)
+        rate = self.cwnd * MSS / (rtt / 1e3)
+        if rate.sum() > self.capacity:
+            rate *= self.capacity / rate.sum()
+        self.rate = rate
+        self.sent += rate * dt
+        self.acked = np.maximum(self.acked, self.sent - self.cwnd * MSS)
+
+        rtts = dt / (rtt / 1e3)
+        slow = self.cwnd < self.ssthresh
+        grown = np.where(slow, np.minimum(self.cwnd * 2.0 ** np.minimum(rtts, 30.0), self.ssthresh), self.cwnd + rtts)
+        self.cwnd = np.minimum(grown, 2 * (self.bdp + config.queue) + 10)
+
+        lost = np.zeros(n, dtype=bool)
+        if self.cwnd.sum() > self.bdp + config.queue:
+            lost |= rng.random(n) < 0.5
+            lost[np.argmax(self.cwnd)] = True
+        rto = np.zeros(n, dtype=bool)
+        if self.kind == "random":
+            packets = rate * dt / MSS
+            lost |= rng.random(n) < -np.expm1(packets * np.log1p(-self.param))
+        elif self.kind == "burst":
+            entering = (self.burst == 0) & (rng.random(n) < self.param)
+            self.burst[entering] = rng.integers(2, 5, int(entering.sum()))
+            lost |= self.burst > 0
+            self.burst[self.burst > 0] -= 1
+            rto = entering  # the burst's first loss times out
+        elif self.kind == "periodic":
+            lost |= np.floor((now + dt - self.phase) / self.param) > np.floor((now - self.phase) / self.param)
+
+        self.retrans += lost * rng.integers(1, 4, n)
+        self.ssthresh = np.where(lost, np.maximum(self.cwnd / 2, 2.0), self.ssthresh)
+        self.cwnd = np.where(rto, 1.0, np.where(lost, self.ssthresh, self.cwnd))
+
+    def columns(self) -> Dict[str, np.ndarray]:
+        """The current sample of every flow, as ss_parser.FIELDS columns (NaN where ss would omit the field)."""
+        return {
+            "cwnd": np.floor(self.cwnd),
+            "ssthresh": np.where(np.isinf(self.ssthresh), np.nan, np.floor(self.ssthresh)),
+            "rtt": self.rtt,
+            "rttvar": self.rttvar,
+            "minrtt": self.minrtt,
+            "bytes_sent": np.floor(self.sent),
+            "bytes_acked": np.floor(self.acked),
+            "retrans": np.where(self.retrans > 0, self.retrans, np.nan),
+            "delivery_rate": np.floor(self.rate * 8),
+            "pacing_rate": np.floor(np.where(self.cwnd < self.ssthresh, 2.0, 1.2) * self.cwnd * MSS * 8e3 / self.rtt),
+        }
+
+
+def _ss_block(timestamp: float, keys: List[FlowKey], columns: Dict[str, np.ndarray], control: str) -> str:
+    """One sample of `ss -tin` text: timestamp, header, control connection, one record per flow, `--`."""
+    lines = [f"{timestamp:.6f}", SS_HEADER, control]
+    values = {name: column.tolist() for name, column in columns.items()}
+    for idx, (_, port, _, _) in enumerate(keys):
+        cwnd = int(values["cwnd"][idx])
+        rtt, rttvar = values["rtt"][idx], values["rttvar"][idx]
+        sent, acked = int(values["bytes_sent"][idx]), int(values["bytes_acked"][idx])
+        ssthresh = values["ssthresh"][idx]
+        retrans = values["retrans"][idx]
+        lines.append(f"ESTAB 0      {sent - acked:<11d} {CLIENT}:{port}     {SERVER}:{SERVER_PORT}")
+        lines.append(
+            f"\t reno wscale:9,9 rto:{max(200, int(rtt + 4 * rttvar))} rtt:{rtt:.3f}/{rttvar:.3f} ato:40 "
+            f"mss:{MSS} pmtu:1500 rcvmss:536 advmss:{MSS} cwnd:{cwnd}"
+            + ("" if ssthresh != ssthresh else f" ssthresh:{int(ssthresh)}")
+            + f" bytes_sent:{sent} bytes_acked:{acked} segs_out:{sent // MSS + 3} segs_in:{acked // MSS + 2} "
+            f"data_segs_out:{sent // MSS} send {int(cwnd * MSS * 8e3 / rtt)}bps "
+            f"pacing_rate {int(values['pacing_rate'][idx])}bps delivery_rate {int(values['delivery_rate'][idx])}bps "
+            f"delivered:{acked // MSS} unacked:{cwnd}"
+            + ("" if retrans != retrans else f" retrans:0/{int(retrans)}")
+            + f" rcv_space:14480 rcv_ssthresh:42242 minrtt:{values['minrtt'][idx]:.3f} snd_wnd:1307648"
+        )
+    lines.append("--")
+    return "\n".join(lines) + "\n"
+
+
+def _iperf_document(
+    config: SynthConfig,
+    start: float,
+    ports: List[int],
+    boundaries: Dict[str, np.ndarray],
+    model: _Reno,
+    max_cwnd: np.ndarray,
+    rtt_stats: Tuple[np.ndarray, np.ndarray, np.ndarray],
+) -> dict:
+    """The iperf3 -J client document from per-stream counters at each whole second."""
+    n = config.flows
+    sockets = list(range(5, 5 + n))
+    sent = np.diff(boundaries["sent"], axis=0)
+    retrans = np.diff(boundaries["retrans"], axis=0).astype(np.int64)
+    intervals = []
+    for second in range(config.duration):
+        begin, end = float(second), float(second + 1)
+        row_bytes = sent[second].astype(np.int64).tolist()
+        row_retrans = retrans[second].tolist()
+        row_cwnd = (boundaries["cwnd"][second + 1] * MSS).astype(np.int64).tolist()
+        row_rtt = (boundaries["rtt"][second + 1] * 1e3).astype(np.int64).tolist()
+        streams = [
+            {"socket": sockets[idx], "start": begin, "end": end, "seconds": 1.0, "bytes": row_bytes[idx],
+             "bits_per_second": row_bytes[idx] * 8.0, "retransmits": row_retrans[idx], "snd_cwnd": row_cwnd[idx],
+             "snd_wnd": 1307648, "rtt": row_rtt[idx], "rttvar": row_rtt[idx] // 8, "pmtu": 1500, "omitted": False,
+             "sender": True}
+            for idx in range(n)
+        ]
+        total = sum(row_bytes)
+        intervals.append({
+            "streams": streams,
+            "sum": {"start": begin, "end": end, "seconds": 1.0, "bytes": total, "bits_per_second": total * 8.0,
+                    "retransmits": sum(row_retrans), "omitted": False, "sender": True},
+        })
+    duration = float(config.duration)
+    total_sent = boundaries["sent"][-1].astype(np.int64).tolist()
+    total_acked = np.minimum(model.acked, boundaries["sent"][-1]).astype(np.int64).tolist()
+    total_retrans = boundaries["retrans"][-1].astype(np.int64).tolist()
+    min_rtt, max_rtt, mean_rtt = ((values * 1e3).astype(np.int64).tolist() for values in rtt_stats)
+    end_streams = [
+        {
+            "sender": {"socket": sockets[idx], "start": 0, "end": duration, "seconds": duration,
+                       "bytes": total_sent[idx], "bits_per_second": total_sent[idx] * 8 / duration,
+                       "retransmits": total_retrans[idx], "max_snd_cwnd": int(max_cwnd[idx] * MSS),
+                       "max_rtt": max_rtt[idx], "min_rtt": min_rtt[idx], "mean_rtt": mean_rtt[idx], "sender": True},
+            "receiver": {"socket": sockets[idx], "start": 0, "end": duration, "seconds": duration,
+                         "bytes": total_acked[idx], "bits_per_second": total_acked[idx] * 8 / duration,
+                         "sender": True},
+        }
+        for idx in range(n)
+    ]
+    return {
+        "start": {
+            "connected": [
+                {"socket": sockets[idx], "local_host": CLIENT, "local_port": ports[idx], "remote_host": SERVER,
+                 "remote_port": SERVER_PORT}
+                for idx in range(n)
+            ],
+            "version": "iperf 3.16 (synthetic)",
+            "timestamp": {"timesecs": int(start)},
+            "connecting_to": {"host": SERVER, "port": SERVER_PORT},
+            "tcp_mss_default": MSS,
+            "test_start": {"protocol": "TCP", "num_streams": n, "blksize": 131072, "omit": 0,
+                           "duration": config.duration, "bytes": 0, "blocks": 0, "reverse": 0},
+        },
+        "intervals": intervals,
+        "end": {
+            "streams": end_streams,
+            "sum_sent": {"start": 0, "end": duration, "seconds": duration, "bytes": sum(total_sent),
+                         "bits_per_second": sum(total_sent) * 8 / duration, "retransmits": sum(total_retrans),
+                         "sender": True},
+            "sum_received": {"start": 0, "end": duration, "seconds": duration, "bytes": sum(total_acked),
+                             "bits_per_second": sum(total_acked) * 8 / duration, "sender": True},
+            "sender_tcp_congestion": "reno",
+            "receiver_tcp_congestion": "reno",
+        },
+    }
+
+
+def generate(config: SynthConfig, cwnd_log: Path, client_log: Path, fmt: str = "text") -> int:
+    """Write the cwnd log (fmt "text" or "bin") and iperf3 client JSON of one run; returns the samples written.
+
+    Memory stays at a few arrays per flow plus the per-second counters, so
+    hour-long runs do not need their samples in memory.
+    """
+    config.loss_pattern()  # validate before writing anything
+    rng = np.random.default_rng(config.seed)
+    model = _Reno(config, rng)
+    n = config.flows
+    first_port = 45000 + int(rng.integers(0, 10000))
+    control_port, ports = first_port, [first_port + 1 + idx for idx in range(n)]
+    keys: List[FlowKey] = [(CLIENT, port, SERVER, SERVER_PORT) for port in ports]
+    control_key: FlowKey = (CLIENT, control_port, SERVER, SERVER_PORT)
+    control_line = (
+        f"ESTAB 0      0           {CLIENT}:{control_port}     {SERVER}:{SERVER_PORT}\n"
+        f"\t reno wscale:9,9 rto:204 rtt:{config.rtt:.3f}/{config.rtt / 4:.3f} ato:40 mss:{MSS} pmtu:1500 "
+        f"rcvmss:536 advmss:{MSS} cwnd:10 bytes_sent:165 bytes_acked:166 bytes_received:4 segs_out:8 segs_in:6 "
+        f"data_segs_out:3 data_segs_in:3 send 5792000bps app_limited rcv_space:14480 minrtt:{config.rtt:.3f}"
+    )
+    control_columns = {name: np.full(1, np.nan) for name in FIELDS}
+    control_columns.update(cwnd=np.full(1, 10.0), rtt=np.full(1, config.rtt), minrtt=np.full(1, config.rtt),
+                           bytes_sent=np.full(1, 165.0), bytes_acked=np.full(1, 166.0))
+
+    start = config.epoch + float(rng.uniform(0.05, 0.95))
+    steps = max(1, int(round(config.duration / config.interval)))
+    seconds = config.duration + 1
+    boundaries = {name: np.zeros((seconds, n)) for name in ("sent", "retrans", "cwnd", "rtt")}
+    boundaries["cwnd"][0] = model.cwnd
+    boundaries["rtt"][0] = model.rtt
+    max_cwnd = model.cwnd.copy()
+    rtt_sum = np.zeros(n)
+    rtt_max = np.zeros(n)
+
+    text = fmt == "text"
+    if fmt not in ("text", "bin"):
+        raise ValueError(f"format must be text or bin, not {fmt!r}")
+    out = cwnd_log.open("w") if text else SampleWriter(cwnd_log, chunk_records=max(4096, 8 * (n + 1)), source="ss")
+    try:
+        for step in range(steps):
+            now, end = config.duration * step / steps, config.duration * (step + 1) / steps
+            prev_sent = model.sent.copy()
+            model.step(now, end - now)
+            max_cwnd = np.maximum(max_cwnd, model.cwnd)
+            rtt_sum += model.rtt
+            rtt_max = np.maximum(rtt_max, model.rtt)
+            # per-stream counters at each whole second inside this step (rates are constant within it)
+            for second in range(int(now) + 1, int(end) + 1):
+                frac = (second - now) / (end - now)
+                boundaries["sent"][second] = prev_sent + frac * (model.sent - prev_sent)
+                boundaries["retrans"][second] = model.retrans
+                boundaries["cwnd"][second] = model.cwnd
+                boundaries["rtt"][second] = model.rtt
+            timestamp = start + end + float(rng.uniform(0.0, 0.002))
+            columns = model.columns()
+            if text:
+                out.write(_ss_block(timestamp, keys, columns, control_line))
+            else:
+                out.append_many(timestamp, [control_key], "ESTAB", control_columns)
+                out.append_many(timestamp, keys, "ESTAB", columns)
+    finally:
+        out.close()
+
+    document = _iperf_document(
+        config, start, ports, boundaries, model, max_cwnd, (model.minrtt, rtt_max, rtt_sum / steps)
+    )
+    client_log.write_text(json.dumps(document))
+    return steps * (n + 1)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Write synthetic ss/sample-store cwnd logs and iperf3 JSON.")
+    parser.add_argument("out", type=Path, help="directory for <label>_cwnd.log and <label>_client.json")
+    parser.add_argument("--label", default="flow")
+    parser.add_argument("--flows", type=int, default=SynthConfig.flows)
+    parser.add_argument("--duration", type=int, default=SynthConfig.duration, help="seconds (iperf3 -t)")
+    parser.add_argument("--interval", type=float, default=SynthConfig.interval, help="seconds between samples")
+    parser.add_argument("--loss", default=SynthConfig.loss, help="none, random:<p>, burst:<p> or periodic:<s>")
+    parser.add_argument("--bandwidth", type=float, default=SynthConfig.bandwidth, help="Mbps")
+    parser.add_argument("--rtt", type=float, default=SynthConfig.rtt, help="base RTT (ms)")
+    parser.add_argument("--queue", type=int, default=SynthConfig.queue, help="packets")
+    parser.add_argument("--seed", type=int, default=SynthConfig.seed)
+    parser.add_argument("--format", choices=("text", "bin"), default="bin", help="cwnd log as ss text or sample store")
+    args = parser.parse_args()
+
+    config = SynthConfig(
+        flows=args.flows, duration=args.duration, interval=args.interval, loss=args.loss,
+        bandwidth=args.bandwidth, rtt=args.rtt, queue=args.queue, seed=args.seed,
+    )
+    try:
+        config.loss_pattern()
+    except ValueError as exc:
+        parser.error(str(exc))
+    args.out.mkdir(parents=True, exist_ok=True)
+    cwnd_log = args.out / f"{args.label}_cwnd.log"
+    client_log = args.out / f"{args.label}_client.json"
+    samples = generate(config, cwnd_log, client_log, args.format)
+    print(f"{samples} samples -> {cwnd_log} ({cwnd_log.stat().st_size / 2**20:.1f} MiB), "
+          f"{client_log} ({client_log.stat().st_size / 2**20:.1f} MiB)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,246 @@
+#!/usr/bin/env python3
+"""Per-ACK cwnd tracing from the kernel `tcp:tcp_probe` tracepoint.
+
+Polling ss(8) or sock_diag every few hundred milliseconds misses most of the
+Reno sawtooth; tcp_probe fires for every incoming segment of a TCP socket. The
+tracepoint is global (Mininet hosts share one kernel), so a single process-wide
+session owns it: subscriptions register destination port ranges, the session installs
+a matching event filter in the kernel, reads `trace_pipe` in large chunks,
+decodes each chunk with one regex pass and appends every cwnd/ssthresh/srtt
+change to the subscriber's log. Needs root and tracefs.
+"""
+
+from __future__ import annotations
+
+import os
+import re
+import select
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, TextIO, Tuple
+
+import numpy as np
+
+from ss_parser import FIELDS, FlowKey, FlowSeries
+
+TRACEFS_CANDIDATES = (Path("/sys/kernel/tracing"), Path("/sys/kernel/debug/tracing"))
+EVENT_DIR = Path("events/tcp/tcp_probe")
+TCP_INFINITE_SSTHRESH = 2147483647
+
+LOG_MAGIC = "# tcp_probe v1"
+PARSER_VERSION = 1  # bump when the parsed output changes so cached results are rebuilt
+LOG_COLUMNS: Tuple[str, ...] = (
+    "time_ns", "local_addr", "local_port", "peer_addr", "peer_port", "cwnd", "ssthresh", "srtt_us",
+)
+
+# `<task>-<pid> [cpu] <flags> <secs>.<usecs>: tcp_probe: family=AF_INET
+#  src=10.0.0.1:55034 dest=10.0.0.2:5201 ... snd_cwnd=10 ssthresh=... snd_wnd=... srtt=...`
+_EVENT_RE = re.compile(
+    r"(\d+)\.(\d+): tcp_probe: family=\S+ src=\[?([^\s\]]+?)\]?:(\d+) dest=\[?([^\s\]]+?)\]?:(\d+) "
+    r"[^\n]*?snd_cwnd=(\d+) ssthresh=(\d+) [^\n]*?srtt=(\d+)"
+)
+_READ_SIZE = 1 << 20
+
+
+def find_tracefs() -> Path:
+    for candidate in TRACEFS_CANDIDATES:
+        if (candidate / EVENT_DIR).exists():
+            return candidate
+    raise FileNotFoundError("tracefs with tcp:tcp_probe not found (mount tracefs and run as root)")
+
+
+class ProbeSubscription:
+    """Change-only tcp_probe records for connections towards a port range."""
+
+    def __init__(
+        self, session: "ProbeSession", ports: Tuple[int, int], log_path: Path, addrs: Optional[Sequence[str]]
+    ):
+        self.session = session
+        self.ports = ports  # inclusive (low, high)
+        self.addrs = set(addrs) if addrs else None
+        self._log: TextIO = log_path.open("w", buffering=1 << 16)
+        self._log.write(LOG_MAGIC + "\n" + "\t".join(LOG_COLUMNS) + "\n")
+        self._last: Dict[FlowKey, Tuple[str, str, str]] = {}
+        self._lock = threading.Lock()
+
+    def write(self, events: List[tuple], clock_offset_ns: int) -> None:
+        with self._lock:
+            if not self._log.closed:
+                self._write(events, clock_offset_ns)
+
+    def _write(self, events: List[tuple], clock_offset_ns: int) -> None:
+        last = self._last
+        lines = []
+        for secs, usecs, src, sport, dst, dport, cwnd, ssthresh, srtt in events:
+            if self.addrs is not None and src not in self.addrs and dst not in self.addrs:
+                continue
+            key = (src, sport, dst, dport)
+            state = (cwnd, ssthresh, srtt)
+            if last.get(key) == state:
+                continue
+            last[key] = state
+            time_ns = int(secs) * 1_000_000_000 + int(usecs.ljust(9, "0")[:9]) + clock_offset_ns
+            lines.append(f"{time_ns}\t{src}\t{sport}\t{dst}\t{dport}\t{cwnd}\t{ssthresh}\t{srtt}\n")
+        self._log.writelines(lines)
+
+    def close(self) -> None:
+        self.session.unsubscribe(self)
+        with self._lock:
+            self._log.close()
+
+
+class ProbeSession:
+    """Owner of the tcp_probe tracepoint; started on first subscribe."""
+
+    def __init__(self, tracefs: Optional[Path] = None):
+        self.tracefs = tracefs
+        self._subs: List[ProbeSubscription] = []
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self._saved: Dict[str, str] = {}
+        self._clock_offset_ns = 0
+
+    def _event_file(self, name: str) -> Path:
+        return self.tracefs / EVENT_DIR / name
+
+    def _apply_filter(self) -> None:
+        terms = []
+        for low, high in sorted({sub.ports for sub in self._subs}):
+            terms.append(f"dport == {low}" if low == high else f"(dport >= {low} && dport <= {high})")
+        self._event_file("filter").write_text((" || ".join(terms) or "0") + "\n")
+
+    def subscribe(
+        self, ports: Tuple[int, int], log_path: Path, addrs: Optional[Sequence[str]] = None
+    ) -> ProbeSubscription:
+        with self._lock:
+            if self.tracefs is None:
+                self.tracefs = find_tracefs()
+            sub = ProbeSubscription(self, ports, log_path, addrs)
+            self._subs.append(sub)
+            if self._thread is None:
+                self._save()
+            self._apply_filter()
+            if self._thread is None:
+                self._start()
+        return sub
+
+    def unsubscribe(self, sub: ProbeSubscription) -> None:
+        with self._lock:
+            if sub in self._subs:
+                self._subs.remove(sub)
+            if self._subs:
+                self._apply_filter()
+                return
+        self._shutdown()
+
+    def _save(self) -> None:
+        """Remember the event's filter and enable state and the trace clock, for _shutdown."""
+        current = re.search(r"\[(\S+)\]", (self.tracefs / "trace_clock").read_text())
+        self._saved = {
+            "filter": self._event_file("filter").read_text().strip(),
+            "enable": self._event_file("enable").read_text().strip().rstrip("*") or "0",
+            "trace_clock": current.group(1) if current else "local",
+        }
+
+    def _start(self) -> None:
+        (self.tracefs / "trace_clock").write_text("mono\n")
+        # trace "mono" is CLOCK_MONOTONIC; map it onto the epoch like time.time()
+        self._clock_offset_ns = time.time_ns() - time.monotonic_ns()
+        self._event_file("enable").write_text("1\n")
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._reader, daemon=True)
+        self._thread.start()
+
+    def _shutdown(self) -> None:
+        thread = self._thread
+        if thread is None:
+            return
+        self._stop.set()
+        thread.join()
+        self._thread = None
+        self._event_file("enable").write_text("0\n")
+        # "none" is how tracefs shows an empty filter; writing "0" clears it
+        saved_filter = self._saved.get("filter", "none")
+        self._event_file("filter").write_text(("0" if saved_filter == "none" else saved_filter) + "\n")
+        self._event_file("enable").write_text(self._saved.get("enable", "0") + "\n")
+        (self.tracefs / "trace_clock").write_text(self._saved.get("trace_clock", "local") + "\n")
+
+    def _reader(self) -> None:
+        fd = os.open(self.tracefs / "trace_pipe", os.O_RDONLY | os.O_NONBLOCK)
+        pending = ""
+        try:
+            while True:
+                stopping = self._stop.is_set()
+                ready, _, _ = select.select([fd], [], [], 0.05)
+                chunk = b""
+                if ready:
+                    try:
+                        chunk = os.read(fd, _READ_SIZE)
+                    except BlockingIOError:
+                        chunk = b""
+                if chunk:
+                    text = pending + chunk.decode(errors="replace")
+                    cut = text.rfind("\n") + 1
+                    pending = text[cut:]
+                    self._dispatch(_EVENT_RE.findall(text, 0, cut))
+                elif stopping:
+                    break  # drained after stop was requested
+        finally:
+            os.close(fd)
+
+    def _dispatch(self, events: List[tuple]) -> None:
+        if not events:
+            return
+        with self._lock:
+            subs = list(self._subs)
+        by_port: Dict[str, List[tuple]] = {}
+        for event in events:
+            by_port.setdefault(event[5], []).append(event)
+        for port, items in by_port.items():
+            port_number = int(port)
+            for sub in subs:
+                if sub.ports[0] <= port_number <= sub.ports[1]:
+                    sub.write(items, self._clock_offset_ns)
+
+
+_SESSION: Optional[ProbeSession] = None
+
+
+def subscribe(
+    port: int, log_path: Path, addrs: Optional[Sequence[str]] = None, last_port: Optional[int] = None
+) -> ProbeSubscription:
+    """Trace connections towards port..last_port into log_path until .close()."""
+    global _SESSION
+    if _SESSION is None:
+        _SESSION = ProbeSession()
+    return _SESSION.subscribe((port, last_port or port), log_path, addrs)
+
+
+def parse_probe_log(path: Path) -> Dict[FlowKey, FlowSeries]:
+    """Load a tcp_probe log into per-flow tables (only cwnd/ssthresh/rtt set)."""
+    if not path.exists():
+        return {}
+    rows_by_flow: Dict[FlowKey, List[List[str]]] = {}
+    with path.open() as fh:
+        for line in fh:
+            if line.startswith("#") or line.startswith("time_ns\t"):
+                continue
+            parts = line.rstrip("\n").split("\t")
+            if len(parts) != len(LOG_COLUMNS):
+                continue
+            key = (parts[1], int(parts[2]), parts[3], int(parts[4]))
+            rows_by_flow.setdefault(key, []).append([parts[0]] + parts[5:])
+
+    flows: Dict[FlowKey, FlowSeries] = {}
+    for key, rows in rows_by_flow.items():
+        table = np.array(rows, dtype=np.int64)
+        columns = {name: np.full(len(table), np.nan) for name in FIELDS}
+        columns["cwnd"] = table[:, 1].astype(np.float64)
+        ssthresh = table[:, 2].astype(np.float64)
+        ssthresh[table[:, 2] >= TCP_INFINITE_SSTHRESH] = np.nan
+        columns["ssthresh"] = ssthresh
+        columns["rtt"] = table[:, 3] / 1000.0  # srtt is in usec, ss(8) prints ms
+        flows[key] = FlowSeries(key, table[:, 0] / 1e9, columns)
+    return flows
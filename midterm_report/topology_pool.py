@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""Reuse one star topology across runs instead of rebuilding it per scenario.
+
+Building and starting a Mininet network (namespaces, veth pairs, OVS bridge,
+tc trees) and tearing it down again costs seconds per run, which adds up over
+a sweep. TopologyPool keeps the hosts and switch of the last spec alive. When
+the next spec has the same hosts, it only re-applies each link's TCLink
+parameters with `intf.config(...)`. That replaces the root qdiscs, so the
+queues start empty. It also flushes the hosts' TCP metrics cache, so no run
+inherits the previous run's cached ssthresh or RTT. A spec with a different
+host set rebuilds the network. The pool times both paths and reports the
+setup time saved.
+"""
+
+from __future__ import annotations
+
+import time
+from typing import Dict, List, Optional, Tuple
+
+from scenario_spec import LinkSpec, ScenarioSpec
+from tracing import span
+
+
+class TopologyPool:
+    """One live network at a time; use as a context manager (or call close())."""
+
+    def __init__(self, backend: Optional[str] = None, prefix: str = ""):
+        self.backend = backend
+        self.prefix = prefix
+        self.build_times: List[float] = []
+        self.reconfigure_times: List[float] = []
+        self._manager = None
+        self._net = None
+        self._backend = backend
+        self._hosts: Dict[str, object] = {}
+        self._links: Dict[str, object] = {}
+        self._layout: Tuple[str, ...] = ()
+
+    def __enter__(self) -> "TopologyPool":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def acquire(self, spec: ScenarioSpec) -> Dict[str, object]:
+        """Hosts of a started star topology configured for spec, by name."""
+        layout = tuple(sorted(spec.hosts))
+        start = time.perf_counter()
+        if self._net is not None and layout == self._layout:
+            with span("topology.reconfigure", scenario=spec.name):
+                for name, link in spec.links:
+                    self._configure(name, link)
+                self.flush()
+            self.reconfigure_times.append(time.perf_counter() - start)
+        else:
+            self.close()
+            with span("topology.build", scenario=spec.name, hosts=len(layout)):
+                self._build(spec)
+            self.build_times.append(time.perf_counter() - start)
+        return dict(self._hosts)
+
+    def _build(self, spec: ScenarioSpec) -> None:
+        import run_scenarios  # imports the network backend lazily
+
+        self._backend = self.backend or run_scenarios.NET_BACKEND
+        self._manager = run_scenarios.simple_net(self._backend)
+        net = self._manager.__enter__()
+        self._hosts = {name: net.addHost(f"{self.prefix}{name}") for name in sorted(spec.hosts)}
+        s1 = net.addSwitch(f"{self.prefix}s1", failMode="standalone")
+        self._links = {name: net.addLink(self._hosts[name], s1, **link.tc_params()) for name, link in spec.links}
+        net.start()
+        self._net = net
+        self._layout = tuple(sorted(spec.hosts))
+
+    def _configure(self, name: str, link: LinkSpec) -> None:
+        params = link.tc_params()
+        # TCLink shapes both ends; config() rebuilds the qdisc tree from scratch
+        self._links[name].intf1.config(**params)
+        self._links[name].intf2.config(**params)
+
+    def flush(self) -> None:
+        """Forget per-destination TCP state (cached ssthresh/RTT) on every host."""
+        if self._backend == "local":
+            return  # the relay opens fresh sockets per run and has no metrics cache
+        for host in self._hosts.values():
+            host.cmd("ip tcp_metrics flush all")
+
+    def close(self) -> None:
+        if self._manager is not None:
+            manager, self._manager = self._manager, None
+            self._net = None
+            self._hosts, self._links, self._layout = {}, {}, ()
+            with span("topology.teardown"):
+                manager.__exit__(None, None, None)
+
+    def report(self) -> str:
+        """One line: builds, reuses and the setup time reuse saved."""
+        if not self.build_times:
+            return "topology pool: no runs"
+        build = sum(self.build_times) / len(self.build_times)
+        line = f"topology pool: {len(self.build_times)} builds (mean {build:.2f} s)"
+        if self.reconfigure_times:
+            reconfigure = sum(self.reconfigure_times) / len(self.reconfigure_times)
+            saved = len(self.reconfigure_times) * (build - reconfigure)
+            line += (
+                f", {len(self.reconfigure_times)} reconfigures (mean {reconfigure:.2f} s), "
+                f"saved {build - reconfigure:.2f} s/run, {saved:.1f} s total"
+            )
+        return line
+
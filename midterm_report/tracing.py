@@ -0,0 +1,265 @@
+#!/usr/bin/env python3
+"""Phase spans for the experiment pipeline, exported as a Chrome/Perfetto trace.
+
+Code marks its phases with `with span("topology.build"):` (or `@traced`).
+While tracing is off a span costs a few microseconds. `--trace DIR` on
+run_scenarios.py, sweep.py or generate_visuals.py turns them on: enable()
+puts DIR in the environment, so worker processes inherit it. Every process
+then appends its finished spans as JSON lines to DIR/<pid>.jsonl. At the end,
+export() merges them into
+
+    DIR/trace.json   Chrome trace ("X" events, µs on CLOCK_MONOTONIC, which
+                     every process shares); open in https://ui.perfetto.dev
+                     or chrome://tracing
+    DIR/phases.md    count, total, mean, max and share of wall time per phase
+
+Concurrent phases inside one thread (asyncio tasks, e.g. the iperf3 clients)
+take a `lane`, a named track of their own, so their spans do not overlap on
+the thread's track.
+
+With `--profile`, the analysis phases wrapped in profiled() also run under
+cProfile and tracemalloc. Only the outermost profiled block of a process is
+measured. Its span gets the peak traced memory and the functions with the most
+own time, and the full profile lands in DIR/profiles/<phase>-<pid>-<n>.prof
+(`python3 -m pstats` or snakeviz). cProfile, pstats, tracemalloc and
+multiprocessing are imported only when they are needed, so importing this
+module stays cheap for commands that never trace.
+
+    python3 tracing.py DIR     re-merge DIR and print the phase table
+"""
+
+from __future__ import annotations
+
+import functools
+import json
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import TYPE_CHECKING, Dict, Iterator, List, Optional
+
+if TYPE_CHECKING:
+    import cProfile
+
+TRACE_ENV = "PIPELINE_TRACE_DIR"
+PROFILE_ENV = "PIPELINE_PROFILE"
+TOP_FUNCTIONS = 8
+LANE_BASE = 1 << 22  # tids of lanes, above any real thread id
+
+_files: Dict[int, object] = {}  # pid -> open part file (a forked child opens its own)
+_lanes: Dict[tuple, int] = {}  # (pid, lane) -> tid
+_lock = threading.Lock()
+_profiling = False
+_profiles = 0
+
+
+def enable(directory: Path, profile: bool = False) -> None:
+    """Trace this process and the processes it starts into directory (old parts are removed)."""
+    directory.mkdir(parents=True, exist_ok=True)
+    for part in directory.glob("*.jsonl"):
+        part.unlink()
+    os.environ[TRACE_ENV] = str(directory.resolve())
+    if profile:
+        os.environ[PROFILE_ENV] = "1"
+    else:
+        os.environ.pop(PROFILE_ENV, None)
+
+
+def enabled() -> bool:
+    return TRACE_ENV in os.environ
+
+
+def _write(event: dict) -> None:
+    pid = os.getpid()
+    with _lock:
+        out = _files.get(pid)
+        if out is None:
+            import multiprocessing
+
+            directory = Path(os.environ[TRACE_ENV])
+            out = _files[pid] = (directory / f"{pid}.jsonl").open("a", buffering=1)
+            process = Path(sys.argv[0]).stem or "python"
+            worker = multiprocessing.current_process().name
+            if worker != "MainProcess":
+                process += f" ({worker})"
+            out.write(json.dumps({"ph": "M", "name": "process_name", "pid": pid, "tid": 0, "args": {"name": process}}))
+            out.write("\n")
+        out.write(json.dumps(event) + "\n")
+
+
+def _tid(lane: Optional[str]) -> int:
+    if lane is None:
+        return threading.get_native_id()
+    tid = _lanes.get((os.getpid(), lane))
+    if tid is None:
+        tid = _lanes[os.getpid(), lane] = LANE_BASE + len(_lanes)
+        _write({"ph": "M", "name": "thread_name", "pid": os.getpid(), "tid": tid, "args": {"name": lane}})
+    return tid
+
+
+@contextmanager
+def span(name: str, cat: str = "pipeline", lane: Optional[str] = None, **args) -> Iterator[dict]:
+    """Time the block as one phase; yields its args dict, which the block may add to."""
+    if TRACE_ENV not in os.environ:
+        yield args
+        return
+    start = time.monotonic_ns()
+    try:
+        yield args
+    finally:
+        end = time.monotonic_ns()
+        _write({
+            "name": name, "cat": cat, "ph": "X", "ts": start / 1e3, "dur": (end - start) / 1e3,
+            "pid": os.getpid(), "tid": _tid(lane), "args": {key: _arg(value) for key, value in args.items()},
+        })
+
+
+def _arg(value):
+    return value if isinstance(value, (str, int, float, bool, list, type(None))) else str(value)
+
+
+def traced(name: Optional[str] = None, cat: str = "pipeline"):
+    """Decorator: run the function inside span(name or its qualified name)."""
+
+    def decorate(func):
+        label = name or func.__qualname__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with span(label, cat):
+                return func(*args, **kwargs)
+
+        return wrapper
+
+    return decorate
+
+
+def _top_functions(profile: cProfile.Profile) -> List[str]:
+    import pstats
+
+    stats = pstats.Stats(profile).stats  # (file, line, function) -> (cc, calls, own s, cumulative s, callers)
+    rows = sorted(stats.items(), key=lambda item: item[1][2], reverse=True)[:TOP_FUNCTIONS]
+    return [
+        f"{func} ({Path(filename).name}:{line}) {own * 1e3:.1f} ms own, {calls} calls"
+        for (filename, line, func), (_, calls, own, _, _) in rows
+    ]
+
+
+@contextmanager
+def profiled(name: str, cat: str = "analysis", **args) -> Iterator[dict]:
+    """span() that, under --profile, also runs the block under cProfile and tracemalloc."""
+    global _profiling, _profiles
+    with span(name, cat, **args) as span_args:
+        if _profiling or PROFILE_ENV not in os.environ or TRACE_ENV not in os.environ:
+            yield span_args
+            return
+        import cProfile
+        import tracemalloc
+
+        _profiling = True
+        started_tracemalloc = not tracemalloc.is_tracing()
+        if started_tracemalloc:
+            tracemalloc.start()
+        tracemalloc.reset_peak()
+        profile = cProfile.Profile()
+        profile.enable()
+        try:
+            yield span_args
+        finally:
+            profile.disable()
+            span_args["peak_mib"] = round(tracemalloc.get_traced_memory()[1] / 2**20, 2)
+            if started_tracemalloc:
+                tracemalloc.stop()
+            _profiling = False
+            _profiles += 1
+            directory = Path(os.environ[TRACE_ENV]) / "profiles"
+            directory.mkdir(exist_ok=True)
+            path = directory / f"{name.replace('/', '_')}-{os.getpid()}-{_profiles}.prof"
+            profile.dump_stats(path)
+            span_args["profile"] = str(path)
+            span_args["top"] = _top_functions(profile)
+
+
+# -- export ------------------------------------------------------------------------
+
+
+def collect(directory: Path) -> List[dict]:
+    """Every event of every process part in directory."""
+    for out in _files.values():
+        out.flush()
+    events = []
+    for part in sorted(directory.glob("*.jsonl")):
+        with part.open() as fh:
+            events.extend(json.loads(line) for line in fh if line.endswith("\n"))
+    return events
+
+
+def summary_table(events: List[dict]) -> str:
+    """Markdown table of the "X" spans by phase name, longest total first.
+
+    Share is the phase's total over the traced wall time; nested and parallel
+    phases overlap, so the shares add up to more than 100 %.
+    """
+    spans = [event for event in events if event.get("ph") == "X"]
+    if not spans:
+        return "no spans recorded\n"
+    wall = max(event["ts"] + event["dur"] for event in spans) - min(event["ts"] for event in spans)
+    phases: Dict[str, List[float]] = {}
+    for event in spans:
+        phases.setdefault(event["name"], []).append(event["dur"] / 1e3)
+    rows = [
+        f"traced wall time {wall / 1e6:.2f} s, {len(spans)} spans",
+        "",
+        "| phase | count | total (ms) | mean (ms) | max (ms) | % of wall |",
+        "| --- | --- | --- | --- | --- | --- |",
+    ]
+    for name, durations in sorted(phases.items(), key=lambda item: -sum(item[1])):
+        total = sum(durations)
+        rows.append(
+            f"| {name} | {len(durations)} | {total:.1f} | {total / len(durations):.1f} | {max(durations):.1f} "
+            f"| {100 * total * 1e3 / wall if wall else 0.0:.1f} |"
+        )
+    return "\n".join(rows) + "\n"
+
+
+def export(directory: Path) -> str:
+    """Write trace.json and phases.md from directory's parts; returns the phase table."""
+    events = collect(directory)
+    tmp = directory / "trace.json.tmp"
+    tmp.write_text(json.dumps({"traceEvents": events, "displayTimeUnit": "ms"}))
+    os.replace(tmp, directory / "trace.json")
+    table = summary_table(events)
+    (directory / "phases.md").write_text(table)
+    return table
+
+
+@contextmanager
+def session(directory: Optional[Path], profile: bool = False, name: Optional[str] = None) -> Iterator[None]:
+    """Trace a CLI run into directory (a no-op for None), exporting when it ends."""
+    if directory is None:
+        yield
+        return
+    enable(directory, profile)
+    try:
+        with span(name or Path(sys.argv[0]).stem, "main"):
+            yield
+    finally:
+        print(export(directory), end="")
+        print(f"trace: {directory / 'trace.json'}")
+
+
+def add_arguments(parser) -> None:
+    parser.add_argument("--trace", type=Path, metavar="DIR", help="record phase spans into DIR/trace.json")
+    parser.add_argument("--profile", action="store_true", help="with --trace, cProfile/tracemalloc the analysis")
+
+
+def main() -> None:
+    if len(sys.argv) != 2:
+        sys.exit(f"usage: {sys.argv[0]} TRACE_DIR")
+    print(export(Path(sys.argv[1])), end="")
+
+
+if __name__ == "__main__":
+    main()